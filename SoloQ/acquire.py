@@ -1,5 +1,15 @@
-from collector import collect_all_tiers
+import sys
+from collector import collect_all_tiers, TIERS
+from journal import get_journal, print_status
 
+# python acquire.py           -> collect (resumes from <OUT_DIR>/journal.sqlite)
+# python acquire.py --status  -> show what is done / left in the journal
+# python acquire.py --reset   -> forget the journal and collect from scratch
 if __name__ == "__main__":
+    if "--status" in sys.argv:
+        print_status(tiers=TIERS)
+        sys.exit(0)
+    if "--reset" in sys.argv:
+        get_journal().reset()
     collect_all_tiers(max_pages_per_player=None)
     print("\n🎯 All tiers collected.")
@@ -0,0 +1,613 @@
+# SoloQ/bench.py
+# Micro-benchmarks for the SoloQ pipeline, run against local data only.
+#
+#   python bench.py http --requests 300 --threads 8
+#   python bench.py http --cert cert.pem --key key.pem      # HTTPS stub (self-signed)
+#   python bench.py storage --root output_15.24_by_tier      # size / read speed per RAW_STORAGE
+#   python bench.py scan --root output_15.24_by_tier         # full scan: directory of files vs archive
+#   python bench.py json --root output_15.24_by_tier         # MB/s per JSON decoder (jsonio backends)
+#   python bench.py timeline --minutes 10 15 20              # full timeline decode vs timeline_stream
+#   python bench.py lanes --root output_15.24_by_tier        # per-match pandas lane diffs vs LaneStats
+#   python bench.py table --copies 20                        # list-of-dicts vs WideTable: time / peak memory
+#   python bench.py project --root output_15.24_by_tier      # wide dump vs projected columns: parse time / CSV size
+#   python bench.py pipeline --copies 20                     # parse save -> clean -> unified read: CSV vs Parquet
+#   python bench.py unified --rows 1000000                   # unified build: per-row string mapping vs categoricals
+import io, os, json, time, shutil, argparse, tempfile, tracemalloc, contextlib
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("RIOT_API_KEY", "stub")
+
+
+def _rate(n, sec):
+    return n / sec if sec > 0 else 0.0
+
+
+def bench_http(args):
+    import requests
+    from stub_server import StubRiotServer
+    from http_client import make_session
+    from config import HEAD
+
+    srv = StubRiotServer(args.root, port=0, certfile=args.cert, keyfile=args.key).start()
+    mids = sorted(srv.matches)
+    urls = [
+        f"{srv.base.format(route='asia')}/lol/match/v5/matches/{mids[i % len(mids)]}"
+        for i in range(args.requests)
+    ]
+    verify = args.cert if args.cert else True
+    print(f"[BENCH] {args.requests} match requests, {srv.scheme}, threads={args.threads}")
+
+    def run(get):
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.threads) as pool:
+            for r in pool.map(get, urls):
+                r.raise_for_status()
+        return time.perf_counter() - t0
+
+    no_pool = run(lambda u: requests.get(u, headers=HEAD, timeout=20, verify=verify))
+    session = make_session(pool_size=args.threads)
+    pooled = run(lambda u: session.get(u, timeout=20, verify=verify))
+
+    print(f"  no pool : {no_pool:7.2f}s  {_rate(args.requests, no_pool):8.1f} req/s")
+    print(f"  pooled  : {pooled:7.2f}s  {_rate(args.requests, pooled):8.1f} req/s")
+    print(f"  speedup : {no_pool / pooled:.2f}x")
+    srv.stop()
+
+
+def bench_storage(args):
+    from utils import walk_raw, load_json, safe_write
+
+    paths = sorted(walk_raw(args.root))
+    paths = paths[: args.files] if args.files else paths
+    docs = [load_json(p) for p in paths]
+    print(f"[BENCH] {len(paths)} match/timeline files from {args.root}")
+    print(f"  {'storage':<8} {'MB':>8} {'ratio':>6} {'write s':>8} {'read s':>7} {'files/s':>8}")
+
+    base = None
+    for storage in args.storage:
+        tmp = tempfile.mkdtemp(prefix=f"bench_{storage}_")
+        try:
+            t0 = time.perf_counter()
+            written = [safe_write(os.path.join(tmp, f"{i}.json"), d, storage) for i, d in enumerate(docs)]
+            write = time.perf_counter() - t0
+            size = sum(os.path.getsize(p) for p in written)
+            base = base or size
+            t0 = time.perf_counter()
+            for p in written:
+                load_json(p)
+            read = time.perf_counter() - t0
+            print(f"  {storage:<8} {size / 1e6:8.1f} {base / size:5.1f}x {write:8.2f} {read:7.2f} "
+                  f"{_rate(len(written), read):8.1f}")
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _scan_tree(base_dir, decode=True):
+    from raw_store import open_store, tier_dirs
+
+    n = 0
+    for _, tier_dir in tier_dirs(base_dir):
+        store = open_store(tier_dir)
+        for kind in ("matches", "timelines"):
+            for _, raw in store.scan(kind):
+                if decode:
+                    json.loads(raw)
+                n += 1
+        store.close()
+    return n
+
+
+def _disk_usage(base_dir):
+    files = size = 0
+    for root, _, names in os.walk(base_dir):
+        files += len(names)
+        size += sum(os.path.getsize(os.path.join(root, fn)) for fn in names)
+    return files, size
+
+
+def bench_scan(args):
+    from raw_store import pack_tier, tier_dirs
+
+    tmp = tempfile.mkdtemp(prefix="bench_scan_")
+    try:
+        tree = os.path.join(tmp, "tree")
+        shutil.copytree(args.root, tree)
+        print(f"[BENCH] full scan of {args.root} (matches + timelines), best of {args.repeat}")
+        print("  read = bytes only, scan = read + json.loads")
+        print(f"  {'layout':<16} {'files':>6} {'MB':>7} {'read s':>7} {'scan s':>7} {'resp/s':>8}")
+        for label in ("files", f"archive ({args.storage})"):
+            if label != "files":
+                for _, tier_dir in tier_dirs(tree):
+                    pack_tier(tier_dir, args.storage)
+            best = {True: None, False: None}
+            for _ in range(args.repeat):
+                for decode in (False, True):
+                    t0 = time.perf_counter()
+                    n = _scan_tree(tree, decode)
+                    sec = time.perf_counter() - t0
+                    best[decode] = sec if best[decode] is None else min(best[decode], sec)
+            files, size = _disk_usage(tree)
+            print(f"  {label:<16} {files:6d} {size / 1e6:7.1f} {best[False]:7.2f} {best[True]:7.2f} "
+                  f"{_rate(n, best[True]):8.1f}")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def bench_json(args):
+    import mmap
+    from jsonio import DECODERS, BACKEND
+    from utils import walk_raw, read_raw
+
+    paths = sorted(walk_raw(args.root))
+    if args.kind:
+        paths = [p for p in paths if os.sep + args.kind + os.sep in p]
+    blobs = [read_raw(p) for p in paths]
+    mb = sum(len(b) for b in blobs) / 1e6
+    print(f"[BENCH] {len(paths)} files, {mb:.1f} MB of JSON, best of {args.repeat} (default backend: {BACKEND})")
+    print(f"  {'decoder':<9} {'source':<6} {'sec':>7} {'MB/s':>8}")
+
+    def from_mmap(path):
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            return decode(m)
+
+    for name, decode in DECODERS.items():
+        sources = [("bytes", lambda: [decode(b) for b in blobs])]
+        if all(p.endswith(".json") for p in paths):
+            sources.append(("mmap", lambda: [from_mmap(p) for p in paths]))
+        for label, run in sources:
+            best = None
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                run()
+                sec = time.perf_counter() - t0
+                best = sec if best is None else min(best, sec)
+            print(f"  {name:<9} {label:<6} {best:7.2f} {_rate(mb, best):8.1f}")
+
+
+def bench_timeline(args):
+    from jsonio import loads
+    from raw_store import open_store, tier_dirs
+    from timeline_stream import frames_at, pick_frames
+
+    targets = [m * 60_000 for m in args.minutes]
+    items = []
+    for _, tier_dir in tier_dirs(args.root):
+        store = open_store(tier_dir)
+        items += [(store, mid) for mid in store.ids("timelines")]
+    print(f"[BENCH] {len(items)} timelines from {args.root}, minutes={args.minutes}, best of {args.repeat}")
+
+    def full():
+        for store, mid in items:
+            with store.view("timelines", mid) as buf:
+                pick_frames(loads(buf).get("info", {}).get("frames", []), targets)
+
+    def stream():
+        for store, mid in items:
+            with store.view("timelines", mid) as buf:
+                frames_at(buf, targets)
+
+    base = None
+    for label, run in (("full decode", full), ("stream", stream)):
+        best = None
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            run()
+            sec = time.perf_counter() - t0
+            best = sec if best is None else min(best, sec)
+        base = base or best
+        print(f"  {label:<12} {best:7.3f}s  {best / len(items) * 1000:7.2f} ms/match  {base / best:5.1f}x")
+
+
+def _lane_diffs_per_match(m: dict, frames: dict, minutes):
+    """Baseline for `bench.py lanes`: the old per-match pandas lane diffs (clean.py before
+    lane_diffs.LaneStats). frames maps minute -> timeline frame; one row per participant."""
+    out = {}
+    for minute in minutes:
+        frame = frames.get(minute)
+        if frame is None:
+            continue
+        for row in _lane_diffs_at(m, frame, minute):
+            out.setdefault((row["matchId"], row["participantId"]), {}).update(row)
+    return list(out.values())
+
+
+def _lane_diffs_at(m: dict, frame: dict, minute: int):
+    import pandas as pd
+    from lane_diffs import lane_key
+
+    info = m.get("info", {})
+    parts = info.get("participants", [])
+    pframes = frame.get("participantFrames", {})
+
+    rows = []
+    for p in parts:
+        pid = p.get("participantId")
+        team_id = p.get("teamId")
+        pos = lane_key(p.get("teamPosition"))
+        key = str(pid)
+
+        pf = pframes.get(key)
+        if not pf:
+            continue
+
+        gold = pf.get("totalGold", 0) or 0
+        xp = pf.get("xp", 0) or 0
+        cs = (pf.get("minionsKilled", 0) or 0) + (pf.get("jungleMinionsKilled", 0) or 0)
+
+        rows.append({
+            "matchId": m.get("metadata", {}).get("matchId"),
+            "participantId": int(pid),
+            "teamId": int(team_id),
+            "role_key": pos,
+            "gold": float(gold),
+            "xp": float(xp),
+            "cs": float(cs),
+        })
+
+    if not rows:
+        return []
+
+    df = pd.DataFrame(rows)
+
+    out = []
+    for match_id, g_match in df.groupby("matchId"):
+        for role, g_role in g_match.groupby("role_key"):
+            if role == "UNKNOWN":
+                continue
+
+            by_team = {}
+            for team_id, g_team in g_role.groupby("teamId"):
+                g_team_sorted = g_team.sort_values("gold", ascending=False)
+                by_team[team_id] = g_team_sorted.iloc[0]
+
+            if len(by_team) != 2:
+                continue
+
+            teams = list(by_team.keys())
+            a = by_team[teams[0]]
+            b = by_team[teams[1]]
+
+            # a 기준
+            out.append({
+                "matchId": match_id,
+                "participantId": int(a["participantId"]),
+                f"gold_diff_{minute}": float(a["gold"] - b["gold"]),
+                f"xp_diff_{minute}": float(a["xp"] - b["xp"]),
+                f"cs_diff_{minute}": float(a["cs"] - b["cs"]),
+            })
+            # b 기준
+            out.append({
+                "matchId": match_id,
+                "participantId": int(b["participantId"]),
+                f"gold_diff_{minute}": float(b["gold"] - a["gold"]),
+                f"xp_diff_{minute}": float(b["xp"] - a["xp"]),
+                f"cs_diff_{minute}": float(b["cs"] - a["cs"]),
+            })
+
+    return out
+
+
+def bench_lanes(args):
+    import pandas as pd
+    os.environ.setdefault("RIOT_API_KEY", "stub")
+    from lane_diffs import LaneStats
+    from raw_store import open_store, tier_dirs
+    from timeline_stream import frames_at
+
+    targets = {m: m * 60_000 for m in args.minutes}
+    items = []
+    for _, tier_dir in tier_dirs(args.root):
+        store = open_store(tier_dir)
+        timelines = set(store.ids("timelines"))
+        for mid in store.ids("matches"):
+            if mid in timelines:
+                with store.view("timelines", mid) as buf:
+                    at = frames_at(buf, list(targets.values()))
+                items.append((store.load("matches", mid), {m: at[ms] for m, ms in targets.items() if ms in at}))
+    print(f"[BENCH] lane diffs for {len(items)} matches, minutes={args.minutes}, best of {args.repeat}")
+
+    def per_match():
+        rows = []
+        for m, frames in items:
+            rows.extend(_lane_diffs_per_match(m, frames, args.minutes))
+        return pd.DataFrame(rows)
+
+    def batch():
+        stats = LaneStats(args.minutes)
+        for m, frames in items:
+            stats.add(m, frames)
+        return stats.frame()
+
+    results, base = {}, None
+    for label, run in (("per-match", per_match), ("batch", batch)):
+        best = None
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            results[label] = run()
+            sec = time.perf_counter() - t0
+            best = sec if best is None else min(best, sec)
+        base = base or best
+        print(f"  {label:<10} {best:7.3f}s  {best / len(items) * 1e6:8.1f} us/match  {base / best:6.1f}x")
+    pd.testing.assert_frame_equal(results["per-match"], results["batch"])
+    print("  outputs identical")
+
+
+def bench_table(args):
+    import pandas as pd
+    from parse import parse_one_json
+    from raw_store import open_store, tier_dirs
+    from wide_table import WideTable
+
+    matches = []
+    for tier, tier_dir in tier_dirs(args.root):
+        store = open_store(tier_dir)
+        matches += [(tier, store.load("matches", mid)) for mid in store.ids("matches")]
+        store.close()
+    matches *= args.copies
+    print(f"[BENCH] wide table from {len(matches)} matches ({args.copies}x corpus), best of {args.repeat}")
+
+    # 두 경로 모두 match마다 parse_one_json을 부르고, row를 어디에 쌓는지만 다르다
+    def records():
+        rows = []
+        for tier, m in matches:
+            rows.extend(parse_one_json(tier, m))
+        return pd.DataFrame(rows)
+
+    def columnar():
+        table = WideTable()
+        for tier, m in matches:
+            table.extend(parse_one_json(tier, m))
+        return table.frame()
+
+    results, base = {}, None
+    for label, run in (("records", records), ("columnar", columnar)):
+        best = None
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            results[label] = run()
+            sec = time.perf_counter() - t0
+            best = sec if best is None else min(best, sec)
+        results.pop(label)
+        tracemalloc.start()
+        results[label] = run()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        base = base or best
+        print(f"  {label:<9} {best:7.3f}s  peak {peak / 2**20:8.1f} MB  {base / best:5.2f}x")
+    pd.testing.assert_frame_equal(results["records"], results["columnar"])
+    print(f"  outputs identical {results['columnar'].shape}")
+
+
+def bench_project(args):
+    import pandas as pd
+    from parse import parse_one_json, projected_columns, sanitize_key
+    from raw_store import open_store, tier_dirs
+    from wide_table import WideTable
+
+    matches = []
+    for tier, tier_dir in tier_dirs(args.root):
+        store = open_store(tier_dir)
+        matches += [(tier, store.load("matches", mid)) for mid in store.ids("matches")]
+        store.close()
+    cols = projected_columns()
+    print(f"[BENCH] {len(matches)} matches, wide dump vs {len(cols)} projected columns, best of {args.repeat}")
+
+    def build(columns):
+        table = WideTable()
+        for tier, m in matches:
+            table.extend(parse_one_json(tier, m, columns))
+        df = table.frame()
+        df.columns = [sanitize_key(c) for c in df.columns]
+        return df
+
+    results, base = {}, None
+    for label, columns in (("wide", None), ("projected", cols)):
+        best = None
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            results[label] = build(columns)
+            sec = time.perf_counter() - t0
+            best = sec if best is None else min(best, sec)
+        size = len(results[label].to_csv(index=False).encode("utf-8"))
+        base = base or best
+        print(f"  {label:<10} {best:7.3f}s  {results[label].shape[1]:4d} cols  csv {size / 2**20:6.2f} MB  "
+              f"{base / best:5.1f}x")
+    wide, proj = results["wide"], results["projected"]
+    pd.testing.assert_frame_equal(proj, wide[[c for c in cols if c in wide.columns]])
+    print("  projected columns identical to the wide dump")
+
+
+def bench_pipeline(args):
+    import pandas as pd
+    import tableio
+    from parse import FULL_SCHEMA, build_dataframe, projected_columns
+    from clean import CLEAN_SCHEMA, clean_soloq_df
+    from projection import CLEAN_COLUMNS
+
+    if not tableio.HAS_ARROW:
+        print("[BENCH] pyarrow not installed; nothing to compare")
+        return
+    one = build_dataframe(args.root, columns=projected_columns())
+    df = pd.concat([one] * args.copies, ignore_index=True)
+    print(f"[BENCH] {len(df)} rows x {df.shape[1]} cols (x{args.copies}), best of {args.repeat}")
+
+    # csv: 예전 경로 (to_csv / read_csv), parquet: tableio + schema
+    def csv_save(frame, stem, schema, encoding="utf-8"):
+        frame.to_csv(stem + ".csv", index=False, encoding=encoding)
+        return [stem + ".csv"]
+
+    def csv_load(stem, columns=None):
+        wanted = set(columns) if columns is not None else None
+        return pd.read_csv(stem + ".csv", usecols=(lambda c: c in wanted) if wanted is not None else None)
+
+    def pq_save(frame, stem, schema, encoding="utf-8"):
+        return tableio.save_table(frame, stem, schema, csv=False)
+
+    def pq_load(stem, columns=None):
+        return tableio.load_table(stem, columns=columns)
+
+    base = None
+    for label, save, load in (("csv", csv_save, csv_load), ("parquet", pq_save, pq_load)):
+        best, sizes = None, {}
+        for _ in range(args.repeat):
+            tmp = tempfile.mkdtemp(prefix=f"bench_{label}_")
+            try:
+                full, clean = os.path.join(tmp, "soloq_full"), os.path.join(tmp, "soloq_clean")
+                stages = {}
+                t0 = time.perf_counter()
+                files = save(df, full, FULL_SCHEMA, encoding="utf-8-sig")
+                stages["parse save"] = time.perf_counter() - t0
+                t = time.perf_counter()
+                raw = load(full, CLEAN_COLUMNS)
+                stages["clean load"] = time.perf_counter() - t
+                t = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):  # clean의 [INFO] 출력 생략
+                    cleaned = clean_soloq_df(raw)
+                stages["clean"] = time.perf_counter() - t
+                t = time.perf_counter()
+                files += save(cleaned, clean, CLEAN_SCHEMA)
+                stages["clean save"] = time.perf_counter() - t
+                t = time.perf_counter()
+                load(clean)
+                stages["unified load"] = time.perf_counter() - t
+                total = time.perf_counter() - t0
+                sizes = {os.path.basename(f): os.path.getsize(f) for f in files}
+            finally:
+                shutil.rmtree(tmp, ignore_errors=True)
+            if best is None or total < best[0]:
+                best = (total, stages)
+        total, stages = best
+        base = base or total
+        print(f"  {label:<8} {total:7.3f}s  {base / total:5.1f}x  " +
+              "  ".join(f"{k} {v:.3f}s" for k, v in stages.items()))
+        for name, size in sizes.items():
+            print(f"           {name:<24} {size / 2**20:8.2f} MB")
+
+
+def _unified_build(label, pro_path, soloq_path, repeat):
+    # 새 프로세스에서 실행: peak RSS가 다른 쪽 실행의 영향을 받지 않게
+    import sys
+    import resource
+    import pandas as pd
+    # unified.py는 repo root에 있다
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import unified
+
+    if label == "rowwise":
+        # 예전 경로: 행마다 astype(str) / normalize_role, 문자열 컬럼으로 concat
+        unified.map_categorical = lambda values, fn: values.map(fn)
+        unified.constant_categorical = lambda value, index: pd.Series(value, index=index)
+        unified.concat_categorical = lambda frames: pd.concat(frames, ignore_index=True)
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            out = unified.build_unified_dataset(pro_path, soloq_path)
+        sec = time.perf_counter() - t0
+        best = sec if best is None else min(best, sec)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before  # KB (Linux)
+    digest = int(pd.util.hash_pandas_object(out, index=False).sum())
+    return best, peak * 1024, out.shape, digest, out.dtypes.astype(str).tolist(), out.memory_usage(deep=True).sum()
+
+
+def bench_unified(args):
+    import pandas as pd
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    pro, soloq = pd.read_parquet(args.pro), pd.read_parquet(args.soloq)
+    copies = max(1, -(-args.rows // (len(pro) + len(soloq))))
+    # 복사본마다 match id를 다르게 (실제 데이터처럼 경기 수에 비례하는 id 종류)
+    pro = pd.concat([pro.assign(gameid=pro["gameid"].astype(str) + f"_{i}") for i in range(copies)], ignore_index=True)
+    soloq = pd.concat([soloq.assign(matchId=soloq["matchId"].astype(str) + f"_{i}") for i in range(copies)],
+                      ignore_index=True)
+    tmp = tempfile.mkdtemp(prefix="bench_unified_")
+    try:
+        pro_path, soloq_path = os.path.join(tmp, "pro.parquet"), os.path.join(tmp, "soloq.parquet")
+        pro.to_parquet(pro_path, index=False)
+        soloq.to_parquet(soloq_path, index=False)
+        print(f"[BENCH] unified build from {len(pro)} pro + {len(soloq)} soloq rows (x{copies}), best of {args.repeat}")
+        del pro, soloq
+
+        results, base = {}, None
+        for label in ("rowwise", "categorical"):
+            with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as ex:
+                best, peak, shape, digest, dtypes, nbytes = ex.submit(
+                    _unified_build, label, pro_path, soloq_path, args.repeat).result()
+            results[label] = (shape, digest, dtypes)
+            base = base or best
+            print(f"  {label:<11} {best:7.3f}s  peak RSS +{peak / 2**20:7.1f} MB  {base / best:5.2f}x")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    assert results["rowwise"] == results["categorical"], "unified outputs differ"
+    print(f"  outputs identical {shape}, {nbytes / 2**20:.1f} MB in memory")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("http", help="requests/sec with and without the pooled session")
+    p.add_argument("--root", default="output_15.24_by_tier")
+    p.add_argument("--requests", type=int, default=300)
+    p.add_argument("--threads", type=int, default=8)
+    p.add_argument("--cert", default=None)
+    p.add_argument("--key", default=None)
+    p.set_defaults(fn=bench_http)
+
+    p = sub.add_parser("storage", help="on-disk size and read speed of json / gzip / zstd raw files")
+    p.add_argument("--root", default="output_15.24_by_tier")
+    p.add_argument("--files", type=int, default=0, help="limit the number of files (0 = all)")
+    p.add_argument("--storage", nargs="+", default=["json", "gzip", "zstd"])
+    p.set_defaults(fn=bench_storage)
+
+    p = sub.add_parser("scan", help="full-scan time of the per-file layout vs <tier>/archive.sqlite")
+    p.add_argument("--root", default="output_15.24_by_tier")
+    p.add_argument("--storage", default="zstd", help="blob storage inside the archive")
+    p.add_argument("--repeat", type=int, default=3)
+    p.set_defaults(fn=bench_scan)
+
+    p = sub.add_parser("json", help="decode throughput of stdlib json / orjson / simdjson on real files")
+    p.add_argument("--root", default="output_15.24_by_tier")
+    p.add_argument("--kind", choices=["matches", "timelines"], default=None)
+    p.add_argument("--repeat", type=int, default=3)
+    p.set_defaults(fn=bench_json)
+
+    p = sub.add_parser("timeline", help="per-match cost of frames at N minutes: full decode vs streaming reader")
+    p.add_argument("--root", default="output_15.24_by_tier")
+    p.add_argument("--minutes", type=int, nargs="+", default=[10])
+    p.add_argument("--repeat", type=int, default=3)
+    p.set_defaults(fn=bench_timeline)
+
+    p = sub.add_parser("lanes", help="lane diff table: per-match pandas groupby vs batch NumPy engine")
+    p.add_argument("--root", default="output_15.24_by_tier")
+    p.add_argument("--minutes", type=int, nargs="+", default=[10])
+    p.add_argument("--repeat", type=int, default=3)
+    p.set_defaults(fn=bench_lanes)
+
+    p = sub.add_parser("table", help="wide participant table: list of row dicts vs typed column buffers")
+    p.add_argument("--root", default="output_15.24_by_tier")
+    p.add_argument("--copies", type=int, default=10, help="repeat the corpus to get a realistic row count")
+    p.add_argument("--repeat", type=int, default=3)
+    p.set_defaults(fn=bench_table)
+
+    p = sub.add_parser("project", help="parse.py wide dump vs projection to the columns clean / unified use")
+    p.add_argument("--root", default="output_15.24_by_tier")
+    p.add_argument("--repeat", type=int, default=3)
+    p.set_defaults(fn=bench_project)
+
+    p = sub.add_parser("pipeline", help="end-to-end intermediate I/O: CSV files vs typed Parquet (time / size)")
+    p.add_argument("--root", default="output_15.24_by_tier")
+    p.add_argument("--copies", type=int, default=10, help="repeat the corpus to get a realistic row count")
+    p.add_argument("--repeat", type=int, default=3)
+    p.set_defaults(fn=bench_pipeline)
+
+    p = sub.add_parser("unified", help="unified.py build at 1M+ rows: per-row string mapping vs categoricals")
+    p.add_argument("--pro", default="../pro/data/pro_2025_cleaned.parquet")
+    p.add_argument("--soloq", default="data/soloq_clean_15.24.parquet")
+    p.add_argument("--rows", type=int, default=1_000_000, help="replicate both inputs to at least this many rows")
+    p.add_argument("--repeat", type=int, default=3)
+    p.set_defaults(fn=bench_unified)
+
+    args = ap.parse_args()
+    args.fn(args)
@@ -1,15 +1,61 @@
 # soloq/clean.py
 import os
 import re
-import json
+import argparse
 import pandas as pd
-from config import PATCH_MM  
+from config import LANE_DIFF_MINUTES, PATCH_MM
+from raw_store import open_store
+from jsonio import loads
+from timeline_stream import frames_at
+from lane_diffs import LaneStats
+from projection import CLEAN_COLUMNS
+from tableio import apply_schema, load_table, map_categorical, save_table, table_exists
 
 RAW_DIR = "data"
 OUT_DIR = "data"
 LANE_DIFF_PREFIX = "soloq_lane_diffs"  
-TARGET_MS = 600_000 
 
+# data/soloq_clean_<PATCH>.parquet dtype (unified 입력)
+CLEAN_SCHEMA = {
+    "tier": "category", "role": "category", "patch": "category",
+    "kills": "int64", "deaths": "int64", "assists": "int64",
+    "kda": "float32", "gpm": "float32", "dpm": "float32", "cspm": "float32",
+    "gold_diff_10": "float32", "xp_diff_10": "float32", "cs_diff_10": "float32",
+    "lane_pressure_index": "float32",
+}
+
+
+def lane_columns(minutes) -> list:
+    # build_lane_diff_table가 minute마다 만드는 컬럼
+    return [f"{f}_diff_{m}" for m in minutes for f in ("gold", "xp", "cs")]
+
+
+def lane_minutes(columns) -> tuple:
+    # 저장된 lane diff 테이블에 실제로 있는 minute (gold_diff_<m>)
+    return tuple(sorted(int(m.group(1)) for c in columns if (m := re.fullmatch(r"gold_diff_(\d+)", c))))
+
+
+def lane_schema(minutes) -> dict:
+    return {c: "float32" for c in lane_columns(minutes)}
+
+
+
+# teamPosition (대문자) -> role. 없는 값은 대문자 그대로
+CLEAN_ROLES = {
+    "TOP": "TOP",
+    "JUNGLE": "JUNGLE",
+    "MIDDLE": "MID",
+    "MID": "MID",
+    "BOTTOM": "BOT",
+    "ADC": "BOT",
+    "UTILITY": "SUPPORT",
+    "SUPPORT": "SUPPORT",
+}
+
+
+def clean_role(pos) -> str:
+    r = "" if pd.isna(pos) else str(pos).upper()
+    return CLEAN_ROLES.get(r, r)
 
 
 def normalize_patch(version: str) -> str:
@@ -23,7 +69,10 @@ def normalize_patch(version: str) -> str:
 
 
 
-def detect_soloq_base_dir() -> str:
+def detect_soloq_base_dir(patch_mm: str | None = None) -> str:
+    # output_<PATCH>_by_tier가 있으면 그것, 없으면 처음 찾은 output_*_by_tier
+    if patch_mm and os.path.isdir(f"output_{patch_mm}_by_tier"):
+        return f"output_{patch_mm}_by_tier"
     cands = [d for d in os.listdir(".")
              if d.startswith("output_") and d.endswith("_by_tier") and os.path.isdir(d)]
     if not cands:
@@ -31,151 +80,79 @@ def detect_soloq_base_dir() -> str:
     return cands[0]
 
 
-def load_json(path: str):
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+def load_match_index(path: str) -> pd.DataFrame:
+    # parse.py가 저장한 match index (participant 단위, Parquet 또는 CSV)
+    return load_table(path, csv_dtype={"tier": str, "matchId": str, "gameVersion": str, "patch": str,
+                                       "teamPosition": str})
 
 
-def pick_frame_at_10min(timeline: dict) -> dict | None:
-    frames = timeline.get("info", {}).get("frames", [])
-    if not frames:
-        return None
-    cands = [fr for fr in frames if fr.get("timestamp", 0) >= TARGET_MS]
-    if cands:
-        return cands[0]
-    return frames[-1]
-
-
-def lane_key(team_position: str | None) -> str:
-    if not team_position:
-        return "UNKNOWN"
-    t = str(team_position).upper()
-    if t in {"TOP", "JUNGLE", "MIDDLE", "BOTTOM", "UTILITY"}:
-        return t
-    return "UNKNOWN"
-
-
-def collect_lane_diffs_for_match(match_path: str, timeline_path: str):
-    m = load_json(match_path)
-    t = load_json(timeline_path)
-
-    info = m.get("info", {})
-    parts = info.get("participants", [])
-    frame = pick_frame_at_10min(t)
-    if frame is None:
-        return []
-
-    pframes = frame.get("participantFrames", {})
-
-    rows = []
-    for p in parts:
-        pid = p.get("participantId")
-        team_id = p.get("teamId")
-        pos = lane_key(p.get("teamPosition"))
-        key = str(pid)
-
-        pf = pframes.get(key)
-        if not pf:
-            continue
-
-        gold10 = pf.get("totalGold", 0) or 0
-        xp10 = pf.get("xp", 0) or 0
-        cs10 = (pf.get("minionsKilled", 0) or 0) + (pf.get("jungleMinionsKilled", 0) or 0)
-
-        rows.append({
-            "matchId": m.get("metadata", {}).get("matchId"),
-            "participantId": int(pid),
-            "teamId": int(team_id),
-            "role_key": pos,
-            "gold10": float(gold10),
-            "xp10": float(xp10),
-            "cs10": float(cs10),
-        })
-
-    if not rows:
-        return []
-
-    df = pd.DataFrame(rows)
-
-    out = []
-    for match_id, g_match in df.groupby("matchId"):
-        for role, g_role in g_match.groupby("role_key"):
-            if role == "UNKNOWN":
-                continue
+def _group_index(index: pd.DataFrame, patch_mm: str | None) -> dict:
+    # tier -> [(matchId, participants)], matchId 정렬 (store.scan과 같은 순서)
+    by_tier = {}
+    if patch_mm is not None:
+        index = index[index["patch"] == patch_mm]
+    cols = ["tier", "matchId", "participantId", "teamId", "teamPosition"]
+    for tier, mid, pid, team, pos in index[cols].itertuples(index=False, name=None):
+        by_tier.setdefault(tier, {}).setdefault(mid, []).append(
+            {"participantId": pid, "teamId": team, "teamPosition": pos}
+        )
+    return {tier: sorted(ms.items()) for tier, ms in by_tier.items()}
 
-            by_team = {}
-            for team_id, g_team in g_role.groupby("teamId"):
-                g_team_sorted = g_team.sort_values("gold10", ascending=False)
-                by_team[team_id] = g_team_sorted.iloc[0]
 
-            if len(by_team) != 2:
-                continue
+def build_lane_diff_table(base_dir: str, patch_mm: str | None = None, minutes=LANE_DIFF_MINUTES,
+                          index: pd.DataFrame | None = None) -> pd.DataFrame:
+    """Lane diff table from the timelines under base_dir.
 
-            teams = list(by_team.keys())
-            a = by_team[teams[0]]
-            b = by_team[teams[1]]
-
-            # a 기준
-            out.append({
-                "matchId": match_id,
-                "participantId": int(a["participantId"]),
-                "gold_diff_10": float(a["gold10"] - b["gold10"]),
-                "xp_diff_10": float(a["xp10"] - b["xp10"]),
-                "cs_diff_10": float(a["cs10"] - b["cs10"]),
-            })
-            # b 기준
-            out.append({
-                "matchId": match_id,
-                "participantId": int(b["participantId"]),
-                "gold_diff_10": float(b["gold10"] - a["gold10"]),
-                "xp_diff_10": float(b["xp10"] - a["xp10"]),
-                "cs_diff_10": float(b["cs10"] - a["cs10"]),
-            })
-
-    return out
-
-
-def build_lane_diff_table(base_dir: str, patch_mm: str | None = None) -> pd.DataFrame:
-    all_rows = []
+    With `index` (parse.py's soloq_match_index_<patch>.csv) the patch filter and the
+    participant team / position come from the index and match JSON is never opened.
+    """
+    targets = {minute: minute * 60_000 for minute in minutes}
+    stats = LaneStats(minutes)
+    indexed = _group_index(index, patch_mm) if index is not None else None
     for tier in os.listdir(base_dir):
         tier_dir = os.path.join(base_dir, tier)
-        match_dir = os.path.join(tier_dir, "matches")
-        tl_dir = os.path.join(tier_dir, "timelines")
-        if not (os.path.isdir(match_dir) and os.path.isdir(tl_dir)):
+        if not os.path.isdir(tier_dir):
             continue
-
-        for fn in os.listdir(match_dir):
-            if not fn.endswith(".json"):
-                continue
-            match_path = os.path.join(match_dir, fn)
-            mid = fn[:-5]
-            tl_path = os.path.join(tl_dir, f"{mid}_timeline.json")
-            if not os.path.exists(tl_path):
+        store = open_store(tier_dir)
+        timeline_ids = set(store.ids("timelines"))
+
+        if index is not None:
+            matches = indexed.get(tier, [])
+        else:
+            matches = store.scan("matches")
+        for mid, item in matches:
+            if mid not in timeline_ids:
                 continue
 
             try:
-                # patch 필터: gameVersion에서 major.minor만 비교
-                if patch_mm is not None:
-                    m = load_json(match_path)
-                    gv = str(m.get("info", {}).get("gameVersion", ""))
-                    patch = normalize_patch(gv)
-                    if patch != patch_mm:
-                        continue
-
-                rows = collect_lane_diffs_for_match(match_path, tl_path)
-                all_rows.extend(rows)
+                if index is not None:
+                    parts = item
+                else:
+                    m = loads(item)
+                    # patch 필터: gameVersion에서 major.minor만 비교
+                    if patch_mm is not None:
+                        gv = str(m.get("info", {}).get("gameVersion", ""))
+                        patch = normalize_patch(gv)
+                        if patch != patch_mm:
+                            continue
+                    parts = m.get("info", {}).get("participants", [])
+
+                # timeline은 마지막 target minute의 frame까지만 읽는다
+                with store.view("timelines", mid) as buf:
+                    at = frames_at(buf, list(targets.values()))
+                stats.add_match(mid, parts, {minute: at[ms] for minute, ms in targets.items() if ms in at})
             except Exception as e:
                 print(f"[WARN] lane diff failed for {mid}: {e}")
+        store.close()
 
-    df = pd.DataFrame(all_rows)
-    return df
+    return stats.frame()
 
 
 # -------------------------------
 # 2. SoloQ clean
 # -------------------------------
 
-def clean_soloq_df(df: pd.DataFrame, patch_mm: str | None = None) -> pd.DataFrame:
+def clean_soloq_df(df: pd.DataFrame, patch_mm: str | None = None, minutes=LANE_DIFF_MINUTES) -> pd.DataFrame:
     df = df.copy()
 
     # 1) 리메이크 / 잘못된 매치 제거
@@ -202,7 +179,8 @@ def clean_soloq_df(df: pd.DataFrame, patch_mm: str | None = None) -> pd.DataFram
 
     # 3) patch 정규화 + 필터
     if "gameVersion" in df.columns:
-        df["patch"] = df["gameVersion"].astype(str).apply(normalize_patch)
+        # 값 종류(수십 개)마다 한 번만 계산 -> categorical
+        df["patch"] = map_categorical(df["gameVersion"], lambda v: normalize_patch(v if pd.isna(v) else str(v)))
 
     if patch_mm is not None and "patch" in df.columns:
         before = len(df)
@@ -231,22 +209,7 @@ def clean_soloq_df(df: pd.DataFrame, patch_mm: str | None = None) -> pd.DataFram
 
     # 6) 역할 표준화 → role
     if "teamPosition" in df.columns:
-        df["role"] = (
-            df["teamPosition"]
-            .fillna("")
-            .astype(str)
-            .str.upper()
-            .replace({
-                "TOP": "TOP",
-                "JUNGLE": "JUNGLE",
-                "MIDDLE": "MID",
-                "MID": "MID",
-                "BOTTOM": "BOT",
-                "ADC": "BOT",
-                "UTILITY": "SUPPORT",
-                "SUPPORT": "SUPPORT",
-            })
-        )
+        df["role"] = map_categorical(df["teamPosition"], clean_role)
 
     # 7) lane diff가 들어왔으면 lane_pressure_index 계산
     if {"gold_diff_10", "xp_diff_10", "cs_diff_10"}.issubset(df.columns):
@@ -257,6 +220,7 @@ def clean_soloq_df(df: pd.DataFrame, patch_mm: str | None = None) -> pd.DataFram
         ) / 3.0
 
     # 8) unified 스키마/metric 계산에 필요한 컬럼만 남기기
+    #    (parse 단계에서 오는 컬럼은 projection.CLEAN_COLUMNS에도 있어야 한다)
     columns_keep = [
         # 식별/메타
         "tier",
@@ -290,10 +254,8 @@ def clean_soloq_df(df: pd.DataFrame, patch_mm: str | None = None) -> pd.DataFram
         "team_obj_baron_kills",
         "team_obj_tower_kills",
 
-        # 라인전 관련
-        "gold_diff_10",
-        "xp_diff_10",
-        "cs_diff_10",
+        # 라인전 관련 (lane diff 테이블을 만든 minute 전부)
+        *lane_columns(minutes),
         "lane_pressure_index",
     ]
 
@@ -312,33 +274,54 @@ def clean_soloq_df(df: pd.DataFrame, patch_mm: str | None = None) -> pd.DataFram
 # 3. main: lane diff + clean
 # -------------------------------
 
-def main(patch_mm: str | None = None):
+def build_lanes(patch_mm: str, lane_path: str, minutes=LANE_DIFF_MINUTES) -> pd.DataFrame:
+    base_dir = detect_soloq_base_dir(patch_mm)
+    index_path = os.path.join(RAW_DIR, f"soloq_match_index_{patch_mm}")
+    print(f"[INFO] building lane diff table from: {base_dir}")
+    index = None
+    if table_exists(index_path):
+        print(f"[INFO] using match index: {index_path}")
+        index = load_match_index(index_path)
+    lane_df = build_lane_diff_table(base_dir, patch_mm=patch_mm, minutes=minutes, index=index)
+    print("[INFO] lane diff shape:", lane_df.shape)
+    # 저장본을 다시 읽는 다음 실행과 같은 dtype으로 merge
+    lane_df = apply_schema(lane_df, lane_schema(minutes))
+    for path in save_table(lane_df, lane_path):
+        print(f"[INFO] saved lane diffs → {path}")
+    return lane_df
+
+
+def main(patch_mm: str | None = None, step: str = "all", minutes=LANE_DIFF_MINUTES):
+    """step: "all" = lane diffs (only if missing) + clean, "lanes" = rebuild the lane diff
+    table only, "clean" = clean with the existing lane diff table (pipeline.py runs these two)."""
     if patch_mm is None:
         patch_mm = PATCH_MM
 
     patch_tag = patch_mm
-    in_path = os.path.join(RAW_DIR, f"soloq_full_{patch_tag}.csv")
-    out_path = os.path.join(OUT_DIR, f"soloq_clean_{patch_tag}.csv")
-    lane_path = os.path.join(OUT_DIR, f"{LANE_DIFF_PREFIX}_{patch_tag}.csv")
+    # 확장자 없는 경로: .parquet이 있으면 그것을, 없으면 .csv를 읽는다 (tableio)
+    in_path = os.path.join(RAW_DIR, f"soloq_full_{patch_tag}")
+    out_path = os.path.join(OUT_DIR, f"soloq_clean_{patch_tag}")
+    lane_path = os.path.join(OUT_DIR, f"{LANE_DIFF_PREFIX}_{patch_tag}")
 
-    if not os.path.exists(in_path):
-        raise FileNotFoundError(in_path)
+    if step == "lanes":
+        build_lanes(patch_mm, lane_path, minutes)
+        return
+    if not table_exists(in_path):
+        raise FileNotFoundError(f"{in_path}.parquet / .csv")
 
     # 1) lane diff 테이블 생성 (없으면)
-    if not os.path.exists(lane_path):
-        base_dir = detect_soloq_base_dir()
-        print(f"[INFO] building lane diff table from: {base_dir}")
-        lane_df = build_lane_diff_table(base_dir, patch_mm=patch_mm)
-        print("[INFO] lane diff shape:", lane_df.shape)
-        lane_df.to_csv(lane_path, index=False)
-        print(f"[INFO] saved lane diffs → {lane_path}")
+    if not table_exists(lane_path):
+        if step == "clean":
+            raise FileNotFoundError(f"{lane_path}.parquet / .csv (run: python clean.py --step lanes)")
+        lane_df = build_lanes(patch_mm, lane_path, minutes)
     else:
         print(f"[INFO] loading lane diffs from: {lane_path}")
-        lane_df = pd.read_csv(lane_path)
+        lane_df = load_table(lane_path)
 
-    # 2) raw soloq CSV 로드
+    # 2) raw soloq 로드
     print(f"[INFO] loading raw soloq: {in_path}")
-    df_raw = pd.read_csv(in_path)
+    # --full wide dump여도 clean에 필요한 컬럼만 읽는다 (projection.CLEAN_COLUMNS)
+    df_raw = load_table(in_path, columns=CLEAN_COLUMNS)
     print("[INFO] raw shape:", df_raw.shape)
 
     # 3) lane diff merge (matchId + participantId 기준)
@@ -353,12 +336,20 @@ def main(patch_mm: str | None = None):
         print("[WARN] matchId/participantId not found in raw soloq; lane diffs not merged")
 
     # 4) clean
-    df_clean = clean_soloq_df(df_raw, patch_mm=patch_mm)
+    # keep / schema는 lane diff 테이블에 실제로 있는 minute 기준 (이번 실행의 --minutes가 아니라)
+    minutes = lane_minutes(lane_df.columns)
+    df_clean = clean_soloq_df(df_raw, patch_mm=patch_mm, minutes=minutes)
     print("[INFO] cleaned shape:", df_clean.shape)
 
-    df_clean.to_csv(out_path, index=False)
-    print(f"[INFO] saved cleaned soloq → {out_path}")
+    for path in save_table(df_clean, out_path, {**CLEAN_SCHEMA, **lane_schema(minutes)}):
+        print(f"[INFO] saved cleaned soloq → {path}")
 
 
 if __name__ == "__main__":
-    main()
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--step", choices=["all", "lanes", "clean"], default="all",
+                    help="all: lane diffs if missing + clean; lanes: rebuild lane diffs; clean: clean only")
+    ap.add_argument("--minutes", type=int, nargs="+", default=list(LANE_DIFF_MINUTES),
+                    help="lane diff minutes (default: config.LANE_DIFF_MINUTES / env LANE_DIFF_MINUTES)")
+    args = ap.parse_args()
+    main(step=args.step, minutes=tuple(args.minutes))
@@ -1,18 +1,30 @@
-import os, time, json
-from config import OUT_DIR, PATCH_MM, REQ_SLEEP
-from utils import safe_write, file_exists
+import os, time, threading
+from concurrent.futures import ThreadPoolExecutor
+from config import OUT_DIR, PATCH_MM, REQ_SLEEP, TIER_WORKERS, RAW_STORAGE, RAW_LAYOUT
+from utils import safe_write
+from raw_store import open_store
+from patches import patch_window, predates
+from journal import get_journal
 from league_api import sample_one_candidate_entry
-from riot_api import get_account_by_puuid, get_summoner_min_by_puuid, get_all_match_ids, get_match, get_timeline
+from rate_limit import limiter_stats
+from response_cache import get_cache
+from riot_api import get_account_by_puuid, get_summoner_min_by_puuid, get_match_ids_page, get_match, get_timeline, fetch_many
 
 os.makedirs(OUT_DIR, exist_ok=True)
 
-import os, time, json
-from config import OUT_DIR, PATCH_MM, REQ_SLEEP
-from utils import safe_write, file_exists
-from league_api import sample_one_candidate_entry
-from riot_api import get_account_by_puuid, get_summoner_min_by_puuid, get_all_match_ids, get_match, get_timeline
+TIERS = ["IRON","BRONZE","SILVER","GOLD","PLATINUM","EMERALD",
+         "DIAMOND","MASTER","GRANDMASTER","CHALLENGER"]
+
+_stores = {}
+_stores_lock = threading.Lock()
 
-os.makedirs(OUT_DIR, exist_ok=True)
+
+def tier_store(tier):
+    # tier별 raw match / timeline 저장소 (RAW_LAYOUT / RAW_STORAGE, 기존 archive가 있으면 archive)
+    with _stores_lock:
+        if tier not in _stores:
+            _stores[tier] = open_store(os.path.join(OUT_DIR, tier), RAW_LAYOUT, RAW_STORAGE)
+        return _stores[tier]
 
 
 def call_with_retries(fn, *args, retries=5, base_sleep=REQ_SLEEP, label="", **kwargs):
@@ -29,6 +41,110 @@ def call_with_retries(fn, *args, retries=5, base_sleep=REQ_SLEEP, label="", **kw
     raise last_err
 
 
+def fetch_page_matches(tier, mids, stats):
+    """Load or download one page of matches; returns (kept ids, whether a match predates PATCH_MM)."""
+    journal = get_journal()
+    store = tier_store(tier)
+    kept = set()
+    older = False
+    to_fetch = []
+    for mid in mids:
+        # journal에 기록된 match는 버전만 보고 판단 (다른 patch라 저장 안 한 match도 포함)
+        gv = journal.match_version(tier, mid)
+        if gv is not None and (not gv.startswith(PATCH_MM) or store.has("matches", mid)):
+            if gv.startswith(PATCH_MM):
+                kept.add(mid)
+            older = older or predates(gv, PATCH_MM)
+            continue
+
+        if store.has("matches", mid):
+            try:
+                m = store.load("matches", mid)
+                gv = str(m.get("info", {}).get("gameVersion", ""))
+                if gv.startswith(PATCH_MM):
+                    kept.add(mid)
+                older = older or predates(gv, PATCH_MM)
+                journal.put_match(tier, mid, gv, gv.startswith(PATCH_MM))
+            except Exception:
+                pass
+            continue
+        to_fetch.append(mid)
+
+    results = fetch_many(
+        lambda mid: call_with_retries(
+            get_match,
+            mid,
+            retries=5,
+            base_sleep=REQ_SLEEP,
+            label=f"get_match({mid})",
+        ),
+        to_fetch,
+    )
+    for mid, m in results:
+        if not isinstance(m, dict):
+            print(f"      [WARN] match {mid} failed after retries: {m}")
+            continue
+        gv = str(m.get("info", {}).get("gameVersion", ""))
+        older = older or predates(gv, PATCH_MM)
+        if gv.startswith(PATCH_MM):
+            store.put("matches", mid, m)
+            kept.add(mid)
+            stats["matches"] += 1
+            print(f"      + match saved {mid} ({gv})")
+        journal.put_match(tier, mid, gv, gv.startswith(PATCH_MM))
+    return kept, older
+
+
+def collect_patch_matches(tier, puuid, max_pages=None, stats=None, page_size=100):
+    """Page a player's ranked match ids inside the PATCH_MM window, newest first.
+
+    The id query carries startTime/endTime from patches.PATCH_DATES, and paging
+    stops at the first page holding a match older than PATCH_MM. Pages already
+    in the journal are not requested again.
+    Returns (all ids seen, kept ids for PATCH_MM) in API order.
+    """
+    journal = get_journal()
+    stats = stats if stats is not None else {"matches": 0}
+    start_time, end_time = patch_window(PATCH_MM)
+    window = f"{start_time}-{end_time}"
+    if start_time is None:
+        print(f"    [INFO] no release date for patch {PATCH_MM}; paging full history")
+
+    mids, kept, seen = [], set(), set()
+    start, pages = 0, 0
+    while True:
+        chunk = journal.id_page(puuid, start, window)
+        if chunk is None:
+            chunk = call_with_retries(
+                get_match_ids_page,
+                puuid,
+                start,
+                page_size,
+                start_time=start_time,
+                end_time=end_time,
+                retries=5,
+                base_sleep=REQ_SLEEP,
+                label="get_match_ids_page",
+            )
+            journal.put_id_page(puuid, start, window, chunk)
+        if not chunk:
+            break
+        page = [m for m in chunk if m not in seen]
+        seen.update(page)
+        mids.extend(page)
+
+        page_kept, older = fetch_page_matches(tier, page, stats)
+        kept.update(page_kept)
+        start += page_size
+        pages += 1
+        if older:
+            print(f"    [INFO] reached matches older than {PATCH_MM}; stop paging")
+            break
+        if max_pages and pages >= max_pages:
+            break
+    return mids, [m for m in mids if m in kept]
+
+
 def collect_one_tier(
     tier,
     max_pages_per_player=None,
@@ -36,16 +152,28 @@ def collect_one_tier(
     max_candidates=10,
 ):
     print(f"\n▶ Collecting {tier}")
-    tier_dir = os.path.join(OUT_DIR, tier)
-    os.makedirs(os.path.join(tier_dir, "matches"), exist_ok=True)
-    os.makedirs(os.path.join(tier_dir, "timelines"), exist_ok=True)
+    stats = {"tier": tier, "status": "ok", "candidates": 0, "matches": 0, "timelines": 0}
+    journal = get_journal()
+    if journal.tier_state(tier) in ("done", "exhausted"):
+        print(f"  [INFO] {tier} already {journal.tier_state(tier)} in journal; skipping")
+        stats["status"] = "journal"
+        return stats
 
-    candidates = sample_one_candidate_entry(tier)
-    if not candidates:
-        print(f"[WARN] no entries for {tier}")
-        return
+    tier_dir = os.path.join(OUT_DIR, tier)
+    os.makedirs(tier_dir, exist_ok=True)
+    store = tier_store(tier)
 
-    candidates = candidates[:max_candidates]
+    candidates = journal.candidates(tier)
+    if candidates is None:
+        candidates = sample_one_candidate_entry(tier)
+        if not candidates:
+            print(f"[WARN] no entries for {tier}")
+            stats["status"] = "no entries"
+            return stats
+        candidates = candidates[:max_candidates]
+        journal.set_candidates(tier, candidates)
+    else:
+        print(f"  [INFO] resuming {tier} with {len(candidates)} journaled candidates")
 
     chosen_entry = None
     chosen_account = None
@@ -54,18 +182,30 @@ def collect_one_tier(
     for idx, e in enumerate(candidates, start=1):
         puuid = e["puuid"]
         print(f"\n  → Candidate {idx}/{len(candidates)}: {puuid[:18]}…")
-
-        try:
-            acc = call_with_retries(
-                get_account_by_puuid,
-                puuid,
-                retries=5,
-                base_sleep=REQ_SLEEP,
-                label="get_account_by_puuid",
-            )
-        except Exception as err:
-            print(f"    [SKIP] account lookup failed: {err}")
+        state, acc = journal.candidate(tier, puuid)
+        if state == "rejected":
+            print("    [SKIP] rejected in a previous run")
             continue
+        if state == "accepted":
+            chosen_entry = e
+            chosen_account = acc
+            chosen_kept = journal.kept_matches(tier)
+            print(f"    ✓ candidate ACCEPTED in a previous run ({len(chosen_kept)} matches)")
+            break
+        stats["candidates"] += 1
+
+        if acc is None:
+            try:
+                acc = call_with_retries(
+                    get_account_by_puuid,
+                    puuid,
+                    retries=5,
+                    base_sleep=REQ_SLEEP,
+                    label="get_account_by_puuid",
+                )
+            except Exception as err:
+                print(f"    [SKIP] account lookup failed: {err}")
+                continue
 
         if not (isinstance(acc, dict) and "gameName" in acc):
             print("    [SKIP] invalid account object (no gameName)")
@@ -74,6 +214,7 @@ def collect_one_tier(
         game_name = acc.get("gameName")
         tag_line = acc.get("tagLine")
         print(f"    ✓ account: {game_name}#{tag_line}  ({puuid[:18]}…)")
+        journal.set_candidate(tier, puuid, idx, "running", acc)
 
         try:
             summ_min = call_with_retries(
@@ -89,98 +230,115 @@ def collect_one_tier(
             print(f"    [WARN] summoner_min failed after retries: {e}")
 
         try:
-            mids = call_with_retries(
-                get_all_match_ids,
-                puuid,
-                max_pages=max_pages_per_player,
-                retries=5,
-                base_sleep=REQ_SLEEP,
-                label="get_all_match_ids",
-            )
+            mids, kept = collect_patch_matches(tier, puuid, max_pages_per_player, stats)
         except Exception as e:
-            print(f"    [SKIP] get_all_match_ids failed: {e}")
+            print(f"    [SKIP] match id paging failed: {e}")
             continue
 
         print(f"    ✓ total matches: {len(mids)}")
-
-        kept = []
-        for mid in mids:
-            mpath = os.path.join(tier_dir, "matches", f"{mid}.json")
-
-            if file_exists(mpath):
-                try:
-                    with open(mpath, "r", encoding="utf-8") as f:
-                        m = json.load(f)
-                    gv = str(m.get("info", {}).get("gameVersion", ""))
-                    if gv.startswith(PATCH_MM):
-                        kept.append(mid)
-                except Exception:
-                    pass
-                continue
-
-            try:
-                m = call_with_retries(
-                    get_match,
-                    mid,
-                    retries=5,
-                    base_sleep=REQ_SLEEP,
-                    label=f"get_match({mid})",
-                )
-                gv = str(m.get("info", {}).get("gameVersion", ""))
-                time.sleep(REQ_SLEEP)
-                if gv.startswith(PATCH_MM):
-                    safe_write(mpath, m)
-                    kept.append(mid)
-                    print(f"      + match saved {mid} ({gv})")
-            except Exception as e:
-                print(f"      [WARN] match {mid} failed after retries: {e}")
-
         print(f"    → kept {len(kept)} matches for patch {PATCH_MM}")
 
         if len(kept) >= min_matches_for_patch:
             chosen_entry = e
             chosen_account = acc
             chosen_kept = kept
+            journal.add_timelines(tier, kept)
+            journal.set_candidate(tier, puuid, idx, "accepted")
+            journal.set_tier(tier, "timelines", chosen=puuid)
             print(f"    ✓ candidate ACCEPTED for tier {tier}")
             break
         else:
+            journal.set_candidate(tier, puuid, idx, "rejected")
             print(f"    [INFO] candidate has insufficient matches for patch {PATCH_MM}, trying next…")
 
     if not chosen_entry:
         print(f"[ERROR] {tier}: no candidate had >= {min_matches_for_patch} matches in patch {PATCH_MM}")
-        return
+        if all(journal.candidate(tier, c["puuid"])[0] == "rejected" for c in candidates):
+            journal.set_tier(tier, "exhausted")
+        stats["status"] = "no candidate"
+        return stats
 
     safe_write(os.path.join(tier_dir, "league_entry_snapshot.json"), chosen_entry)
     safe_write(os.path.join(tier_dir, "account_info.json"), chosen_account)
 
+    pending = []
     for mid in chosen_kept:
-        tlpath = os.path.join(tier_dir, "timelines", f"{mid}_timeline.json")
-        if file_exists(tlpath):
+        if store.has("timelines", mid):
+            journal.set_timeline(tier, mid, "done")
+        else:
+            pending.append(mid)
+    results = fetch_many(
+        lambda mid: call_with_retries(
+            get_timeline,
+            mid,
+            retries=5,
+            base_sleep=REQ_SLEEP,
+            label=f"get_timeline({mid})",
+        ),
+        pending,
+    )
+    for mid, tl in results:
+        if not isinstance(tl, dict):
+            print(f"    [WARN] timeline {mid} failed after retries: {tl}")
             continue
-        try:
-            tl = call_with_retries(
-                get_timeline,
-                mid,
-                retries=5,
-                base_sleep=REQ_SLEEP,
-                label=f"get_timeline({mid})",
-            )
-            safe_write(tlpath, tl)
-            print(f"    + timeline saved {mid}")
-            time.sleep(REQ_SLEEP)
-        except Exception as e:
-            print(f"    [WARN] timeline {mid} failed after retries: {e}")
+        store.put("timelines", mid, tl)
+        journal.set_timeline(tier, mid, "done")
+        stats["timelines"] += 1
+        print(f"    + timeline saved {mid}")
 
+    if all(store.has("timelines", mid) for mid in chosen_kept):
+        journal.set_tier(tier, "done")
     print(f"✅ Done {tier} → {tier_dir}")
+    return stats
 
-def collect_all_tiers(max_pages_per_player=None):
-    tiers = ["IRON","BRONZE","SILVER","GOLD","PLATINUM","EMERALD",
-             "DIAMOND","MASTER","GRANDMASTER","CHALLENGER"]
+def _run_tier(tier, max_pages_per_player):
+    t0 = time.time()
+    try:
+        stats = collect_one_tier(tier, max_pages_per_player=max_pages_per_player)
+    except Exception as e:
+        print(f"[ERROR] {tier} failed: {e}")
+        stats = {"tier": tier, "status": f"failed: {e}", "candidates": 0, "matches": 0, "timelines": 0}
+    stats["seconds"] = time.time() - t0
+    return stats
+
+
+def print_tier_summary(results, wall):
+    print("\n📊 Tier summary")
+    print(f"  {'tier':<12} {'status':<14} {'cand':>4} {'matches':>7} {'tl':>4} {'sec':>8} {'files/s':>8}")
+    total = 0
+    for r in results:
+        files = r["matches"] + r["timelines"]
+        total += files
+        rate = files / r["seconds"] if r["seconds"] > 0 else 0.0
+        print(f"  {r['tier']:<12} {r['status'][:14]:<14} {r['candidates']:>4} {r['matches']:>7} "
+              f"{r['timelines']:>4} {r['seconds']:>8.1f} {rate:>8.2f}")
+    rate = total / wall if wall > 0 else 0.0
+    print(f"  total: {total} files in {wall:.1f}s ({rate:.2f} files/s)")
+
+    print("\n🚦 Rate limits")
+    for key, s in sorted(limiter_stats().items()):
+        limits = ",".join(f"{n}:{sec}" for n, sec in s["limits"]) or "-"
+        print(f"  {key}  limits={limits}  requests={s['requests']}  429={s['429']}  "
+              f"waited={s['throttled_sec']:.1f}s")
+
+    cache = get_cache()
+    if cache is not None:
+        c = cache.summary()
+        print(f"\n🗄  Response cache: hits={c['hits']} misses={c['misses']} stores={c['stores']} "
+              f"evictions={c['evictions']} size={c['bytes'] / 1e6:.1f}/{c['max_bytes'] / 1e6:.0f} MB")
+
+
+def collect_all_tiers(max_pages_per_player=None, workers=TIER_WORKERS):
+    tiers = TIERS
     # tiers = ["BRONZE","SILVER","GOLD","PLATINUM","EMERALD",
     #          "DIAMOND","MASTER","GRANDMASTER"]
-    
-    for t in tiers:
-        try:
-            collect_one_tier(t, max_pages_per_player=max_pages_per_player)
-        except Exception as e:
-            print(f"[ERROR] {t} failed: {e}")
+
+    # tier들은 같은 프로세스의 스레드에서 돌기 때문에 host별 rate limiter(전역 예산)를 공유한다
+    t0 = time.time()
+    if workers <= 1:
+        results = [_run_tier(t, max_pages_per_player) for t in tiers]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(lambda t: _run_tier(t, max_pages_per_player), tiers))
+    print_tier_summary(results, time.time() - t0)
+    return results
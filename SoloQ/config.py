@@ -9,11 +9,42 @@ PLATFORM = "kr"
 REGIONAL = "asia"
 HEAD = {"X-Riot-Token": API_KEY}
 QUEUE_ID = 420
-REQ_SLEEP = 0.7
+REQ_SLEEP = 0.7  # base backoff between retries (pacing is done by rate_limit.py)
+
+# Base URL per routing value; point it at stub_server.py for offline runs
+# e.g. RIOT_API_BASE="http://127.0.0.1:8765/{route}"
+API_BASE = os.getenv("RIOT_API_BASE", "").strip() or "https://{route}.api.riotgames.com"
+
+def api_host(route):
+    return API_BASE.format(route=route)
+
+# App rate limit of the key, "count:seconds" pairs (personal key default: 20/1s, 100/2min)
+RATE_LIMITS = [
+    tuple(int(x) for x in pair.split(":"))
+    for pair in (os.getenv("RIOT_RATE_LIMITS", "").strip() or "20:1,100:120").split(",")
+]
+# match/timeline requests kept in flight at once
+MAX_IN_FLIGHT = int(os.getenv("MAX_IN_FLIGHT", "16"))
+# tiers collected concurrently by collect_all_tiers (1 = one after another)
+TIER_WORKERS = int(os.getenv("TIER_WORKERS", "1"))
+# keep-alive connections per host in the shared HTTP session
+POOL_SIZE = int(os.getenv("POOL_SIZE", str(MAX_IN_FLIGHT * TIER_WORKERS)))
+
+# Global match/timeline response cache shared by all tiers and patches ("" disables it)
+CACHE_DIR = os.getenv("CACHE_DIR", "./http_cache").strip()
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_MB", "4096")) * 1024 * 1024
 
 # Read patch prefix from env, fallback to default
 PATCH_MM = os.getenv("PATCH_MM", "15.24").strip() or "15.24"
 OUT_DIR = f"./output_{PATCH_MM}_by_tier"
 
+# Minutes of the lane-opponent gold / xp / cs diffs (clean.py), e.g. "10,15,20" also builds *_diff_15 / *_diff_20
+LANE_DIFF_MINUTES = tuple(int(m) for m in (os.getenv("LANE_DIFF_MINUTES", "").strip() or "10").split(","))
+
+# Storage of raw match / timeline files: "json" (indent=2), "gzip" (.json.gz) or "zstd" (.json.zst)
+RAW_STORAGE = os.getenv("RAW_STORAGE", "json").strip() or "json"
+# Layout for new tiers: "files" (one file per response) or "archive" (<tier>/archive.sqlite)
+RAW_LAYOUT = os.getenv("RAW_LAYOUT", "files").strip() or "files"
+
 LOWER_TIERS = ["IRON", "BRONZE", "SILVER", "GOLD", "PLATINUM", "EMERALD", "DIAMOND"]
 DIVS = ["I", "II", "III", "IV"]
@@ -1,18 +1,62 @@
-import time, requests
-from config import HEAD
+import time, threading, requests
+from requests.adapters import HTTPAdapter
+from config import HEAD, POOL_SIZE
+from rate_limit import acquire, limiter_for, method_limiter_for
+from response_cache import get_cache, cache_key
+from jsonio import loads
+
+_session = None
+_session_lock = threading.Lock()
+
+def make_session(pool_size=POOL_SIZE):
+    # host(kr / asia)마다 connection pool을 두고 keep-alive로 TCP+TLS 연결을 재사용
+    s = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, pool_block=True)
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    s.headers.update(HEAD)
+    s.headers.update({"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"})
+    return s
+
+def get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = make_session()
+        return _session
 
 def get_json(url, params=None, retry=3):
+    cache = get_cache()
+    key = cache_key(url) if cache is not None and not params else None
+    if key is not None:
+        body = cache.get(key)
+        if body is not None:
+            return loads(body)
+
+    app, method = limiter_for(url), method_limiter_for(url)
+    session = get_session()
     for t in range(retry):
-        r = requests.get(url, headers=HEAD, params=params, timeout=20)
+        acquire(app, method)
+        try:
+            r = session.get(url, params=params, timeout=20)
+        except Exception:
+            app.observe()
+            method.observe()
+            raise
+        app.observe(r.headers.get("X-App-Rate-Limit"), r.headers.get("X-App-Rate-Limit-Count"))
+        method.observe(r.headers.get("X-Method-Rate-Limit"), r.headers.get("X-Method-Rate-Limit-Count"))
         if r.status_code == 429:
             ra = int(r.headers.get("Retry-After", "2"))
-            time.sleep(ra + 1)
+            scope = method if r.headers.get("X-Rate-Limit-Type") in ("method", "service") else app
+            scope.penalize(ra + 1)
             continue
         try:
-            data = r.json()
+            data = loads(r.content)
         except Exception:
             data = None
         if r.ok and not (isinstance(data, dict) and "status" in data):
+            if key is not None:
+                cache.put(key, r.content)
             return data
         msg = data.get("status", {}).get("message") if isinstance(data, dict) else r.text
         code = data.get("status", {}).get("status_code") if isinstance(data, dict) else r.status_code
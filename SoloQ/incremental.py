@@ -0,0 +1,123 @@
+# SoloQ/incremental.py
+# Parquet parts + manifest behind `parse.py --incremental`.
+#
+#   data/soloq_parts_<PATCH>/manifest.json       part -> [[tier/matchId, rows], ...], tier/matchId -> stamp
+#   data/soloq_parts_<PATCH>/part-00001.parquet  rows of the matches parsed in one run (file order)
+#
+# A run compares raw_store stamps (file size / mtime, or the archive rowid) with the manifest:
+# rows of changed / deleted match files are dropped from their parts, only new / changed files
+# are parsed (into one new part), and soloq_full_<PATCH> is the parts concatenated in order.
+# Needs pyarrow; kept free of config imports like parse.py.
+import os
+import json
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+MANIFEST = "manifest.json"
+MAX_PARTS = 32  # 이보다 많아지면 한 part로 합친다
+
+
+class PartStore:
+    """Parsed rows per match file, split into Parquet parts that can be appended / trimmed."""
+
+    def __init__(self, root, columns=None):
+        self.root = root
+        self.columns = list(columns) if columns is not None else None
+        os.makedirs(root, exist_ok=True)
+        m = self._read_manifest()
+        if m is None or m.get("columns") != self.columns or not self._consistent(m["parts"]):
+            # 처음이거나 추출 컬럼(--full / projection.py)이 바뀌었거나 중간에 끊긴 실행이면 처음부터
+            self.reset()
+        else:
+            self.stamps = m["stamps"]
+            self.parts = m["parts"]
+            self.seq = m["seq"]
+
+    def _read_manifest(self):
+        try:
+            with open(os.path.join(self.root, MANIFEST), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _consistent(self, parts):
+        # manifest의 row 수와 part 파일의 row 수가 맞는지 (footer만 읽는다)
+        for name, entries in parts.items():
+            rows = sum(n for _, n in entries)
+            if rows and (not os.path.exists(self.path(name)) or pq.read_metadata(self.path(name)).num_rows != rows):
+                return False
+        return True
+
+    def path(self, name):
+        return os.path.join(self.root, name + ".parquet")
+
+    def reset(self):
+        for fn in os.listdir(self.root):
+            if fn.startswith("part-"):
+                os.remove(os.path.join(self.root, fn))
+        self.stamps, self.parts, self.seq = {}, {}, 0
+
+    def diff(self, current):
+        """(keys to parse, keys whose rows must go) for current {key: stamp}."""
+        todo = [k for k, st in current.items() if self.stamps.get(k) != st]
+        gone = [k for k, st in self.stamps.items() if current.get(k) != st]
+        return todo, gone
+
+    def drop(self, keys):
+        keys = set(keys)
+        if not keys:
+            return
+        for name, entries in list(self.parts.items()):
+            keep = np.array([k not in keys for k, _ in entries], dtype=bool)
+            if keep.all():
+                continue
+            counts = np.array([n for _, n in entries], dtype=np.int64)
+            if counts[keep].sum() == 0:
+                if os.path.exists(self.path(name)):
+                    os.remove(self.path(name))
+            else:
+                df = pd.read_parquet(self.path(name))
+                df[np.repeat(keep, counts)].to_parquet(self.path(name), index=False, compression="zstd")
+            kept = [e for e, k in zip(entries, keep) if k]
+            if kept:
+                self.parts[name] = kept
+            else:
+                del self.parts[name]
+        for k in keys:
+            self.stamps.pop(k, None)
+
+    def add(self, df, entries, stamps):
+        """New part: df holds the rows of entries [(key, rows), ...] in that order."""
+        if not entries:
+            return
+        self.seq += 1
+        name = f"part-{self.seq:05d}"
+        if len(df):
+            df.to_parquet(self.path(name), index=False, compression="zstd")
+        self.parts[name] = [[k, n] for k, n in entries]
+        self.stamps.update({k: stamps[k] for k, _ in entries})
+
+    def frame(self):
+        frames = [pd.read_parquet(self.path(name)) for name, entries in self.parts.items()
+                  if any(n for _, n in entries)]
+        df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        if len(self.parts) > MAX_PARTS:
+            self._compact(df)
+        return df
+
+    def _compact(self, df):
+        entries = [e for part in self.parts.values() for e in part]
+        for name in self.parts:
+            if os.path.exists(self.path(name)):
+                os.remove(self.path(name))
+        self.parts = {}
+        stamps, self.stamps = self.stamps, {}
+        self.add(df, entries, stamps)
+
+    def save(self):
+        m = {"columns": self.columns, "seq": self.seq, "parts": self.parts, "stamps": self.stamps}
+        tmp = os.path.join(self.root, MANIFEST + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(m, f, ensure_ascii=False)
+        os.replace(tmp, os.path.join(self.root, MANIFEST))
@@ -0,0 +1,194 @@
+# SoloQ/journal.py
+# Crash-safe job journal for the collector (SQLite in WAL mode, <OUT_DIR>/journal.sqlite).
+# Every finished step is committed before the next one starts, so a restarted run
+# resumes from the last committed step instead of re-sampling / re-paging.
+import os, json, time, sqlite3, threading
+from config import OUT_DIR
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tiers (
+    tier TEXT PRIMARY KEY, state TEXT NOT NULL, candidates TEXT, chosen TEXT, updated REAL
+);
+CREATE TABLE IF NOT EXISTS candidates (
+    tier TEXT, puuid TEXT, idx INTEGER, state TEXT NOT NULL, account TEXT,
+    PRIMARY KEY (tier, puuid)
+);
+CREATE TABLE IF NOT EXISTS id_pages (
+    puuid TEXT, start INTEGER, window TEXT, ids TEXT NOT NULL,
+    PRIMARY KEY (puuid, start, window)
+);
+CREATE TABLE IF NOT EXISTS matches (
+    tier TEXT, mid TEXT, game_version TEXT, kept INTEGER NOT NULL,
+    PRIMARY KEY (tier, mid)
+);
+CREATE TABLE IF NOT EXISTS timelines (
+    tier TEXT, mid TEXT, state TEXT NOT NULL,
+    PRIMARY KEY (tier, mid)
+);
+"""
+
+
+class Journal:
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        self.db.commit()
+
+    def _write(self, sql, *args):
+        with self.lock:
+            self.db.execute(sql, args)
+            self.db.commit()
+
+    def _one(self, sql, *args):
+        with self.lock:
+            return self.db.execute(sql, args).fetchone()
+
+    def _all(self, sql, *args):
+        with self.lock:
+            return self.db.execute(sql, args).fetchall()
+
+    # ---- tiers ----
+    def tier_state(self, tier):
+        row = self._one("SELECT state FROM tiers WHERE tier = ?", tier)
+        return row[0] if row else None
+
+    def set_tier(self, tier, state, chosen=None):
+        self._write(
+            "INSERT INTO tiers(tier, state, chosen, updated) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(tier) DO UPDATE SET state = excluded.state, "
+            "chosen = COALESCE(excluded.chosen, tiers.chosen), updated = excluded.updated",
+            tier, state, chosen, time.time(),
+        )
+
+    def candidates(self, tier):
+        row = self._one("SELECT candidates FROM tiers WHERE tier = ?", tier)
+        return json.loads(row[0]) if row and row[0] else None
+
+    def set_candidates(self, tier, entries):
+        self._write(
+            "INSERT INTO tiers(tier, state, candidates, updated) VALUES (?, 'running', ?, ?) "
+            "ON CONFLICT(tier) DO UPDATE SET candidates = excluded.candidates, updated = excluded.updated",
+            tier, json.dumps(entries, ensure_ascii=False), time.time(),
+        )
+
+    # ---- candidates ----
+    def candidate(self, tier, puuid):
+        # (state, account dict | None) or (None, None)
+        row = self._one("SELECT state, account FROM candidates WHERE tier = ? AND puuid = ?", tier, puuid)
+        if not row:
+            return None, None
+        return row[0], json.loads(row[1]) if row[1] else None
+
+    def set_candidate(self, tier, puuid, idx, state, account=None):
+        self._write(
+            "INSERT INTO candidates(tier, puuid, idx, state, account) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(tier, puuid) DO UPDATE SET state = excluded.state, "
+            "account = COALESCE(excluded.account, candidates.account)",
+            tier, puuid, idx, state, json.dumps(account, ensure_ascii=False) if account else None,
+        )
+
+    # ---- match-id pages ----
+    def id_page(self, puuid, start, window):
+        row = self._one(
+            "SELECT ids FROM id_pages WHERE puuid = ? AND start = ? AND window = ?", puuid, start, window
+        )
+        return json.loads(row[0]) if row else None
+
+    def put_id_page(self, puuid, start, window, ids):
+        self._write(
+            "INSERT OR REPLACE INTO id_pages(puuid, start, window, ids) VALUES (?, ?, ?, ?)",
+            puuid, start, window, json.dumps(ids),
+        )
+
+    # ---- matches / timelines ----
+    def match_version(self, tier, mid):
+        row = self._one("SELECT game_version FROM matches WHERE tier = ? AND mid = ?", tier, mid)
+        return row[0] if row else None
+
+    def put_match(self, tier, mid, game_version, kept):
+        self._write(
+            "INSERT OR REPLACE INTO matches(tier, mid, game_version, kept) VALUES (?, ?, ?, ?)",
+            tier, mid, game_version, int(bool(kept)),
+        )
+
+    def add_timelines(self, tier, mids):
+        with self.lock:
+            self.db.executemany(
+                "INSERT OR IGNORE INTO timelines(tier, mid, state) VALUES (?, ?, 'pending')",
+                [(tier, m) for m in mids],
+            )
+            self.db.commit()
+
+    def set_timeline(self, tier, mid, state):
+        self._write("UPDATE timelines SET state = ? WHERE tier = ? AND mid = ?", state, tier, mid)
+
+    def kept_matches(self, tier):
+        return [r[0] for r in self._all("SELECT mid FROM timelines WHERE tier = ? ORDER BY rowid", tier)]
+
+    # ---- report ----
+    def status(self):
+        out = []
+        for tier, state, cands, chosen in self._all("SELECT tier, state, candidates, chosen FROM tiers"):
+            tried = self._one("SELECT COUNT(*) FROM candidates WHERE tier = ? AND state != 'pending'", tier)[0]
+            pages = self._one(
+                "SELECT COUNT(*) FROM id_pages WHERE puuid IN (SELECT puuid FROM candidates WHERE tier = ?)", tier
+            )[0]
+            matches, kept = self._one(
+                "SELECT COUNT(*), COALESCE(SUM(kept), 0) FROM matches WHERE tier = ?", tier
+            )
+            tl_done = self._one("SELECT COUNT(*) FROM timelines WHERE tier = ? AND state = 'done'", tier)[0]
+            tl_all = self._one("SELECT COUNT(*) FROM timelines WHERE tier = ?", tier)[0]
+            out.append({
+                "tier": tier,
+                "state": state,
+                "candidates": f"{tried}/{len(json.loads(cands)) if cands else 0}",
+                "id_pages": pages,
+                "matches": matches,
+                "kept": kept,
+                "timelines": f"{tl_done}/{tl_all}",
+                "pending_timelines": tl_all - tl_done,
+                "chosen": (chosen or "")[:18],
+            })
+        return out
+
+    def reset(self):
+        with self.lock:
+            for table in ("tiers", "candidates", "id_pages", "matches", "timelines"):
+                self.db.execute(f"DELETE FROM {table}")
+            self.db.commit()
+
+
+_journal = None
+_journal_lock = threading.Lock()
+
+
+def get_journal():
+    global _journal
+    with _journal_lock:
+        if _journal is None:
+            _journal = Journal(os.path.join(OUT_DIR, "journal.sqlite"))
+        return _journal
+
+
+def print_status(journal=None, tiers=None):
+    journal = journal or get_journal()
+    rows = {r["tier"]: r for r in journal.status()}
+    print(f"📒 Journal: {journal.path}")
+    print(f"  {'tier':<12} {'state':<12} {'cand':>6} {'pages':>5} {'matches':>7} {'kept':>5} {'timelines':>9}")
+    left = 0
+    for tier in tiers or sorted(rows):
+        r = rows.get(tier)
+        if r is None:
+            print(f"  {tier:<12} {'not started':<12}")
+            left += 1
+            continue
+        print(f"  {tier:<12} {r['state']:<12} {r['candidates']:>6} {r['id_pages']:>5} {r['matches']:>7} "
+              f"{r['kept']:>5} {r['timelines']:>9}")
+        if r["state"] not in ("done", "exhausted"):
+            left += 1
+    print(f"  remaining tiers: {left}")
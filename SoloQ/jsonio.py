@@ -0,0 +1,69 @@
+# SoloQ/jsonio.py
+# JSON decoding shared by every stage: orjson / simdjson when installed, stdlib json otherwise.
+#
+#   JSON_BACKEND=auto (default) | orjson | simdjson | json
+import os, json, mmap
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except Exception:
+    HAS_ORJSON = False
+
+try:
+    import simdjson
+    HAS_SIMDJSON = True
+except Exception:
+    HAS_SIMDJSON = False
+
+
+def _json_loads(data):
+    # stdlib json은 memoryview / mmap을 못 받는다
+    if isinstance(data, (memoryview, mmap.mmap)):
+        data = bytes(data)
+    return json.loads(data)
+
+
+def _orjson_loads(data):
+    if isinstance(data, mmap.mmap):
+        data = memoryview(data)
+    return orjson.loads(data)
+
+
+def _simdjson_loads(data):
+    if isinstance(data, (memoryview, mmap.mmap)):
+        data = bytes(data)
+    return simdjson.loads(data)
+
+
+DECODERS = {"json": _json_loads}
+if HAS_ORJSON:
+    DECODERS["orjson"] = _orjson_loads
+if HAS_SIMDJSON:
+    DECODERS["simdjson"] = _simdjson_loads
+
+
+def pick_backend(name="auto"):
+    if name == "auto":
+        return next(b for b in ("orjson", "simdjson", "json") if b in DECODERS)
+    if name not in DECODERS:
+        raise ValueError(f"JSON_BACKEND={name!r} is not available (installed: {sorted(DECODERS)})")
+    return name
+
+
+BACKEND = pick_backend(os.getenv("JSON_BACKEND", "auto").strip() or "auto")
+_loads = DECODERS[BACKEND]
+
+
+def loads(data):
+    """Decode JSON from str, bytes, bytearray, memoryview or mmap with the selected backend."""
+    return _loads(data)
+
+
+def load_file(path):
+    # plain .json 파일은 mmap으로 열어 복사 없이 decoder에 넘긴다
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return _loads(b"")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            return _loads(m)
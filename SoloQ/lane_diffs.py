@@ -0,0 +1,126 @@
+# SoloQ/lane_diffs.py
+# Batch lane-opponent diff engine.
+#
+# LaneStats.add() appends every participant's gold / xp / cs at each minute to flat arrays;
+# LaneStats.frame() picks each team's lane player and computes the opponent diffs for the
+# whole corpus with NumPy sorts, instead of a small pandas groupby per match.
+import numpy as np
+import pandas as pd
+
+# groupby("role_key") 순서 (알파벳)와 같게 둔다
+ROLES = ("BOTTOM", "JUNGLE", "MIDDLE", "TOP", "UTILITY")
+ROLE_CODE = {r: i for i, r in enumerate(ROLES)}
+FIELDS = ("match", "minute", "pid", "team", "role", "gold", "xp", "cs")
+
+
+def lane_key(team_position: str | None) -> str:
+    if not team_position:
+        return "UNKNOWN"
+    t = str(team_position).upper()
+    if t in {"TOP", "JUNGLE", "MIDDLE", "BOTTOM", "UTILITY"}:
+        return t
+    return "UNKNOWN"
+
+
+def _new_group(keys):
+    # sort된 key 배열들에서 그룹이 시작되는 위치
+    new = np.ones(len(keys[0]), dtype=bool)
+    if len(new) > 1:
+        new[1:] = ~np.all([k[1:] == k[:-1] for k in keys], axis=0)
+    return new
+
+
+class LaneStats:
+    """Accumulates per-participant stats of many matches; frame() gives the lane diff table."""
+
+    def __init__(self, minutes=(10,)):
+        self.minutes = tuple(minutes)
+        self.match_ids = []
+        self.cols = {f: [] for f in FIELDS}
+
+    def add(self, m: dict, frames: dict):
+        """frames: minute -> timeline frame (timeline_stream.frames_at)."""
+        self.add_match(m.get("metadata", {}).get("matchId"), m.get("info", {}).get("participants", []), frames)
+
+    def add_match(self, match_id, parts, frames: dict):
+        """parts: participant dicts with participantId / teamId / teamPosition (match JSON or match index)."""
+        if match_id is None:
+            return  # groupby("matchId")가 버리던 경우
+        mi = len(self.match_ids)
+        rows = []
+        for k, minute in enumerate(self.minutes):
+            frame = frames.get(minute)
+            if frame is None:
+                continue
+            pframes = frame.get("participantFrames", {})
+            for p in parts:
+                pid = p.get("participantId")
+                pf = pframes.get(str(pid))
+                if not pf:
+                    continue
+                pid, team = int(pid), int(p.get("teamId"))
+                role = lane_key(p.get("teamPosition"))
+                if role == "UNKNOWN":
+                    continue
+                rows.append((
+                    mi, k, pid, team, ROLE_CODE[role],
+                    float(pf.get("totalGold", 0) or 0),
+                    float(pf.get("xp", 0) or 0),
+                    float((pf.get("minionsKilled", 0) or 0) + (pf.get("jungleMinionsKilled", 0) or 0)),
+                ))
+        # 변환이 다 끝난 뒤에 추가 (중간에 실패한 match는 통째로 빠진다)
+        self.match_ids.append(match_id)
+        for f, values in zip(FIELDS, zip(*rows)):
+            self.cols[f].extend(values)
+
+    def frame(self) -> pd.DataFrame:
+        c = {f: np.asarray(v, dtype=np.float64 if f in ("gold", "xp", "cs") else np.int64)
+             for f, v in self.cols.items()}
+        n = len(c["match"])
+        if n == 0:
+            return pd.DataFrame([])
+
+        # 1) (match, minute, role, team) 마다 gold가 가장 높은 선수, 동률이면 먼저 나온 선수
+        order = np.lexsort((np.arange(n), -c["gold"], c["team"], c["role"], c["minute"], c["match"]))
+        keys = [c[f][order] for f in ("match", "minute", "role", "team")]
+        top = order[_new_group(keys)]
+
+        # 2) (match, minute, role)에 팀이 정확히 둘이면 lane 맞상대 (teamId 작은 쪽이 a)
+        keys = [c[f][top] for f in ("match", "minute", "role")]
+        starts = np.flatnonzero(_new_group(keys))
+        sizes = np.diff(np.append(starts, len(top)))
+        pair = starts[sizes == 2]
+        if len(pair) == 0:
+            return pd.DataFrame([])
+        a, b = top[pair], top[pair + 1]
+
+        # 3) a, b 순서로 번갈아 놓으면 (match, minute, role, a/b) 순서가 된다
+        rows = np.empty(2 * len(a), dtype=np.int64)
+        rows[0::2], rows[1::2] = a, b
+        opp = np.empty_like(rows)
+        opp[0::2], opp[1::2] = b, a
+
+        # 4) minute별 결과를 (match, participant) 한 행으로 합친다 (처음 나온 순서)
+        pid = c["pid"][rows]
+        key = c["match"][rows] * (int(pid.max()) + 1) + pid
+        _, first, inverse = np.unique(key, return_index=True, return_inverse=True)
+        rank = np.empty(len(first), dtype=np.int64)
+        rank[np.argsort(first, kind="stable")] = np.arange(len(first))
+        out_row = rank[inverse]
+        out_src = rows[np.sort(first)]
+
+        minute_of = c["minute"][rows]
+        seen = [k for k in range(len(self.minutes)) if (minute_of == k).any()]
+        first_at = {k: out_row[minute_of == k].min() for k in seen}
+        data = {
+            "matchId": [self.match_ids[i] for i in c["match"][out_src]],
+            "participantId": c["pid"][out_src],
+        }
+        for k in sorted(seen, key=lambda k: (first_at[k], k)):
+            minute = self.minutes[k]
+            sel = minute_of == k
+            for f in ("gold", "xp", "cs"):
+                col = np.full(len(out_src), np.nan)
+                col[out_row[sel]] = c[f][rows[sel]] - c[f][opp[sel]]
+                data[f"{f}_diff_{minute}"] = col
+        return pd.DataFrame(data)
@@ -1,14 +1,13 @@
-import time, random
-from config import PLATFORM, DIVS, LOWER_TIERS, REQ_SLEEP
+import random
+from config import PLATFORM, DIVS, LOWER_TIERS, api_host
 from http_client import get_json
 
 def get_entries_lower_tier(tier, pages=3):
     pool = []
     for div in DIVS:
         for page in range(1, pages + 1):
-            url = f"https://{PLATFORM}.api.riotgames.com/lol/league/v4/entries/RANKED_SOLO_5x5/{tier}/{div}"
+            url = f"{api_host(PLATFORM)}/lol/league/v4/entries/RANKED_SOLO_5x5/{tier}/{div}"
             data = get_json(url, params={"page": page})
-            time.sleep(REQ_SLEEP)
             pool.extend([e for e in data if "puuid" in e])
     return pool
 
@@ -18,9 +17,8 @@ def get_entries_top_tier(tier):
         "GRANDMASTER": "grandmasterleagues/by-queue",
         "CHALLENGER": "challengerleagues/by-queue",
     }[tier]
-    url = f"https://{PLATFORM}.api.riotgames.com/lol/league/v4/{path}/RANKED_SOLO_5x5"
+    url = f"{api_host(PLATFORM)}/lol/league/v4/{path}/RANKED_SOLO_5x5"
     data = get_json(url)
-    time.sleep(REQ_SLEEP)
     return [e for e in data.get("entries", []) if "puuid" in e]
 
 def sample_one_candidate_entry(tier, candidate_cap=50):
@@ -1,36 +1,42 @@
 # SoloQ/parse.py
-import os, json, re
-import pandas as pd
-
-try:
-    import pyarrow as pa
-    import pyarrow.parquet as pq
-    HAS_ARROW = True
-except Exception:
-    HAS_ARROW = False
+import os, re, time, argparse
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from raw_store import open_store, tier_dirs
+from jsonio import loads
+from patches import version_key
+from wide_table import WideTable, load_schema, save_schema
+from projection import needed_columns
+from tableio import HAS_ARROW, save_table
 
 
+# 같은 key가 row마다 반복되므로 결과를 캐시한다
+@lru_cache(maxsize=8192)
 def sanitize_key(key: str) -> str:
     return re.sub(r"[^0-9a-zA-Z_]+", "_", key).strip("_")
 
 
 def flatten_dict(d, prefix=""):
     out = {}
-    if not isinstance(d, dict):
-        return out
+    if isinstance(d, dict):
+        _flatten_into(out, d, prefix)
+    return out
+
+
+def _flatten_into(out, d, prefix):
+    # 하위 dict마다 새 dict를 만들어 update하지 않고 out 하나에 바로 쓴다
     for k, v in d.items():
         key = f"{prefix}.{k}" if prefix else k
         if isinstance(v, dict):
-            out.update(flatten_dict(v, key))
+            _flatten_into(out, v, key)
         elif isinstance(v, list):
             if all(isinstance(x, dict) for x in v):
                 for i, x in enumerate(v):
-                    out.update(flatten_dict(x, f"{key}[{i}]"))
+                    _flatten_into(out, x, f"{key}[{i}]")
             else:
                 out[key] = ",".join(map(str, v))
         else:
             out[key] = v
-    return out
 
 
 def parse_perks(perks):
@@ -68,7 +74,57 @@ def kda(k, d, a):
     return ((k or 0) + (a or 0)) / (d or 1)
 
 
-def parse_one_json(tier, data):
+def _wide_row(row, p, teams):
+    # 전체 wide dump: challenges / perks / team / participant 전체 flatten
+    for ck, cv in (p.get("challenges") or {}).items():
+        row[f"ch_{sanitize_key(str(ck))}"] = cv
+    row.update(parse_perks(p.get("perks")))
+    for k, v in teams.get(p.get("teamId"), {}).items():
+        row[k] = v
+
+    flat = flatten_dict(p)
+    for k, v in flat.items():
+        if k not in row:
+            row[sanitize_key(k)] = v
+    return row
+
+
+def _project_row(row, p, teams, columns):
+    # 요청된 컬럼만, _wide_row와 같은 값으로. 중첩 필드에서 오는 컬럼일 때만 전체 flatten으로 간다
+    out = {}
+    ch = perks = wide = None
+    team = teams.get(p.get("teamId"), {})
+    for c in columns:
+        if c in row:
+            out[c] = row[c]
+            continue
+        if c.startswith("ch_"):
+            if ch is None:
+                ch = {f"ch_{sanitize_key(str(k))}": v for k, v in (p.get("challenges") or {}).items()}
+            if c in ch:
+                out[c] = ch[c]
+                continue
+        if c.startswith("perks_"):
+            if perks is None:
+                perks = parse_perks(p.get("perks"))
+            if c in perks:
+                out[c] = perks[c]
+                continue
+        if c in team:
+            out[c] = team[c]
+        elif c in p and not isinstance(p[c], (dict, list)) and sanitize_key(c) == c:
+            out[c] = p[c]
+        elif any(isinstance(v, (dict, list)) and (c == k or c.startswith(sanitize_key(k) + "_"))
+                 for k, v in p.items()):
+            if wide is None:
+                wide = _wide_row(dict(row), p, teams)
+            if c in wide:
+                out[c] = wide[c]
+    return out
+
+
+def parse_one_json(tier, data, columns=None):
+    """Participant rows of one match; columns: only these output columns (projection)."""
     info = data.get("info", {})
     meta = data.get("metadata", {})
     match_id = meta.get("matchId")
@@ -108,66 +164,214 @@ def parse_one_json(tier, data):
         row["cspm"] = cs / dur
         row["kda"] = kda(p.get("kills", 0), p.get("deaths", 0), p.get("assists", 0))
 
-        for ck, cv in (p.get("challenges") or {}).items():
-            row[f"ch_{sanitize_key(str(ck))}"] = cv
-        row.update(parse_perks(p.get("perks")))
-        for k, v in teams.get(p.get("teamId"), {}).items():
-            row[k] = v
-
-        flat = flatten_dict(p)
-        for k, v in flat.items():
-            if k not in row:
-                row[sanitize_key(k)] = v
-        rows.append(row)
+        rows.append(_wide_row(row, p, teams) if columns is None else _project_row(row, p, teams, columns))
     return rows
 
 
-def build_dataframe(base_dir):
-    all_rows = []
-    for tier in os.listdir(base_dir):
-        matches_dir = os.path.join(base_dir, tier, "matches")
-        if not os.path.isdir(matches_dir):
-            continue
-        for fn in os.listdir(matches_dir):
-            if not fn.endswith(".json"):
+def parse_matches(tier, tier_dir, mids, schema=None, columns=None):
+    # worker: match 묶음 하나를 column buffer 하나로 (+ match별 row 수)
+    store = open_store(tier_dir)
+    table = WideTable(schema)
+    counts = []
+    for mid in mids:
+        try:
+            rows = parse_one_json(tier, store.load("matches", mid), columns)
+        except Exception as e:
+            print(f"{tier}/{mid}: {e}")
+            rows = []
+        table.extend(rows)
+        counts.append(len(rows))
+    store.close()
+    table.flush()
+    return table, counts
+
+
+def parse_chunk(tier, tier_dir, mids, schema=None, columns=None):
+    return parse_matches(tier, tier_dir, mids, schema, columns)[0]
+
+
+def build_dataframe(base_dir, workers=1, chunk_size=64, schema_path=None, columns=None):
+    """One row per participant of every match under base_dir.
+
+    columns: extract only these (see projected_columns()); None = every flattened field.
+
+    Rows go straight into typed column buffers (wide_table.WideTable) instead of a
+    list of dicts. workers > 1 parses chunks of `chunk_size` matches in a process pool
+    and merges the per-chunk buffers in file order, giving the same frame as the
+    serial path. schema_path: column kinds cached from the previous run (updated).
+    """
+    schema = load_schema(schema_path) if schema_path else None
+    t0 = time.perf_counter()
+    if workers <= 1:
+        table = WideTable(schema)
+        n = 0
+        for tier in os.listdir(base_dir):
+            tier_dir = os.path.join(base_dir, tier)
+            if not os.path.isdir(tier_dir):
+                continue
+            # files(.json / .json.gz / .json.zst) 또는 archive.sqlite 에서 한 번에 읽는다
+            store = open_store(tier_dir)
+            for mid, raw in store.scan("matches"):
+                n += 1
+                try:
+                    data = loads(raw)
+                    table.extend(parse_one_json(tier, data, columns))
+                except Exception as e:
+                    print(f"{tier}/{mid}: {e}")
+            store.close()
+        t1 = time.perf_counter()
+    else:
+        tasks = []
+        for tier in os.listdir(base_dir):
+            tier_dir = os.path.join(base_dir, tier)
+            if not os.path.isdir(tier_dir):
                 continue
-            fp = os.path.join(matches_dir, fn)
-            try:
-                with open(fp, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                all_rows.extend(parse_one_json(tier, data))
-            except Exception as e:
-                print(f"{fp}: {e}")
-    df = pd.DataFrame(all_rows)
+            store = open_store(tier_dir)
+            mids = store.ids("matches")
+            store.close()
+            tasks += [(tier, tier_dir, mids[i:i + chunk_size]) for i in range(0, len(mids), chunk_size)]
+        n = sum(len(t[2]) for t in tasks)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            table = WideTable(schema)
+            for chunk in pool.map(parse_chunk, *zip(*tasks), [schema] * len(tasks), [columns] * len(tasks)) \
+                    if tasks else []:
+                table.merge(chunk)
+        t1 = time.perf_counter()
+    df = table.frame()
+    if schema_path and table.cols:
+        save_schema(schema_path, table.kinds())
+    t2 = time.perf_counter()
     df.columns = [sanitize_key(c) for c in df.columns]
+    print(f"[PARSE] {n} matches, workers={workers}: parse {t1 - t0:.2f}s, frame {t2 - t1:.2f}s")
     return df
 
 
-def save_outputs(df, patch_tag):
-    os.makedirs("data", exist_ok=True)
-    csv_path = f"data/soloq_full_{patch_tag}.csv"
-    parquet_path = f"data/soloq_full_{patch_tag}.parquet"
+def build_incremental(base_dir, parts_dir, workers=1, chunk_size=64, schema_path=None, columns=None,
+                      rebuild=False):
+    """build_dataframe, but only match files that are new or changed since the last run are parsed.
+
+    Rows are kept per match file in Parquet parts under parts_dir (incremental.PartStore); rows of
+    changed / deleted files are dropped from their parts, new rows go into one new part, and the
+    result is the parts concatenated in order (so newly collected matches come last).
+    rebuild: forget the manifest and parse everything again.
+    """
+    from incremental import PartStore
 
-    df.to_csv(csv_path, index=False, encoding="utf-8-sig")
-    print(f"CSV saved: {csv_path}")
+    schema = load_schema(schema_path) if schema_path else None
+    t0 = time.perf_counter()
+    parts = PartStore(parts_dir, columns)
+    if rebuild:
+        parts.reset()
+    current, tiers = {}, {}
+    for tier, tier_dir in tier_dirs(base_dir):
+        tiers[tier] = tier_dir
+        store = open_store(tier_dir)
+        current.update((f"{tier}/{mid}", st) for mid, st in store.stamps("matches").items())
+        store.close()
+    todo, gone = parts.diff(current)
+    parts.drop(gone)
 
-    if HAS_ARROW:
-        table = pa.Table.from_pandas(df, preserve_index=False)
-        pq.write_table(table, parquet_path, compression="snappy")
-        print(f"Parquet saved: {parquet_path}")
+    by_tier = {}
+    for k in todo:
+        tier, mid = k.split("/", 1)
+        by_tier.setdefault(tier, []).append(mid)
+    tasks = [(tier, tiers[tier], mids[i:i + chunk_size])
+             for tier, mids in by_tier.items() for i in range(0, len(mids), chunk_size)]
+    if workers <= 1 or len(tasks) <= 1:
+        results = [parse_matches(*t, schema, columns) for t in tasks]
     else:
-        print("pyarrow not installed, skipped Parquet.")
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(parse_matches, *zip(*tasks), [schema] * len(tasks), [columns] * len(tasks)))
+    table, entries = WideTable(schema), []
+    for (tier, _, mids), (chunk, counts) in zip(tasks, results):
+        table.merge(chunk)
+        entries += [(f"{tier}/{mid}", n) for mid, n in zip(mids, counts)]
+    t1 = time.perf_counter()
+
+    new = table.frame()
+    new.columns = [sanitize_key(c) for c in new.columns]
+    parts.add(new, entries, current)
+    df = parts.frame()
+    parts.save()
+    if schema_path and table.cols:
+        save_schema(schema_path, {**(schema or {}), **table.kinds()})
+    deleted = sum(k not in current for k in gone)
+    print(f"[PARSE] incremental: {len(todo)} new/changed, {deleted} deleted, {len(current) - len(todo)} unchanged "
+          f"matches, {len(parts.parts)} parts; parse {t1 - t0:.2f}s, parts {time.perf_counter() - t1:.2f}s")
+    return df
+
+
+# clean.py가 match JSON을 다시 열지 않도록 parse 단계에서 같이 저장하는 match metadata
+INDEX_COLUMNS = ["tier", "matchId", "gameVersion", "patch", "gameDuration", "queueId",
+                 "participantId", "teamId", "teamPosition"]
+
+
+def projected_columns():
+    # match index + clean / unified가 선언한 컬럼 (projection.py)
+    return needed_columns(*[c for c in INDEX_COLUMNS if c != "patch"])
+
+
+# Parquet으로 저장할 때의 dtype (나머지 컬럼은 parse 결과 그대로)
+FULL_SCHEMA = {
+    "tier": "category", "gameMode": "category", "championName": "category",
+    "kills": "int64", "deaths": "int64", "assists": "int64",
+    "gpm": "float32", "dpm": "float32", "cspm": "float32", "kda": "float32",
+}
+INDEX_SCHEMA = {"tier": "category", "patch": "category"}
+
+
+def build_match_index(df):
+    """One row per participant: match metadata plus the participant's team / position."""
+    idx = df.reindex(columns=[c for c in INDEX_COLUMNS if c != "patch"])
+    patch = idx["gameVersion"].map(lambda v: "%d.%d" % version_key(v) if version_key(v) else None)
+    idx.insert(INDEX_COLUMNS.index("patch"), "patch", patch)
+    return idx
+
+
+def save_outputs(df, patch_tag, csv=None):
+    # Parquet이 다음 단계의 입력, CSV는 csv=True / EXPORT_CSV=1 일 때만
+    os.makedirs("data", exist_ok=True)
+    for path in save_table(build_match_index(df), f"data/soloq_match_index_{patch_tag}", INDEX_SCHEMA, csv=csv):
+        print(f"Match index saved: {path}")
+    for path in save_table(df, f"data/soloq_full_{patch_tag}", FULL_SCHEMA, csv=csv, encoding="utf-8-sig"):
+        print(f"Saved: {path}")
 
 
 if __name__ == "__main__":
-    # 자동 탐지: output_*_by_tier
-    base_candidates = [d for d in os.listdir(".") if d.startswith("output_") and d.endswith("_by_tier")]
-    if not base_candidates:
-        raise FileNotFoundError("No 'output_*_by_tier' folder found in current directory.")
-    base_dir = base_candidates[0]
-    patch_tag = base_dir.replace("output_", "").replace("_by_tier", "")
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--root", default=None, help="raw tree (default: first output_*_by_tier found)")
+    ap.add_argument("--workers", type=int, default=1,
+                    help="parse processes (default 1 = serial; e.g. --workers 8 for large trees)")
+    ap.add_argument("--full", action="store_true",
+                    help="write every flattened participant field (default: only columns used downstream)")
+    ap.add_argument("--csv", action="store_true", help="also export CSV next to the Parquet files")
+    ap.add_argument("--incremental", action="store_true",
+                    help="parse only match files added / changed since the last run (data/soloq_parts_<PATCH>/)")
+    ap.add_argument("--rebuild", action="store_true", help="with --incremental: drop the parts and parse everything")
+    args = ap.parse_args()
+
+    base_dir = args.root
+    if base_dir is None:
+        # 자동 탐지: output_*_by_tier
+        base_candidates = [d for d in os.listdir(".") if d.startswith("output_") and d.endswith("_by_tier")]
+        if not base_candidates:
+            raise FileNotFoundError("No 'output_*_by_tier' folder found in current directory.")
+        base_dir = base_candidates[0]
+    patch_tag = os.path.basename(os.path.normpath(base_dir)).replace("output_", "").replace("_by_tier", "")
     print(f"🔍 Detected base_dir={base_dir} (PATCH={patch_tag})")
 
-    df = build_dataframe(base_dir)
+    os.makedirs("data", exist_ok=True)
+    columns = None if args.full else projected_columns()
+    print(f"[PARSE] columns: {'all (wide dump)' if columns is None else len(columns)}")
+    schema_path = f"data/soloq_schema_{patch_tag}.json"
+    if args.incremental and not HAS_ARROW:
+        print("[WARN] --incremental needs pyarrow; parsing everything")
+    if args.incremental and HAS_ARROW:
+        df = build_incremental(base_dir, f"data/soloq_parts_{patch_tag}", workers=args.workers,
+                               schema_path=schema_path, columns=columns, rebuild=args.rebuild)
+    else:
+        df = build_dataframe(base_dir, workers=args.workers, schema_path=schema_path, columns=columns)
     print(f"DataFrame shape: {df.shape}")
-    save_outputs(df, patch_tag)
+    t0 = time.perf_counter()
+    save_outputs(df, patch_tag, csv=args.csv or None)
+    print(f"[PARSE] save {time.perf_counter() - t0:.2f}s")
@@ -0,0 +1,66 @@
+# SoloQ/patches.py
+import re
+from datetime import datetime, timedelta, timezone
+
+# KR deploy date (KST) of each patch; gameVersion "15.24.xxx" -> "15.24"
+PATCH_DATES = {
+    "15.1": "2025-01-08",
+    "15.2": "2025-01-22",
+    "15.3": "2025-02-05",
+    "15.4": "2025-02-19",
+    "15.5": "2025-03-05",
+    "15.6": "2025-03-19",
+    "15.7": "2025-04-02",
+    "15.8": "2025-04-16",
+    "15.9": "2025-04-30",
+    "15.10": "2025-05-14",
+    "15.11": "2025-05-28",
+    "15.12": "2025-06-11",
+    "15.13": "2025-06-25",
+    "15.14": "2025-07-16",
+    "15.15": "2025-07-30",
+    "15.16": "2025-08-13",
+    "15.17": "2025-08-27",
+    "15.18": "2025-09-10",
+    "15.19": "2025-09-24",
+    "15.20": "2025-10-08",
+    "15.21": "2025-10-22",
+    "15.22": "2025-11-05",
+    "15.23": "2025-11-19",
+    "15.24": "2025-12-03",
+}
+
+KST = timezone(timedelta(hours=9))
+# 배포 시각/지역 차이를 흡수하는 여유
+MARGIN = timedelta(days=1)
+
+
+def version_key(version):
+    # "15.24.734.7485" -> (15, 24); unparsable -> None
+    m = re.match(r"(\d+)\.(\d+)", str(version or ""))
+    return (int(m.group(1)), int(m.group(2))) if m else None
+
+
+def _epoch(day):
+    return int(datetime.strptime(day, "%Y-%m-%d").replace(tzinfo=KST).timestamp())
+
+
+def patch_window(patch_mm):
+    """(startTime, endTime) epoch seconds for match-v5, or (None, None) if the patch is unknown.
+
+    endTime is None for the newest patch in the table.
+    """
+    if patch_mm not in PATCH_DATES:
+        return None, None
+    start = _epoch(PATCH_DATES[patch_mm]) - int(MARGIN.total_seconds())
+    later = sorted(
+        (version_key(p), d) for p, d in PATCH_DATES.items()
+        if version_key(p) > version_key(patch_mm)
+    )
+    end = _epoch(later[0][1]) + int(MARGIN.total_seconds()) if later else None
+    return start, end
+
+
+def predates(game_version, patch_mm):
+    v, p = version_key(game_version), version_key(patch_mm)
+    return v is not None and p is not None and v < p
@@ -0,0 +1,33 @@
+# SoloQ/projection.py
+# Participant columns the later stages actually read from soloq_full_<PATCH>.csv.
+# parse.py extracts only these by default (no flatten_dict); `parse.py --full` writes the wide dump.
+# Kept free of config imports so parse.py can use it without RIOT_API_KEY.
+
+# clean.clean_soloq_df / clean.main: 필터, PII 제거 전 단계, columns_keep 중 parse가 만드는 컬럼
+CLEAN_COLUMNS = (
+    "tier", "matchId", "participantId", "gameVersion", "gameDuration",
+    "gameMode", "mapId", "queueId", "teamPosition", "team_teamId",
+    "kills", "deaths", "assists", "kda",
+    "goldEarned", "gpm", "totalDamageDealtToChampions", "dpm",
+    "totalMinionsKilled", "neutralMinionsKilled", "cspm",
+    "visionScore", "wardsPlaced", "wardsKilled",
+    "team_obj_dragon_kills", "team_obj_baron_kills", "team_obj_tower_kills",
+)
+
+# unified.parse_soloq_with_raw: raw soloq 테이블을 바로 넣을 때 추가로 찾는 컬럼
+UNIFIED_COLUMNS = (
+    "championName", "win", "team_obj_champion_kills",
+    "ch_damagePerMinute", "ch_teamDamagePercentage",
+    "ch_laningPhaseGoldExpAdvantage", "ch_maxCsAdvantageOnLaneOpponent", "ch_xpDiffAt10",
+    "dragonKills", "baronKills", "turretKills",
+)
+
+CONSUMERS = {"clean": CLEAN_COLUMNS, "unified": UNIFIED_COLUMNS}
+
+
+def needed_columns(*extra, consumers=CONSUMERS):
+    """Union of the declared columns (declaration order, duplicates dropped)."""
+    cols = list(extra)
+    for names in consumers.values():
+        cols.extend(names)
+    return tuple(dict.fromkeys(cols))
@@ -0,0 +1,148 @@
+import re, time, threading
+from config import RATE_LIMITS
+
+
+def parse_limits(header):
+    # "20:1,100:120" -> [(20, 1), (100, 120)]
+    if not header:
+        return []
+    out = []
+    for pair in str(header).split(","):
+        try:
+            n, sec = pair.strip().split(":")
+            out.append((int(n), int(sec)))
+        except ValueError:
+            continue
+    return out
+
+
+class TokenBucket:
+    """capacity tokens per period seconds, refilled continuously."""
+
+    def __init__(self, capacity, period):
+        self.capacity = float(capacity)
+        self.period = float(period)
+        self.rate = self.capacity / self.period
+        self.tokens = self.capacity
+        self.stamp = time.monotonic()
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def take(self, now):
+        # 토큰이 모자라면 음수(빚)로 두고, 빚을 갚을 때까지 기다릴 시간을 돌려준다
+        self.refill(now)
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+class RateLimiter:
+    """Multi-window limiter for one scope (an app on a routing host, or one method).
+
+    Starts from `limits` and re-syncs from the X-*-Rate-Limit / -Count headers
+    of every response, so it speeds up when the server reports headroom and
+    slows down as a window fills.
+    """
+
+    def __init__(self, limits=()):
+        self.limits = list(limits)
+        self.buckets = [TokenBucket(n, sec) for n, sec in self.limits]
+        self.blocked_until = 0.0
+        self.in_flight = 0
+        self.stats = {"requests": 0, "429": 0, "throttled_sec": 0.0}
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        with self.lock:
+            now = time.monotonic()
+            wait = max([b.take(now) for b in self.buckets] + [0.0])
+            wait = max(wait, self.blocked_until - now)
+            self.in_flight += 1
+            self.stats["requests"] += 1
+            self.stats["throttled_sec"] += wait
+            return wait
+
+    def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def observe(self, limit_header=None, count_header=None):
+        with self.lock:
+            self.in_flight = max(0, self.in_flight - 1)
+            limits = parse_limits(limit_header)
+            if limits and limits != self.limits:
+                self.limits = limits
+                self.buckets = [TokenBucket(n, sec) for n, sec in limits]
+            counts = {sec: n for n, sec in parse_limits(count_header)}
+            now = time.monotonic()
+            for b in self.buckets:
+                used = counts.get(int(b.period))
+                if used is None:
+                    continue
+                # 서버가 센 사용량이 기준: 아직 응답이 안 온 요청까지 빼고 남은 토큰으로 맞춘다
+                b.refill(now)
+                b.tokens = b.capacity - used - self.in_flight
+
+    def penalize(self, seconds):
+        # 429를 받으면 같은 scope로 나가는 모든 요청을 Retry-After 동안 멈춘다
+        with self.lock:
+            self.stats["429"] += 1
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+def acquire(*limiters):
+    wait = max([lim.reserve() for lim in limiters] + [0.0])
+    if wait > 0:
+        time.sleep(wait)
+    # 기다리는 동안 다른 요청이 429를 받았으면 그 penalty가 끝날 때까지 더 기다린다
+    while True:
+        extra = max(lim.blocked_until for lim in limiters) - time.monotonic()
+        if extra <= 0:
+            return wait
+        time.sleep(extra)
+        wait += extra
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def host_key(url):
+    # "https://kr.api.riotgames.com/lol/..." -> "https://kr.api.riotgames.com"
+    # "http://127.0.0.1:8765/asia/lol/..."  -> "http://127.0.0.1:8765/asia" (stub server)
+    return re.split(r"/(?:lol|riot)/", url, maxsplit=1)[0]
+
+
+def method_key(url):
+    # 경로의 id 부분을 지워서 endpoint(method) 단위로 묶는다
+    host = host_key(url)
+    path = url[len(host):].split("?", 1)[0]
+    path = re.sub(r"/by-puuid/[^/]+", "/by-puuid/{puuid}", path)
+    path = re.sub(r"/matches/[A-Z0-9]+_\d+", "/matches/{matchId}", path)
+    path = re.sub(r"/entries/RANKED_SOLO_5x5/[^/]+/[^/]+", "/entries/RANKED_SOLO_5x5/{tier}/{division}", path)
+    return host + path
+
+
+def _get(key, limits):
+    with _limiters_lock:
+        if key not in _limiters:
+            _limiters[key] = RateLimiter(limits)
+        return _limiters[key]
+
+
+def limiter_for(url):
+    return _get(host_key(url), RATE_LIMITS)
+
+
+def method_limiter_for(url):
+    # method limit은 첫 응답 헤더를 받기 전까지 모르므로 제한 없이 시작
+    return _get(method_key(url), ())
+
+
+def limiter_stats():
+    with _limiters_lock:
+        items = list(_limiters.items())
+    return {k: dict(lim.stats, limits=lim.limits) for k, lim in items}
@@ -0,0 +1,281 @@
+# SoloQ/raw_store.py
+# Where a tier's raw matches / timelines live.
+#
+#   files   : <tier>/matches/<id>.json*, <tier>/timelines/<id>_timeline.json*  (one file per response)
+#   archive : <tier>/archive.sqlite  (one blob per response, random access by match id)
+#
+# Readers call open_store(tier_dir), which picks the archive when it exists. A tier that has both
+# (per-file responses committed or written before the archive was created) is read as one store:
+# archive first, then the files for ids the archive does not have; new responses go to the archive.
+#
+#   python raw_store.py pack output_15.24_by_tier --storage zstd
+#   python raw_store.py unpack output_15.24_by_tier
+import os, sqlite3, argparse, threading, contextlib
+from utils import safe_write, find_raw, iter_raw, read_raw, map_raw, load_json, encode_json, decode_bytes, storage_of
+from jsonio import loads
+
+KINDS = ("matches", "timelines")
+ARCHIVE_NAME = "archive.sqlite"
+
+
+class FileStore:
+    layout = "files"
+
+    def __init__(self, tier_dir, storage="json"):
+        self.tier_dir = tier_dir
+        self.storage = storage
+
+    def path(self, kind, mid):
+        name = f"{mid}_timeline.json" if kind == "timelines" else f"{mid}.json"
+        return os.path.join(self.tier_dir, kind, name)
+
+    def has(self, kind, mid):
+        return find_raw(self.path(kind, mid)) is not None
+
+    def read(self, kind, mid):
+        return read_raw(self.path(kind, mid))
+
+    def view(self, kind, mid):
+        # with store.view(kind, mid) as buf: JSON as bytes or a read-only mmap
+        return map_raw(self.path(kind, mid))
+
+    def load(self, kind, mid):
+        return load_json(self.path(kind, mid))
+
+    def put(self, kind, mid, obj):
+        safe_write(self.path(kind, mid), obj, self.storage)
+
+    def ids(self, kind):
+        d = os.path.join(self.tier_dir, kind)
+        if not os.path.isdir(d):
+            return []
+        tail = "_timeline" if kind == "timelines" else ""
+        return [name[: len(name) - len(tail)] for name, _ in iter_raw(d) if name.endswith(tail)]
+
+    def scan(self, kind):
+        # (id, JSON bytes) for every stored response of `kind`
+        for mid in self.ids(kind):
+            yield mid, self.read(kind, mid)
+
+    def stamps(self, kind):
+        # id -> [size, mtime_ns]: 파일을 다시 쓰면 바뀐다 (parse.py --incremental)
+        d = os.path.join(self.tier_dir, kind)
+        if not os.path.isdir(d):
+            return {}
+        tail = "_timeline" if kind == "timelines" else ""
+        out = {}
+        for name, path in iter_raw(d):
+            if name.endswith(tail):
+                st = os.stat(path)
+                out[name[: len(name) - len(tail)]] = [st.st_size, st.st_mtime_ns]
+        return out
+
+    def close(self):
+        pass
+
+
+class ArchiveStore:
+    """All raw responses of one tier in a single SQLite file (compressed blobs, keyed by match id)."""
+
+    layout = "archive"
+
+    def __init__(self, tier_dir, storage="zstd"):
+        os.makedirs(tier_dir, exist_ok=True)
+        self.tier_dir = tier_dir
+        self.storage = storage
+        self.path = os.path.join(tier_dir, ARCHIVE_NAME)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS blobs ("
+            " kind TEXT NOT NULL, id TEXT NOT NULL, storage TEXT NOT NULL, data BLOB NOT NULL,"
+            " PRIMARY KEY (kind, id))"
+        )
+        self.db.commit()
+
+    def has(self, kind, mid):
+        with self.lock:
+            return self.db.execute("SELECT 1 FROM blobs WHERE kind = ? AND id = ?", (kind, mid)).fetchone() is not None
+
+    def read(self, kind, mid):
+        with self.lock:
+            row = self.db.execute("SELECT storage, data FROM blobs WHERE kind = ? AND id = ?", (kind, mid)).fetchone()
+        if row is None:
+            raise FileNotFoundError(f"{self.path}: {kind}/{mid}")
+        return decode_bytes(row[1], row[0])
+
+    def view(self, kind, mid):
+        return contextlib.nullcontext(self.read(kind, mid))
+
+    def load(self, kind, mid):
+        return loads(self.read(kind, mid))
+
+    def put(self, kind, mid, obj):
+        self.put_raw(kind, mid, encode_json(obj, self.storage), self.storage)
+
+    def put_raw(self, kind, mid, data, storage):
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO blobs(kind, id, storage, data) VALUES (?, ?, ?, ?)",
+                (kind, mid, storage, data),
+            )
+            self.db.commit()
+
+    def ids(self, kind):
+        with self.lock:
+            return [r[0] for r in self.db.execute("SELECT id FROM blobs WHERE kind = ? ORDER BY id", (kind,))]
+
+    def scan(self, kind):
+        # 한 번의 sequential query로 tier 전체를 읽는다
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT id, storage, data FROM blobs WHERE kind = ? ORDER BY id", (kind,)
+            ).fetchall()
+        for mid, storage, data in rows:
+            yield mid, decode_bytes(data, storage)
+
+    def stamps(self, kind):
+        # id -> [storage, size, rowid]: INSERT OR REPLACE는 새 rowid를 받는다 (blob은 읽지 않는다)
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT id, storage, length(data), rowid FROM blobs WHERE kind = ? ORDER BY id", (kind,)
+            ).fetchall()
+        return {mid: [storage, size, rowid] for mid, storage, size, rowid in rows}
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+class MixedStore:
+    """A tier with archive.sqlite and per-file responses: reads see both (archive wins for an id in
+    both), writes go to the archive. `python raw_store.py pack` moves the files in."""
+
+    layout = "archive"
+
+    def __init__(self, archive, files):
+        self.archive = archive
+        self.files = files
+        self.tier_dir = archive.tier_dir
+        self.storage = archive.storage
+
+    def _source(self, kind, mid):
+        return self.archive if self.archive.has(kind, mid) else self.files
+
+    def has(self, kind, mid):
+        return self.archive.has(kind, mid) or self.files.has(kind, mid)
+
+    def read(self, kind, mid):
+        return self._source(kind, mid).read(kind, mid)
+
+    def view(self, kind, mid):
+        return self._source(kind, mid).view(kind, mid)
+
+    def load(self, kind, mid):
+        return self._source(kind, mid).load(kind, mid)
+
+    def put(self, kind, mid, obj):
+        self.archive.put(kind, mid, obj)
+
+    def ids(self, kind):
+        return sorted(set(self.archive.ids(kind)) | set(self.files.ids(kind)))
+
+    def scan(self, kind):
+        # id 순서 (두 layout의 scan과 같은 순서)
+        stored = dict(self.archive.scan(kind))
+        for mid in self.ids(kind):
+            yield mid, stored[mid] if mid in stored else self.files.read(kind, mid)
+
+    def stamps(self, kind):
+        return {**self.files.stamps(kind), **self.archive.stamps(kind)}
+
+    def close(self):
+        self.archive.close()
+
+
+def open_store(tier_dir, layout="files", storage="json"):
+    """Store for tier_dir: an existing <tier>/archive.sqlite always wins, otherwise `layout`.
+    Per-file responses next to an archive are still read (MixedStore)."""
+    if os.path.exists(os.path.join(tier_dir, ARCHIVE_NAME)):
+        layout = "archive"
+    if layout == "archive":
+        archive = ArchiveStore(tier_dir, storage)
+        files = FileStore(tier_dir)
+        if any(files.ids(kind) for kind in KINDS):
+            return MixedStore(archive, files)
+        return archive
+    if layout == "files":
+        return FileStore(tier_dir, storage)
+    raise ValueError(f"unknown layout {layout!r} (expected 'files' or 'archive')")
+
+
+def tier_dirs(base_dir):
+    for tier in sorted(os.listdir(base_dir)):
+        tier_dir = os.path.join(base_dir, tier)
+        if os.path.isdir(tier_dir):
+            yield tier, tier_dir
+
+
+def pack_tier(tier_dir, storage="zstd", keep=False):
+    # files -> archive. 이미 같은 storage로 압축된 파일은 다시 압축하지 않고 그대로 넣는다
+    src = FileStore(tier_dir)
+    dst = ArchiveStore(tier_dir, storage)
+    n = 0
+    for kind in KINDS:
+        for mid in src.ids(kind):
+            path = find_raw(src.path(kind, mid))
+            with open(path, "rb") as f:
+                data = f.read()
+            if storage_of(path) != storage:
+                data = encode_json(loads(decode_bytes(data, storage_of(path))), storage)
+            dst.put_raw(kind, mid, data, storage)
+            if not keep:
+                os.remove(path)
+            n += 1
+    dst.close()
+    if not keep:
+        for kind in KINDS:
+            d = os.path.join(tier_dir, kind)
+            if os.path.isdir(d) and not os.listdir(d):
+                os.rmdir(d)
+    return n
+
+
+def unpack_tier(tier_dir, storage="json"):
+    # archive -> files (기존 layout으로 되돌리기)
+    src = ArchiveStore(tier_dir)
+    dst = FileStore(tier_dir, storage)
+    n = 0
+    for kind in KINDS:
+        for mid, raw in src.scan(kind):
+            dst.put(kind, mid, loads(raw))
+            n += 1
+    src.close()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(src.path + suffix):
+            os.remove(src.path + suffix)
+    return n
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("pack", help="move each tier's match / timeline files into <tier>/archive.sqlite")
+    p.add_argument("dirs", nargs="+")
+    p.add_argument("--storage", choices=["json", "gzip", "zstd"], default="zstd")
+    p.add_argument("--keep", action="store_true", help="keep the original files")
+    p = sub.add_parser("unpack", help="write the archive back out as one file per response")
+    p.add_argument("dirs", nargs="+")
+    p.add_argument("--storage", choices=["json", "gzip", "zstd"], default="json")
+    args = ap.parse_args()
+
+    for d in args.dirs:
+        for tier, tier_dir in tier_dirs(d):
+            if args.cmd == "pack":
+                n = pack_tier(tier_dir, args.storage, args.keep)
+            elif os.path.exists(os.path.join(tier_dir, ARCHIVE_NAME)):
+                n = unpack_tier(tier_dir, args.storage)
+            else:
+                continue
+            print(f"[STORE] {args.cmd} {tier}: {n} responses")
@@ -0,0 +1,152 @@
+# SoloQ/response_cache.py
+# Global on-disk cache for immutable match-v5 responses (finished matches / timelines).
+#
+#   <CACHE_DIR>/index.sqlite        key -> digest, size, last access
+#   <CACHE_DIR>/objects/ab/abcd...  response body, content-addressed by sha256
+#
+#   python response_cache.py stats
+#   python response_cache.py seed output_15.24_by_tier ../backup
+import os, re, sys, time, sqlite3, hashlib, threading
+from config import CACHE_DIR, CACHE_MAX_BYTES
+from rate_limit import host_key
+from raw_store import open_store, tier_dirs
+
+CACHEABLE = re.compile(r"^/lol/match/v5/matches/[A-Z0-9]+_\d+(/timeline)?$")
+
+
+def cache_key(url):
+    # host를 뺀 API 경로가 key: 실서버 / stub / tier / patch 폴더와 무관하게 공유된다
+    path = url[len(host_key(url)):].split("?", 1)[0]
+    return path if CACHEABLE.match(path) else None
+
+
+class ResponseCache:
+    def __init__(self, root, max_bytes=CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self.lock = threading.Lock()
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(root, "index.sqlite"), check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, digest TEXT NOT NULL, size INTEGER NOT NULL, atime REAL NOT NULL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS entries_atime ON entries(atime)")
+        self.db.commit()
+
+    def _path(self, digest):
+        return os.path.join(self.root, "objects", digest[:2], digest)
+
+    def get(self, key):
+        with self.lock:
+            row = self.db.execute("SELECT digest FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                try:
+                    with open(self._path(row[0]), "rb") as f:
+                        body = f.read()
+                except OSError:
+                    self.db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    self.db.commit()
+                    row = None
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            self.db.execute("UPDATE entries SET atime = ? WHERE key = ?", (time.time(), key))
+            self.db.commit()
+            self.stats["hits"] += 1
+            return body
+
+    def put(self, key, body):
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._path(digest)
+        with self.lock:
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp = f"{path}.{threading.get_ident()}.tmp"
+                with open(tmp, "wb") as f:
+                    f.write(body)
+                os.replace(tmp, path)
+            self.db.execute(
+                "INSERT OR REPLACE INTO entries(key, digest, size, atime) VALUES (?, ?, ?, ?)",
+                (key, digest, len(body), time.time()),
+            )
+            self.db.commit()
+            self.stats["stores"] += 1
+            self._evict()
+
+    def total_bytes(self):
+        # 같은 내용은 한 번만 저장되므로 digest 기준으로 센다
+        row = self.db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT digest, size FROM entries)"
+        ).fetchone()
+        return row[0]
+
+    def _evict(self):
+        # size 초과 시 가장 오래 안 쓴 entry부터 삭제 (LRU)
+        total = self.total_bytes()
+        if total <= self.max_bytes:
+            return
+        for key, digest, size in self.db.execute(
+            "SELECT key, digest, size FROM entries ORDER BY atime"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self.db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            still_used = self.db.execute(
+                "SELECT 1 FROM entries WHERE digest = ? LIMIT 1", (digest,)
+            ).fetchone()
+            if not still_used:
+                try:
+                    os.remove(self._path(digest))
+                except OSError:
+                    pass
+                total -= size
+            self.stats["evictions"] += 1
+        self.db.commit()
+
+    def summary(self):
+        with self.lock:
+            n = self.db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            return dict(self.stats, entries=n, bytes=self.total_bytes(), max_bytes=self.max_bytes)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Shared cache, or None when CACHE_DIR is empty (disabled)."""
+    global _cache
+    if not CACHE_DIR:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache(CACHE_DIR)
+        return _cache
+
+
+def seed_from_tree(cache, base_dir):
+    # 기존 output_*_by_tier 의 match / timeline 파일을 cache에 채워 넣는다
+    n = 0
+    for _, tier_dir in tier_dirs(base_dir):
+        store = open_store(tier_dir)
+        for kind, tail in (("matches", ""), ("timelines", "/timeline")):
+            for mid, raw in store.scan(kind):
+                key = f"/lol/match/v5/matches/{mid}{tail}"
+                if not CACHEABLE.match(key):
+                    continue
+                cache.put(key, raw)
+                n += 1
+        store.close()
+    return n
+
+
+if __name__ == "__main__":
+    cache = get_cache()
+    if cache is None:
+        raise SystemExit("CACHE_DIR is empty; response cache disabled.")
+    if len(sys.argv) >= 3 and sys.argv[1] == "seed":
+        for d in sys.argv[2:]:
+            print(f"[CACHE] seeded {seed_from_tree(cache, d)} responses from {d}")
+    print(f"[CACHE] {cache.summary()}")
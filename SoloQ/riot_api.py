@@ -1,22 +1,30 @@
-import time
-from config import PLATFORM, REGIONAL, QUEUE_ID, REQ_SLEEP
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from config import PLATFORM, REGIONAL, QUEUE_ID, MAX_IN_FLIGHT, api_host
 from http_client import get_json
 
 def get_account_by_puuid(puuid):
-    url = f"https://{REGIONAL}.api.riotgames.com/riot/account/v1/accounts/by-puuid/{puuid}"
+    url = f"{api_host(REGIONAL)}/riot/account/v1/accounts/by-puuid/{puuid}"
     return get_json(url)
 
 def get_summoner_min_by_puuid(puuid):
-    url = f"https://{PLATFORM}.api.riotgames.com/lol/summoner/v4/summoners/by-puuid/{puuid}"
+    url = f"{api_host(PLATFORM)}/lol/summoner/v4/summoners/by-puuid/{puuid}"
     return get_json(url)
 
-def get_all_match_ids(puuid, queue=QUEUE_ID, page_size=100, max_pages=None):
+def get_match_ids_page(puuid, start=0, count=100, queue=QUEUE_ID, start_time=None, end_time=None):
+    # start_time / end_time: epoch seconds (patches.patch_window)
+    params = {"queue": queue, "start": start, "count": count}
+    if start_time is not None:
+        params["startTime"] = start_time
+    if end_time is not None:
+        params["endTime"] = end_time
+    url = f"{api_host(REGIONAL)}/lol/match/v5/matches/by-puuid/{puuid}/ids"
+    return get_json(url, params=params) or []
+
+def get_all_match_ids(puuid, queue=QUEUE_ID, page_size=100, max_pages=None, start_time=None, end_time=None):
     ids, start, pages = [], 0, 0
     while True:
-        params = {"queue": queue, "start": start, "count": page_size}
-        url = f"https://{REGIONAL}.api.riotgames.com/lol/match/v5/matches/by-puuid/{puuid}/ids"
-        chunk = get_json(url, params=params) or []
-        time.sleep(REQ_SLEEP)
+        chunk = get_match_ids_page(puuid, start, page_size, queue, start_time, end_time)
         if not chunk:
             break
         ids.extend(chunk)
@@ -32,9 +40,32 @@ def get_all_match_ids(puuid, queue=QUEUE_ID, page_size=100, max_pages=None):
     return dedup
 
 def get_match(mid):
-    url = f"https://{REGIONAL}.api.riotgames.com/lol/match/v5/matches/{mid}"
+    url = f"{api_host(REGIONAL)}/lol/match/v5/matches/{mid}"
     return get_json(url)
 
 def get_timeline(mid):
-    url = f"https://{REGIONAL}.api.riotgames.com/lol/match/v5/matches/{mid}/timeline"
+    url = f"{api_host(REGIONAL)}/lol/match/v5/matches/{mid}/timeline"
     return get_json(url)
+
+async def _fetch_all(fn, ids, max_in_flight):
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+        async def one(i):
+            try:
+                return i, await loop.run_in_executor(pool, fn, i)
+            except Exception as e:
+                return i, e
+        return await asyncio.gather(*(one(i) for i in ids))
+
+def fetch_many(fn, ids, max_in_flight=MAX_IN_FLIGHT):
+    # fn(id)를 동시에 최대 max_in_flight개 실행; 속도 제한은 get_json의 token bucket이 담당
+    # 입력 순서대로 (id, 결과 또는 Exception) 리스트를 돌려준다
+    if not ids:
+        return []
+    return asyncio.run(_fetch_all(fn, ids, max_in_flight))
+
+def get_matches(mids, max_in_flight=MAX_IN_FLIGHT):
+    return fetch_many(get_match, mids, max_in_flight)
+
+def get_timelines(mids, max_in_flight=MAX_IN_FLIGHT):
+    return fetch_many(get_timeline, mids, max_in_flight)
@@ -0,0 +1,264 @@
+# SoloQ/stub_server.py
+# Offline stand-in for the Riot API, serving recorded JSON from an output_*_by_tier tree.
+#
+#   python stub_server.py --root output_15.24_by_tier --port 8765 --throttle-every 25
+#   RIOT_API_KEY=stub RIOT_API_BASE="http://127.0.0.1:8765/{route}" python acquire.py
+#
+# GET /_stub/throttle?count=N&retry_after=S  -> the next N API requests answer 429
+# GET /_stub/stats                           -> request / 429 counters
+#
+# --app-limit / --method-limit ("20:1,100:120") enforce fixed windows like the real API and
+# send X-App-Rate-Limit(-Count) / X-Method-Rate-Limit(-Count) on every response.
+# Responses are HTTP/1.1 keep-alive, gzip when asked; --cert/--key serve HTTPS.
+import os, re, ssl, gzip, json, math, time, argparse, threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+from raw_store import open_store
+
+
+def index_tree(root):
+    matches, timelines, entries = {}, {}, {}
+    for tier in sorted(os.listdir(root)):
+        tier_dir = os.path.join(root, tier)
+        if not os.path.isdir(tier_dir):
+            continue
+        snap = os.path.join(tier_dir, "league_entry_snapshot.json")
+        if os.path.exists(snap):
+            entries[tier] = snap
+        store = open_store(tier_dir)
+        for kind, out in (("matches", matches), ("timelines", timelines)):
+            for mid in store.ids(kind):
+                out.setdefault(mid, (store, kind))
+    return matches, timelines, entries
+
+
+def parse_limits(spec):
+    return [tuple(int(x) for x in pair.split(":")) for pair in spec.split(",")] if spec else []
+
+
+class FixedWindows:
+    """Riot-style fixed windows: count per window, reset when the window expires."""
+
+    def __init__(self, limits):
+        self.limits = limits
+        self.windows = {sec: [0.0, 0] for _, sec in limits}
+
+    def hit(self, now):
+        # returns seconds until the exceeded window resets, or 0 if allowed
+        retry = 0
+        for n, sec in self.limits:
+            w = self.windows[sec]
+            if now - w[0] >= sec:
+                w[0], w[1] = now, 0
+            w[1] += 1
+            if w[1] > n:
+                retry = max(retry, math.ceil(w[0] + sec - now))
+        return retry
+
+    def headers(self, prefix):
+        if not self.limits:
+            return []
+        limit = ",".join(f"{n}:{sec}" for n, sec in self.limits)
+        count = ",".join(f"{self.windows[sec][1]}:{sec}" for _, sec in self.limits)
+        return [(f"X-{prefix}-Rate-Limit", limit), (f"X-{prefix}-Rate-Limit-Count", count)]
+
+
+class StubRiotServer:
+    def __init__(self, root, port=8765, throttle_every=0, retry_after=1, app_limits=(), method_limits=(),
+                 certfile=None, keyfile=None):
+        self.matches, self.timelines, self.entries = index_tree(root)
+        self.created = {}
+        self.throttle_every = throttle_every
+        self.retry_after = retry_after
+        self.pending_429 = 0
+        self.app = {}
+        self.methods = {}
+        self.app_limits = list(app_limits)
+        self.method_limits = list(method_limits)
+        self.stats = {"requests": 0, "throttled": 0}
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self.httpd.daemon_threads = True
+        self.scheme = "http"
+        if certfile:
+            ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            ctx.load_cert_chain(certfile, keyfile)
+            self.httpd.socket = ctx.wrap_socket(self.httpd.socket, server_side=True)
+            self.scheme = "https"
+        self.port = self.httpd.server_address[1]
+
+    @property
+    def base(self):
+        return f"{self.scheme}://127.0.0.1:{self.port}/{{route}}"
+
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def should_throttle(self):
+        with self.lock:
+            self.stats["requests"] += 1
+            n = self.stats["requests"]
+            if self.pending_429 > 0:
+                self.pending_429 -= 1
+            elif not (self.throttle_every and n % self.throttle_every == 0):
+                return False
+            self.stats["throttled"] += 1
+            return True
+
+    def limit(self, path):
+        # returns (retry_after, limit type, rate-limit headers)
+        route = path.split("/")[1] if path.count("/") >= 2 else ""
+        method = re.sub(r"/(by-puuid|matches)/[^/]+", r"/\1/*", path)
+        method = re.sub(r"/entries/RANKED_SOLO_5x5/.*", "/entries/RANKED_SOLO_5x5/*", method)
+        with self.lock:
+            app = self.app.setdefault(route, FixedWindows(self.app_limits))
+            meth = self.methods.setdefault(method, FixedWindows(self.method_limits))
+            now = time.monotonic()
+            app_retry, meth_retry = app.hit(now), meth.hit(now)
+            headers = app.headers("App") + meth.headers("Method")
+            if app_retry:
+                self.stats["throttled"] += 1
+                return app_retry, "application", headers
+            if meth_retry:
+                self.stats["throttled"] += 1
+                return meth_retry, "method", headers
+            return 0, None, headers
+
+    def created_at(self, mid):
+        # epoch seconds of gameCreation, cached per match
+        if mid not in self.created:
+            store, kind = self.matches[mid]
+            self.created[mid] = store.load(kind, mid).get("info", {}).get("gameCreation", 0) // 1000
+        return self.created[mid]
+
+    def raw(self, index, mid):
+        # recorded response bytes (files or archive), None if unknown
+        if mid not in index:
+            return None
+        store, kind = index[mid]
+        return store.read(kind, mid)
+
+    def route(self, path, query):
+        # path: /{route}/lol/... or /{route}/riot/...
+        api = path.split("/", 2)[-1] if path.count("/") >= 2 else ""
+        m = re.fullmatch(r"lol/match/v5/matches/by-puuid/[^/]+/ids", api)
+        if m:
+            ids = sorted(self.matches, reverse=True)
+            if "startTime" in query or "endTime" in query:
+                lo = int(query.get("startTime", ["0"])[0])
+                hi = int(query.get("endTime", [str(2 ** 40)])[0])
+                ids = [i for i in ids if lo <= self.created_at(i) <= hi]
+            start = int(query.get("start", ["0"])[0])
+            count = int(query.get("count", ["20"])[0])
+            return ids[start:start + count]
+        m = re.fullmatch(r"lol/match/v5/matches/([^/]+)/timeline", api)
+        if m:
+            return self.raw(self.timelines, m.group(1))
+        m = re.fullmatch(r"lol/match/v5/matches/([^/]+)", api)
+        if m:
+            return self.raw(self.matches, m.group(1))
+        m = re.fullmatch(r"riot/account/v1/accounts/by-puuid/([^/]+)", api)
+        if m:
+            return {"puuid": m.group(1), "gameName": "stub", "tagLine": "KR1"}
+        m = re.fullmatch(r"lol/summoner/v4/summoners/by-puuid/([^/]+)", api)
+        if m:
+            return {"puuid": m.group(1)}
+        m = re.fullmatch(r"lol/league/v4/entries/RANKED_SOLO_5x5/([A-Z]+)/[IV]+", api)
+        if m:
+            snap = self.entries.get(m.group(1))
+            if not snap or query.get("page", ["1"])[0] != "1":
+                return []
+            with open(snap, "r", encoding="utf-8") as f:
+                return [json.load(f)]
+        m = re.fullmatch(r"lol/league/v4/([a-z]+)leagues/by-queue/RANKED_SOLO_5x5", api)
+        if m:
+            snap = self.entries.get(m.group(1).upper())
+            if not snap:
+                return {"entries": []}
+            with open(snap, "r", encoding="utf-8") as f:
+                return {"entries": [json.load(f)]}
+        return None
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def send_json(self, code, body, headers=()):
+                raw = body if isinstance(body, bytes) else json.dumps(body).encode("utf-8")
+                self.send_response(code)
+                if "gzip" in self.headers.get("Accept-Encoding", ""):
+                    raw = gzip.compress(raw, compresslevel=1)
+                    self.send_header("Content-Encoding", "gzip")
+                self.send_header("Content-Type", "application/json;charset=utf-8")
+                self.send_header("Content-Length", str(len(raw)))
+                for k, v in headers:
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(raw)
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                query = parse_qs(parts.query)
+
+                if parts.path == "/_stub/throttle":
+                    with server.lock:
+                        server.pending_429 += int(query.get("count", ["1"])[0])
+                        if "retry_after" in query:
+                            server.retry_after = int(query["retry_after"][0])
+                    return self.send_json(200, {"pending_429": server.pending_429})
+                if parts.path == "/_stub/stats":
+                    return self.send_json(200, server.stats)
+
+                if server.should_throttle():
+                    return self.send_json(
+                        429,
+                        {"status": {"message": "Rate limit exceeded", "status_code": 429}},
+                        [("Retry-After", str(server.retry_after))],
+                    )
+                retry, kind, headers = server.limit(parts.path)
+                if retry:
+                    return self.send_json(
+                        429,
+                        {"status": {"message": "Rate limit exceeded", "status_code": 429}},
+                        headers + [("Retry-After", str(retry)), ("X-Rate-Limit-Type", kind)],
+                    )
+
+                body = server.route(parts.path, query)
+                if body is None:
+                    return self.send_json(404, {"status": {"message": "Data not found", "status_code": 404}}, headers)
+                self.send_json(200, body, headers)
+
+        return Handler
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--root", default="output_15.24_by_tier")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--throttle-every", type=int, default=0, help="answer every Nth request with 429")
+    ap.add_argument("--retry-after", type=int, default=1)
+    ap.add_argument("--app-limit", default="", help='e.g. "20:1,100:120"')
+    ap.add_argument("--method-limit", default="", help='e.g. "2000:10"')
+    ap.add_argument("--cert", default=None, help="PEM certificate to serve HTTPS")
+    ap.add_argument("--key", default=None)
+    args = ap.parse_args()
+
+    srv = StubRiotServer(
+        args.root, args.port, args.throttle_every, args.retry_after,
+        app_limits=parse_limits(args.app_limit), method_limits=parse_limits(args.method_limit),
+        certfile=args.cert, keyfile=args.key,
+    )
+    print(f"[STUB] {len(srv.matches)} matches / {len(srv.timelines)} timelines from {args.root}")
+    print(f"[STUB] RIOT_API_BASE={srv.base}")
+    srv.httpd.serve_forever()
@@ -0,0 +1,83 @@
+# SoloQ/tableio.py
+# Typed Parquet intermediates for parse -> clean -> unified (CSV is export-only).
+#
+#   save_table(df, "data/soloq_clean_15.24", SCHEMA)   -> data/soloq_clean_15.24.parquet
+#                                                         (+ .csv with EXPORT_CSV=1 or csv=True)
+#   load_table("data/soloq_clean_15.24")               -> the Parquet file, else the CSV
+#
+# A schema maps column -> dtype ("category", "float32", "int64", "Int64", "bool", ...); columns
+# not in the schema keep the dtype they have. Without pyarrow everything stays CSV.
+import os
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow.parquet as pq
+    HAS_ARROW = True
+except Exception:
+    HAS_ARROW = False
+
+EXPORT_CSV = os.getenv("EXPORT_CSV", "0") == "1"
+EXTENSIONS = (".parquet", ".csv")
+
+
+def stem_of(path):
+    for ext in EXTENSIONS:
+        if path.endswith(ext):
+            return path[:-len(ext)]
+    return path
+
+
+def apply_schema(df, schema):
+    casts = {c: t for c, t in (schema or {}).items() if c in df.columns and str(df[c].dtype) != t}
+    return df.astype(casts) if casts else df
+
+
+def map_categorical(values, fn):
+    """fn(value) once per distinct value (missing included), broadcast back as a Categorical.
+
+    Categories are the distinct non-missing results, sorted (as astype("category") would give).
+    """
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    mapped = [fn(u) for u in uniques]
+    cats = pd.Index([m for m in dict.fromkeys(mapped) if not pd.isna(m)]).sort_values()
+    lookup = cats.get_indexer(mapped) if mapped else np.zeros(0, dtype=np.intp)
+    return pd.Series(pd.Categorical.from_codes(lookup[codes], categories=cats), index=values.index, name=values.name)
+
+
+def table_exists(path):
+    stem = stem_of(path)
+    return any(os.path.exists(stem + ext) for ext in EXTENSIONS)
+
+
+def save_table(df, path, schema=None, csv=None, encoding="utf-8"):
+    """Write <stem>.parquet (typed by schema) and, if asked, a <stem>.csv export. Returns the paths."""
+    stem = stem_of(path)
+    df = apply_schema(df, schema)
+    csv = EXPORT_CSV if csv is None else csv
+    out = []
+    if HAS_ARROW:
+        df.to_parquet(stem + ".parquet", index=False, compression="zstd")
+        out.append(stem + ".parquet")
+    elif os.path.exists(stem + ".parquet"):
+        os.remove(stem + ".parquet")  # 예전 parquet이 새 CSV보다 먼저 읽히지 않도록
+    if csv or not HAS_ARROW:
+        df.to_csv(stem + ".csv", index=False, encoding=encoding)
+        out.append(stem + ".csv")
+    return out
+
+
+def load_table(path, columns=None, schema=None, csv_dtype=None):
+    """Parquet if present (and pyarrow installed), else CSV; columns: keep only these (file order)."""
+    stem = stem_of(path)
+    if HAS_ARROW and os.path.exists(stem + ".parquet"):
+        names = pq.read_schema(stem + ".parquet").names
+        if columns is not None:
+            wanted = set(columns)
+            names = [c for c in names if c in wanted]
+        df = pd.read_parquet(stem + ".parquet", columns=names)
+    else:
+        wanted = set(columns) if columns is not None else None
+        df = pd.read_csv(stem + ".csv", usecols=(lambda c: c in wanted) if wanted is not None else None,
+                         dtype=csv_dtype)
+    return apply_schema(df, schema)
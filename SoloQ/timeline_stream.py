@@ -0,0 +1,71 @@
+# SoloQ/timeline_stream.py
+# Partial timeline reader: participantFrames at given timestamps without decoding the whole file.
+#
+# match-v5 timeline frames are {"events": [...], "participantFrames": {...}, "timestamp": N}.
+# The reader jumps from one "participantFrames" key to the next with bytes.find (the events
+# arrays are skipped, never decoded), decodes only the participantFrames object, and stops at
+# the first frame whose timestamp reaches the last target. Works on bytes or an mmap, so for a
+# plain .json file the pages after the target frame are never read.
+import re
+from jsonio import loads
+
+_FRAMES = re.compile(rb'"frames"\s*:\s*\[')
+_PFRAMES = b'"participantFrames"'
+_PF_VALUE = re.compile(rb'\s*:\s*\{')
+# participantFrames 바로 뒤에 frame의 timestamp가 오고 frame이 닫힌다
+_PF_END = re.compile(rb'\}\s*,\s*"timestamp"\s*:\s*(-?\d+)\s*\}')
+
+
+def pick_frames(frames, targets_ms):
+    """{target: first frame with timestamp >= target, else the last frame}; {} if no frames."""
+    if not frames:
+        return {}
+    out = {}
+    for target in targets_ms:
+        out[target] = next((fr for fr in frames if fr.get("timestamp", 0) >= target), frames[-1])
+    return out
+
+
+def _scan(buf, targets):
+    m = _FRAMES.search(buf)
+    if m is None:
+        return None
+    pos = m.end()
+    frames, out = [], {}
+    pending = sorted(targets)
+    while pending:
+        i = buf.find(_PFRAMES, pos)
+        if i < 0:
+            break
+        v = _PF_VALUE.match(buf, i + len(_PFRAMES))
+        e = _PF_END.search(buf, v.end() - 1) if v else None
+        if e is None:
+            return None
+        chunk = buf[v.end() - 1:e.start() + 1]
+        if b'"events"' in chunk:
+            return None  # 예상과 다른 key 순서 -> 전체 decode
+        try:
+            pframes = loads(chunk)
+        except ValueError:
+            return None  # events 안의 같은 이름 key 등 -> 전체 decode
+        frame = {"participantFrames": pframes, "timestamp": int(e.group(1))}
+        frames.append(frame)
+        while pending and frame["timestamp"] >= pending[0]:
+            out[pending.pop(0)] = frame
+        pos = e.end()
+    for target in pending:
+        if frames:
+            out[target] = frames[-1]
+    return out
+
+
+def frames_at(buf, targets_ms):
+    """participantFrames at each target timestamp (ms) of a raw timeline, like pick_frames.
+
+    buf is the timeline JSON as bytes / bytearray / mmap. Falls back to a full decode
+    when the layout is not the expected match-v5 one.
+    """
+    out = _scan(buf, targets_ms)
+    if out is None:
+        out = pick_frames(loads(buf).get("info", {}).get("frames", []), targets_ms)
+    return out
@@ -1,9 +1,182 @@
-import os, json
+# SoloQ/utils.py
+# Raw JSON storage: plain (indent=2, the original format) or compact JSON compressed with gzip / zstd.
+#
+#   python utils.py migrate output_15.24_by_tier --storage zstd
+#   python utils.py du output_15.24_by_tier ../backup
+import os, json, gzip, mmap, argparse, contextlib
+from jsonio import loads, load_file
 
-def safe_write(path, obj):
+try:
+    import zstandard as zstd
+    HAS_ZSTD = True
+except Exception:
+    HAS_ZSTD = False
+
+STORAGE_SUFFIX = {"json": ".json", "gzip": ".json.gz", "zstd": ".json.zst"}
+# RAW_STORAGE가 적용되는 폴더 (snapshot / account 같은 작은 파일은 항상 plain JSON)
+RAW_SUBDIRS = ("matches", "timelines")
+
+
+def raw_base(path):
+    # "x.json.zst" / "x.json.gz" / "x.json" -> "x.json"
+    for suffix in (".gz", ".zst"):
+        if path.endswith(".json" + suffix):
+            return path[: -len(suffix)]
+    return path
+
+
+def storage_of(path):
+    for storage, suffix in STORAGE_SUFFIX.items():
+        if storage != "json" and path.endswith(suffix):
+            return storage
+    return "json"
+
+
+def raw_variants(path):
+    base = raw_base(path)
+    if not base.endswith(".json"):
+        return [path]
+    return [base[:-5] + suffix for suffix in STORAGE_SUFFIX.values()]
+
+
+def encode_json(obj, storage="json"):
+    if storage == "json":
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+    raw = json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    if storage == "gzip":
+        return gzip.compress(raw, compresslevel=6)
+    if storage == "zstd":
+        if not HAS_ZSTD:
+            raise RuntimeError("RAW_STORAGE=zstd needs the zstandard package (pip install zstandard)")
+        return zstd.ZstdCompressor(level=10).compress(raw)
+    raise ValueError(f"unknown storage {storage!r} (expected one of {sorted(STORAGE_SUFFIX)})")
+
+
+def decode_bytes(data, storage):
+    if storage == "gzip":
+        return gzip.decompress(data)
+    if storage == "zstd":
+        if not HAS_ZSTD:
+            raise RuntimeError("reading .json.zst files needs the zstandard package (pip install zstandard)")
+        return zstd.ZstdDecompressor().decompress(data)
+    return data
+
+
+def find_raw(path):
+    """The file actually on disk for `path` in any storage, or None."""
+    for p in raw_variants(path):
+        if os.path.exists(p) and os.path.getsize(p) > 0:
+            return p
+    return None
+
+
+def read_raw(path):
+    # 압축 여부와 상관없이 JSON bytes를 돌려준다
+    found = find_raw(path)
+    if found is None:
+        raise FileNotFoundError(path)
+    with open(found, "rb") as f:
+        return decode_bytes(f.read(), storage_of(found))
+
+
+@contextlib.contextmanager
+def map_raw(path):
+    # plain .json은 mmap (필요한 부분만 읽힌다), 압축 파일은 풀어서 bytes로
+    found = find_raw(path)
+    if found is None:
+        raise FileNotFoundError(path)
+    if storage_of(found) != "json":
+        yield read_raw(found)
+        return
+    with open(found, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+        yield m
+
+
+def load_json(path):
+    found = find_raw(path)
+    if found is not None and storage_of(found) == "json":
+        return load_file(found)
+    return loads(read_raw(path))
+
+
+def iter_raw(dir_path):
+    """(name, path) for every raw JSON file in dir_path, name without the .json* suffix."""
+    seen = set()
+    for fn in sorted(os.listdir(dir_path)):
+        base = raw_base(fn)
+        if not base.endswith(".json") or base in seen:
+            continue
+        seen.add(base)
+        yield base[:-5], os.path.join(dir_path, fn)
+
+
+def safe_write(path, obj, storage="json"):
+    base = raw_base(path)
+    if base.endswith(".json"):
+        path = base[:-5] + STORAGE_SUFFIX[storage]
     os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(obj, f, ensure_ascii=False, indent=2)
+    data = encode_json(obj, storage)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    # 다른 storage로 남아 있던 같은 파일은 지워서 한 벌만 남긴다
+    for other in raw_variants(path):
+        if other != path and os.path.exists(other):
+            os.remove(other)
+    return path
+
 
 def file_exists(path):
-    return os.path.exists(path) and os.path.getsize(path) > 0
+    return find_raw(path) is not None
+
+
+def walk_raw(base_dir):
+    # output_*_by_tier 아래 matches / timelines 의 raw 파일
+    for root, _, _ in os.walk(base_dir):
+        if os.path.basename(root) not in RAW_SUBDIRS:
+            continue
+        for _, path in iter_raw(root):
+            yield path
+
+
+def migrate_tree(base_dir, storage):
+    # 기존 tree를 다른 storage로 다시 쓴다 (json -> zstd, zstd -> json 모두 가능)
+    before = after = n = 0
+    for path in list(walk_raw(base_dir)):
+        if storage_of(path) == storage:
+            continue
+        before += os.path.getsize(path)
+        new_path = safe_write(path, load_json(path), storage)
+        after += os.path.getsize(new_path)
+        n += 1
+    return n, before, after
+
+
+def tree_usage(base_dir):
+    usage = {}
+    for path in walk_raw(base_dir):
+        st = usage.setdefault(storage_of(path), [0, 0])
+        st[0] += 1
+        st[1] += os.path.getsize(path)
+    return usage
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("migrate", help="rewrite raw JSON trees in another storage")
+    p.add_argument("dirs", nargs="+")
+    p.add_argument("--storage", choices=sorted(STORAGE_SUFFIX), default="zstd")
+    p = sub.add_parser("du", help="files / bytes per storage")
+    p.add_argument("dirs", nargs="+")
+    args = ap.parse_args()
+
+    for d in args.dirs:
+        if args.cmd == "migrate":
+            n, before, after = migrate_tree(d, args.storage)
+            ratio = before / after if after else 0.0
+            print(f"[STORAGE] {d}: {n} files -> {args.storage}, {before / 1e6:.1f} MB -> {after / 1e6:.1f} MB ({ratio:.2f}x)")
+        else:
+            for storage, (n, size) in sorted(tree_usage(d).items()):
+                print(f"[STORAGE] {d}: {storage:<5} {n:6d} files {size / 1e6:9.1f} MB")
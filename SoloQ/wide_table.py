@@ -0,0 +1,286 @@
+# SoloQ/wide_table.py
+# Columnar builder for the wide participant table (parse.build_dataframe).
+#
+# Rows are appended straight into one buffer per column instead of being kept as a list of
+# dicts for pandas to reconcile. int / float / bool columns live in typed array.array buffers
+# (8 or 1 byte per value) with a small mask for missing keys and explicit None; a column that
+# turns out to hold anything else falls back to a plain list. dtypes come out the same as
+# pd.DataFrame(list_of_dicts): int + missing -> float64, bool + missing -> object, etc.
+#
+# A schema file (column -> final kind from an earlier run) lets columns that ended up mixed
+# start as lists instead of being converted half-way through.
+#
+# What it saves over pd.DataFrame(list_of_dicts) is the per-row dict held until the end (15.24
+# tree: build_dataframe peak 41 MB -> 22 MB; bench.py table x10: 289 MB -> 112 MB); the frame is
+# the same, column order included (tests/test_wide_table.py).
+import json
+from array import array
+import numpy as np
+import pandas as pd
+
+# mask values
+PRESENT, MISSING, NONE, WAS_INT = 0, 1, 2, 3
+TYPECODE = {"int": "q", "float": "d", "bool": "b"}
+PYTYPE = {"int": int, "float": float, "bool": bool}
+
+
+class _Missing:
+    pass
+
+
+_MISSING = _Missing()  # batch 안에서 key가 없는 자리
+
+
+def value_kind(v):
+    t = type(v)
+    if t is bool:
+        return "bool"
+    if t is int:
+        return "int"
+    if t is float:
+        return "float"
+    return "obj"
+
+
+class _Column:
+    __slots__ = ("kind", "buf", "mask", "holes")
+
+    def __init__(self, kind, n_missing):
+        self.kind = kind
+        self.holes = n_missing > 0
+        if kind == "list":
+            self.buf = [np.nan] * n_missing
+            self.mask = None
+        else:
+            self.buf = array(TYPECODE[kind], bytes(array(TYPECODE[kind]).itemsize * n_missing))
+            self.mask = bytearray([MISSING]) * n_missing
+
+    def values(self):
+        # python values as pd.DataFrame(list_of_dicts) would have seen them
+        if self.kind == "list":
+            return list(self.buf)
+        out = []
+        for v, m in zip(self.buf, self.mask):
+            if m == PRESENT:
+                out.append(bool(v) if self.kind == "bool" else v)
+            elif m == WAS_INT:
+                out.append(int(v))
+            else:
+                out.append(np.nan if m == MISSING else None)
+        return out
+
+    def to_list(self):
+        self.buf, self.mask, self.kind = self.values(), None, "list"
+
+    def to_float(self):
+        ints = self.kind == "int"
+        self.buf = array("d", self.buf)
+        if ints:
+            self.mask = bytearray(WAS_INT if m == PRESENT else m for m in self.mask)
+        self.kind = "float"
+
+    def append(self, v, vk):
+        if self.kind == "list":
+            self.buf.append(v)
+            return
+        if vk == "int" and not -2**63 <= v < 2**63:
+            # int64 밖의 값은 pandas가 uint64 / object로 정한다
+            self.to_list()
+            self.buf.append(v)
+        elif vk == self.kind or (self.kind == "float" and vk == "int"):
+            self.buf.append(v)
+            self.mask.append(WAS_INT if (self.kind == "float" and vk == "int") else PRESENT)
+        elif v is None and self.kind != "bool":
+            self.buf.append(0)
+            self.mask.append(NONE)
+            self.holes = True
+        elif self.kind == "int" and vk == "float":
+            self.to_float()
+            self.append(v, vk)
+        else:
+            self.to_list()
+            self.buf.append(v)
+
+    def items(self):
+        # (value, missing key?) 순서대로
+        if self.kind == "list":
+            return ((v, False) for v in self.buf)
+        vals = self.values()
+        return ((v, m == MISSING) for v, m in zip(vals, self.mask))
+
+    def extend(self, other):
+        if other.kind == self.kind:
+            self.buf.extend(other.buf)
+            if self.mask is not None:
+                self.mask.extend(other.mask)
+            self.holes = self.holes or other.holes
+            return
+        for v, missing in other.items():
+            if missing:
+                self.pad()
+            else:
+                self.append(v, value_kind(v))
+
+    def put_many(self, vals):
+        types = set(map(type, vals))
+        if self.kind == "list":
+            if _Missing in types:
+                vals = [np.nan if v is _MISSING else v for v in vals]
+            self.buf.extend(vals)
+            return
+        holes = _Missing in types
+        types.discard(_Missing)
+        if self.kind == "int" and types == {int, float}:
+            self.to_float()
+        if types <= ({int, float} if self.kind == "float" else {PYTYPE[self.kind]}):
+            ints = () if int not in types else vals if types == {int} and not holes else \
+                [v for v in vals if type(v) is int]
+            if not ints or (-2**63 <= min(ints) and max(ints) < 2**63):
+                if holes or (self.kind == "float" and ints):
+                    mark = WAS_INT if self.kind == "float" else PRESENT
+                    self.buf.extend([0 if v is _MISSING else v for v in vals])
+                    self.mask.extend(bytes([MISSING if v is _MISSING else mark if type(v) is int else PRESENT
+                                            for v in vals]))
+                    self.holes = self.holes or holes
+                else:
+                    self.buf.extend(vals)
+                    self.mask.extend(bytes(len(vals)))
+                return
+        for v in vals:
+            if v is _MISSING:
+                self.pad()
+            else:
+                self.append(v, value_kind(v))
+
+    def pad(self):
+        # 이번 row에 없는 key
+        if self.kind == "list":
+            self.buf.append(np.nan)
+        else:
+            self.buf.append(0)
+            self.mask.append(MISSING)
+            self.holes = True
+
+    def finish(self):
+        if self.kind == "list":
+            return np.array(self.buf, dtype=object)
+        if not self.holes:
+            arr = np.frombuffer(self.buf, dtype={"q": np.int64, "d": np.float64, "b": np.int8}[self.buf.typecode])
+            return arr.astype(bool) if self.kind == "bool" else arr
+        if self.kind == "bool":
+            return np.array(self.values(), dtype=object)
+        arr = np.array(self.buf, dtype=np.float64)
+        mask = np.frombuffer(bytes(self.mask), dtype=np.uint8)
+        arr[(mask == MISSING) | (mask == NONE)] = np.nan
+        return arr
+
+
+class WideTable:
+    """Append dict rows, get the same DataFrame as pd.DataFrame(rows).
+
+    Rows are held back in batches of `batch` and written column by column, so the
+    common case (same keys, one type per column) is a C-level array.extend.
+    """
+
+    def __init__(self, schema=None, batch=512):
+        self.n = 0
+        self.cols = {}
+        self.schema = dict(schema or {})
+        self.batch = batch
+        self.pending = []
+        self.layouts = {}  # row key 순서 -> 컬럼 위치 (컬럼 위치는 바뀌지 않는다)
+
+    def __getstate__(self):
+        # worker -> 부모로 보낼 때 layout cache는 뺀다
+        return dict(self.__dict__, layouts={})
+
+    def append(self, row):
+        self.pending.append(row)
+        if len(self.pending) >= self.batch:
+            self.flush()
+
+    def extend(self, rows):
+        self.pending.extend(rows)
+        if len(self.pending) >= self.batch:
+            self.flush()
+
+    def flush(self):
+        rows, self.pending = self.pending, []
+        if not rows:
+            return
+        cols, n = self.cols, self.n
+        # 새 key는 batch 안에서 처음 나온 순서대로 뒤에 붙는다.
+        # 같은 key 순서의 row는 한 번만 살펴보고 같은 위치 배열을 쓴다.
+        layouts = self.layouts
+        if len(layouts) > 4096:
+            layouts.clear()
+        keys = [tuple(r) for r in rows]
+        new, fresh = {}, {}
+        for key in keys:
+            if key not in layouts and key not in fresh:
+                fresh[key] = None
+                for k in key:
+                    if k not in cols and k not in new:
+                        new[k] = None
+        for k in new:
+            # schema에서 섞인 값(list)으로 끝났던 컬럼은 처음부터 list로 (중간 변환 생략)
+            v = next(r[k] for r in rows if k in r)
+            kind = "list" if self.schema.get(k) == "list" else value_kind(v)
+            cols[k] = _Column(kind if kind in TYPECODE else "list", n)
+        pos = {k: i for i, k in enumerate(cols)}
+        for key in fresh:
+            layouts[key] = np.fromiter((pos[k] for k in key), dtype=np.intp, count=len(key))
+
+        # row 순서대로 (batch x 컬럼) 격자에 채운 뒤 컬럼 단위로 꺼낸다
+        grid = np.full((len(rows), len(cols)), _MISSING, dtype=object)
+        for i, r in enumerate(rows):
+            grid[i, layouts[keys[i]]] = np.fromiter(r.values(), dtype=object, count=len(r))
+        for j, col in enumerate(cols.values()):
+            col.put_many(grid[:, j].tolist())
+        self.n = n + len(rows)
+
+    def merge(self, other):
+        """Append the rows of another WideTable (e.g. a worker's chunk)."""
+        self.flush()
+        other.flush()
+        n = self.n
+        for k, col in self.cols.items():
+            if k not in other.cols:
+                for _ in range(other.n):
+                    col.pad()
+        for k, oc in other.cols.items():
+            col = self.cols.get(k)
+            if col is None:
+                col = self.cols[k] = _Column(oc.kind, n)
+            col.extend(oc)
+        self.n = n + other.n
+
+    def kinds(self):
+        self.flush()
+        return {k: c.kind for k, c in self.cols.items()}
+
+    def frame(self):
+        self.flush()
+        if not self.cols:
+            return pd.DataFrame([{}] * self.n)
+        # object 컬럼은 pandas가 records 경로와 같은 방식으로 dtype을 추론하게 둔다
+        objs = {k: c.finish() for k, c in self.cols.items()}
+        typed = {k: v for k, v in objs.items() if v.dtype != object}
+        loose = [k for k, v in objs.items() if v.dtype == object]
+        inferred = pd.DataFrame.from_records([tuple(objs[k][i] for k in loose) for i in range(self.n)],
+                                             columns=loose) if loose else None
+        data = {k: (typed[k] if k in typed else inferred[k]) for k in self.cols}
+        return pd.DataFrame(data)
+
+
+def load_schema(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_schema(path, kinds):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(kinds, f, ensure_ascii=False, indent=1)
@@ -1,13 +1,22 @@
+import os
 import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.express as px
+import plotly.graph_objects as go
+
+from unified import STREAM_DIR, UNIFIED_COLUMNS, read_unified_dataset
+from metric_cube import (
+    ROWS_METRIC, box_stats, build_cube, cube_matches, cube_path, load_cube as read_cube, merge_cube, outlier_sample, with_mean_std,
+)
 
 st.set_page_config(
     page_title="LoL Unified Dashboard",
     layout="wide",
 )
 
+BOX_OUTLIERS = 300  # tier당 그리는 outlier 점 최대 개수 (대략)
+
 TIER_ORDER = [
     "IRON", "BRONZE", "SILVER", "GOLD", "PLATINUM",
     "EMERALD", "DIAMOND", "MASTER", "GRANDMASTER",
@@ -63,13 +72,71 @@ LINE_METRICS = [
 
 METRIC_OPTIONS = list(METRIC_LABEL.keys())
 
+# 파티션 dataset에서는 화면에 쓰는 컬럼만 읽는다
+APP_COLUMNS = [c for c in UNIFIED_COLUMNS if c in ("dataset_type", "tier", "patch", "role") or c in METRIC_LABEL]
+
+UNIFIED_PATH = "unified_pro_soloq_with_metrics.csv"
+
+
+def use_dataset(path: str) -> bool:
+    # unified.py --dataset / --stream 의 파티션 dataset이 단일 파일보다 새로우면 그쪽
+    if not os.path.isdir(STREAM_DIR):
+        return False
+    files = [p for p in (os.path.splitext(path)[0] + ".parquet", path) if os.path.exists(p)]
+    return not files or os.path.getmtime(STREAM_DIR) >= max(os.path.getmtime(p) for p in files)
+
 
 @st.cache_data
-def load_unified(path: str = "unified_pro_soloq_with_metrics.csv") -> pd.DataFrame:
+def load_file(path: str = UNIFIED_PATH) -> pd.DataFrame:
+    # unified.py가 같이 쓰는 typed Parquet이 있으면 그쪽을 읽는다
+    parquet_path = os.path.splitext(path)[0] + ".parquet"
+    if os.path.exists(parquet_path):
+        try:
+            return pd.read_parquet(parquet_path)
+        except ImportError:
+            pass
     df = pd.read_csv(path)
     return df
 
 
+@st.cache_data
+def load_roles(path: str = UNIFIED_PATH) -> list:
+    if use_dataset(path):
+        roles = read_unified_dataset(STREAM_DIR, columns=["role"])["role"]
+    else:
+        roles = load_file(path)["role"]
+    return sorted(roles.astype(str).fillna("UNKNOWN").unique().tolist())
+
+
+@st.cache_data
+def load_unified(path: str = UNIFIED_PATH, roles: tuple = None) -> pd.DataFrame:
+    # 파티션 dataset이면 role 필터 / 컬럼 선택을 읽을 때 적용 (해당 row group만 읽는다)
+    if use_dataset(path):
+        return read_unified_dataset(STREAM_DIR, roles=list(roles) if roles else None, columns=APP_COLUMNS)
+    df = load_file(path)
+    if roles:
+        df = df[df["role"].fillna("UNKNOWN").isin(roles)]
+    return df
+
+
+@st.cache_data
+def load_cube(path: str = UNIFIED_PATH):
+    # unified.py가 만든 metric cube. 지금 읽는 데이터와 함께 만든 cube가 아니면 쓰지 않는다 (None -> row에서 계산)
+    cpath = cube_path(path)
+    if not os.path.exists(cpath):
+        return None
+    if use_dataset(path):
+        source = STREAM_DIR
+    else:
+        source = next((p for p in (os.path.splitext(path)[0] + ".parquet", path) if os.path.exists(p)), None)
+    if source is None or not cube_matches(cpath, source):
+        return None
+    try:
+        return read_cube(cpath)
+    except ImportError:
+        return None
+
+
 def prepare_df(df: pd.DataFrame) -> pd.DataFrame:
     df = df.copy()
 
@@ -77,7 +144,8 @@ def prepare_df(df: pd.DataFrame) -> pd.DataFrame:
     df["tier"] = pd.Categorical(df["tier"], categories=TIER_ORDER, ordered=True)
 
     df["role"] = df["role"].fillna("UNKNOWN")
-    df["patch"] = df["patch"].astype(str)
+    if "patch" in df.columns:
+        df["patch"] = df["patch"].astype(str)
 
     if "lane_pressure_index" in df.columns:
         df["lane_pressure_index"] = df["lane_pressure_index"].astype(float).abs()
@@ -90,27 +158,32 @@ def ordered_tiers_in_df(df: pd.DataFrame):
     return [t for t in TIER_ORDER if t in present]
 
 
-df_raw = load_unified()
-df = prepare_df(df_raw)
+cube = load_cube()
+roles_available = sorted(cube["role"].unique().tolist()) if cube is not None else load_roles()
 
-if df.empty:
+if not roles_available:
     st.error("No data found in unified_pro_soloq_with_metrics.csv.")
     st.stop()
 
 st.sidebar.title("⚙️ Controls")
 
-roles_available = sorted(df["role"].dropna().unique().tolist())
 selected_roles = st.sidebar.multiselect(
     "Role select",
     roles_available,
     default=roles_available,
 )
 
-df_f = df.copy()
-if selected_roles:
-    df_f = df_f[df_f["role"].isin(selected_roles)]
+# cube가 있으면 차트는 전부 cube에서 그린다 (raw row는 cube가 없을 때만 읽는다)
+if cube is not None:
+    df_f = None
+    cube_f = cube[cube["role"].isin(selected_roles)] if selected_roles else cube
+    empty = cube_f.empty
+else:
+    df_f = prepare_df(load_unified(roles=tuple(selected_roles) if selected_roles else None))
+    cube_f = None
+    empty = df_f.empty
 
-if df_f.empty:
+if empty:
     st.warning("No data for the selected roles.")
     st.stop()
 
@@ -128,13 +201,18 @@ caption_parts = []
 caption_parts.append(f"Roles: {', '.join(selected_roles) if selected_roles else 'ALL'}")
 st.caption(" / ".join(caption_parts))
 
+if cube_f is not None:
+    rows = cube_f[cube_f["metric"] == ROWS_METRIC].groupby("dataset_type")["count"].sum()
+else:
+    rows = df_f["dataset_type"].value_counts()
+
 col1, col2, col3 = st.columns(3)
 with col1:
-    st.metric("Total Rows", len(df_f))
+    st.metric("Total Rows", int(rows.sum()))
 with col2:
-    st.metric("SoloQ Rows", int((df_f["dataset_type"] == "soloq").sum()))
+    st.metric("SoloQ Rows", int(rows.get("soloq", 0)))
 with col3:
-    st.metric("Pro Rows", int((df_f["dataset_type"] == "pro").sum()))
+    st.metric("Pro Rows", int(rows.get("pro", 0)))
 
 st.markdown("---")
 
@@ -161,13 +239,32 @@ def tier_agg_mean_std(df_in: pd.DataFrame, metric: str) -> pd.DataFrame:
     g = g.sort_values("tier")
     return g
 
+
+def tier_agg_from_cube(cube_in: pd.DataFrame, metric: str) -> pd.DataFrame:
+    # tier_agg_mean_std와 같은 결과를 cube cell의 count / sum / sumsq 합으로
+    cells = cube_in[(cube_in["metric"] == metric) & cube_in["tier"].isin(TIER_ORDER)]
+    if cells.empty:
+        return pd.DataFrame(columns=["tier", "mean", "std", "count"])
+
+    g = with_mean_std(cells.groupby("tier")[["count", "sum", "sumsq"]].sum().reset_index())
+    g = g[["tier", "mean", "std", "count"]]
+    present = set(g["tier"])
+    g["tier"] = pd.Categorical(
+        g["tier"],
+        categories=[t for t in TIER_ORDER if t in present],
+        ordered=True,
+    )
+    g = g.sort_values("tier")
+    return g
+
 # --------------------------------
 # Line graph: Tier vs Metric (mean ± std)
 # --------------------------------
 
 st.subheader("📈 Tier Progression")
 
-metrics_for_line = [m for m in LINE_METRICS if m in df_f.columns]
+metric_columns = set(cube["metric"]) if cube is not None else set(df_f.columns)
+metrics_for_line = [m for m in LINE_METRICS if m in metric_columns]
 
 if not metrics_for_line:
     st.info("No metrics available for line charts.")
@@ -177,7 +274,7 @@ else:
             cols = st.columns(2)
 
         with cols[i % 2]:
-            g = tier_agg_mean_std(df_f, metric)
+            g = tier_agg_from_cube(cube_f, metric) if cube_f is not None else tier_agg_mean_std(df_f, metric)
 
             if g.empty:
                 st.info(f"{METRIC_LABEL.get(metric, metric)}: No values.")
@@ -202,9 +299,41 @@ st.markdown("---")
 
 st.subheader("📦 Tier-wise Boxplot")
 
+def tier_box_figure(cells: pd.DataFrame, metric: str, show_outliers: bool) -> go.Figure:
+    # tier별로 cell을 합친 quartile / whisker로 box를 그리고, outlier는 cell별 tail에서 표본만
+    merged = merge_cube(cells, ["tier"])
+    merged = merged.assign(order=merged["tier"].map(TIER_ORDER.index)).sort_values("order")
+    stats = pd.DataFrame([box_stats(c) for _, c in merged.iterrows()])
+    color = px.colors.qualitative.Plotly[0]
+
+    fig = go.Figure(go.Box(
+        x=merged["tier"].tolist(),
+        q1=stats["q1"], median=stats["median"], q3=stats["q3"],
+        lowerfence=stats["lowerfence"], upperfence=stats["upperfence"],
+        boxpoints=False, marker_color=color, name=METRIC_LABEL.get(metric, metric),
+    ))
+    if show_outliers:
+        xs, ys = [], []
+        for tier, s in zip(merged["tier"], stats.itertuples()):
+            points = outlier_sample(cells[cells["tier"] == tier], s.lower, s.upper, BOX_OUTLIERS)
+            xs += [tier] * len(points)
+            ys.append(points)
+        if xs:
+            fig.add_trace(go.Scatter(
+                x=xs, y=np.concatenate(ys), mode="markers",
+                marker=dict(color=color, size=4, opacity=0.6), name="outliers",
+            ))
+    fig.update_layout(
+        title=f"{METRIC_LABEL.get(metric, metric)} — Tier-wise Distribution",
+        xaxis=dict(categoryorder="array", categoryarray=merged["tier"].tolist()),
+        showlegend=False,
+    )
+    return fig
+
+
 available_metrics_for_box = [
     m for m in METRIC_OPTIONS
-    if m in df_f.columns
+    if m in metric_columns
 ]
 
 if not available_metrics_for_box:
@@ -216,25 +345,18 @@ else:
         format_func=lambda x: METRIC_LABEL.get(x, x),
     )
 
-    df_box = df_f.dropna(subset=["tier", metric_box]).copy()
-    if df_box.empty:
+    show_outliers = st.checkbox("Show outlier points (sample)", value=True)
+
+    # cube가 없으면 선택한 지표만 tier별 cell로 요약 (모든 row를 브라우저로 보내지 않는다)
+    if cube_f is not None:
+        box_cells = cube_f[cube_f["metric"] == metric_box]
+    else:
+        box_cells = build_cube(df_f, [metric_box], ["tier"])
+    box_cells = box_cells[box_cells["tier"].isin(TIER_ORDER)]
+    if box_cells.empty:
         st.info(f"{METRIC_LABEL.get(metric_box, metric_box)}: No data.")
     else:
-        df_box["tier"] = df_box["tier"].astype(str).str.upper()
-        df_box["tier"] = pd.Categorical(
-            df_box["tier"],
-            categories=TIER_ORDER,
-            ordered=True,
-        )
-        df_box = df_box.sort_values("tier")
-
-        fig_box = px.box(
-            df_box,
-            x="tier",
-            y=metric_box,
-            points="all",
-            title=f"{METRIC_LABEL.get(metric_box, metric_box)} — Tier-wise Distribution",
-        )
+        fig_box = tier_box_figure(box_cells, metric_box, show_outliers)
         fig_box.update_layout(
             xaxis_title="Tier",
             yaxis_title=METRIC_LABEL.get(metric_box, metric_box),
@@ -0,0 +1,320 @@
+# metric_cube.py
+# Pre-aggregated metric cube: one cell per dataset_type x tier x role x patch x metric with
+# count / sum / sum of squares / min / max, a t-digest (centroid means + weights) and the TAIL
+# smallest / largest values (boxplot whiskers and outlier points).
+#
+# unified.py builds it next to the unified outputs (unified_pro_soloq_with_metrics_cube.parquet),
+# app.py merges the cells of the selected roles instead of grouping raw rows. Every field is
+# mergeable: counts / sums add up, min / max combine, digests are re-compressed, tails keep the most
+# extreme values of their union, so batch cubes of
+# `unified.py --stream` merge into the same cube as a single pass (up to digest approximation).
+# The file also records a content fingerprint of the outputs it was built from (cube_sources), so
+# app.py can tell whether the cube still belongs to the file / dataset it reads.
+import os
+import glob
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAS_ARROW = True
+except Exception:
+    HAS_ARROW = False
+
+CUBE_DIMS = ["dataset_type", "tier", "role", "patch"]
+COMPRESSION = 200   # t-digest delta: cell당 centroid 최대 ~delta/2개
+MAX_EXACT = COMPRESSION // 2  # 서로 다른 값이 이 이하이면 값마다 centroid 하나 (kills, win 같은 정수 지표는 정확)
+MISSING = "UNKNOWN"  # 결측 dimension 값 (app.prepare_df의 role fillna와 같은 값)
+ROWS_METRIC = "win"  # bool이라 결측이 없다 -> count = row 수
+SOURCES_KEY = b"cube_sources"  # Parquet metadata: {source 이름: source_fingerprint}
+TAIL = 50            # cell마다 저장하는 가장 작은 / 큰 값 개수
+WHISKER = 1.5        # Tukey fence: box에서 IQR의 몇 배까지 whisker
+
+
+def cube_path(stem: str) -> str:
+    return os.path.splitext(stem)[0] + "_cube.parquet"
+
+
+def _k(q):
+    # t-digest k1 scale: 양 끝(q=0, 1)에서 centroid가 작아진다
+    return COMPRESSION / (2 * np.pi) * np.arcsin(2 * q - 1)
+
+
+def _digest(g, v, w, n_groups, exact=None):
+    """Compress points sorted by (group, value) with weights w into t-digest centroids.
+
+    A group with at most MAX_EXACT distinct values (and only exact inputs) keeps one centroid per
+    value; otherwise a centroid spans at most one unit of k, as in the merging t-digest. Works for
+    raw values (w = 1) and for centroids. Returns (centroid group, means, weights, exact per group).
+    """
+    exact = np.ones(n_groups, dtype=bool) if exact is None else exact
+    if not len(v):
+        return g, v, w, exact
+    group_start = np.ones(len(v), dtype=bool)
+    group_start[1:] = g[1:] != g[:-1]
+    value_start = group_start.copy()
+    value_start[1:] |= v[1:] != v[:-1]
+    exact = exact & (np.bincount(g[value_start], minlength=n_groups) <= MAX_EXACT)
+
+    total = np.bincount(g, weights=w, minlength=n_groups)
+    before = np.concatenate([[0.0], np.cumsum(total)[:-1]])
+    q = (np.cumsum(w) - w - before[g]) / total[g]
+    bucket = np.floor(_k(q))
+    bucket_start = group_start.copy()
+    bucket_start[1:] |= bucket[1:] != bucket[:-1]
+
+    idx = np.flatnonzero(np.where(exact[g], value_start, bucket_start))
+    weights = np.add.reduceat(w, idx)
+    return g[idx], np.add.reduceat(v * w, idx) / weights, weights, exact
+
+
+def _sort(g, v):
+    # (group, value) 순서: 값으로 정렬한 뒤 group으로 stable 정렬 (lexsort보다 빠르다,
+    # group 번호가 int16이면 numpy가 radix sort를 쓴다)
+    order = np.argsort(v)
+    gs = g[order]
+    if len(gs) and gs.max() < np.iinfo(np.int16).max:
+        gs = gs.astype(np.int16)
+    return order[np.argsort(gs, kind="stable")]
+
+
+def _split(cg, arr, n_groups):
+    return np.split(arr, np.cumsum(np.bincount(cg, minlength=n_groups))[:-1])
+
+
+def _take(v, start, length):
+    # group마다 v[start : start + length]
+    idx = np.repeat(start - np.cumsum(length) + length, length) + np.arange(length.sum())
+    return np.split(v[idx], np.cumsum(length)[:-1])
+
+
+def _tails(g, v, n_groups):
+    """Per group of points sorted by (group, value): the TAIL smallest values and the TAIL largest of
+    the rest. The two never overlap, so a group with at most 2 x TAIL values keeps all of them."""
+    size = np.bincount(g, minlength=n_groups)
+    start = np.concatenate([[0], np.cumsum(size)[:-1]])
+    n_low = np.minimum(size, TAIL)
+    n_high = np.minimum(size - n_low, TAIL)
+    return _take(v, start, n_low), _take(v, start + size - n_high, n_high)
+
+
+def build_cube(df: pd.DataFrame, metrics: list, dims: list = CUBE_DIMS) -> pd.DataFrame:
+    """Cells of df for every metric column (rows where the metric is missing are not counted)."""
+    grouped = df.groupby(dims, sort=True, observed=True, dropna=False)
+    codes = grouped.ngroup().to_numpy()
+    labels = grouped.size().index.to_frame(index=False)
+    for d in dims:
+        labels[d] = labels[d].astype(str).fillna(MISSING)
+    if "tier" in labels.columns:
+        labels["tier"] = labels["tier"].str.upper()
+    n = len(labels)
+
+    cells = []
+    for metric in metrics:
+        v = pd.to_numeric(df[metric], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+        ok = ~np.isnan(v)
+        g, v = codes[ok], v[ok]
+        order = _sort(g, v)
+        g, v = g[order], v[order]
+        count = np.bincount(g, minlength=n)
+        has = count > 0
+        if not has.any():
+            continue
+        first = np.concatenate([[0], np.cumsum(count)[:-1]])
+        cg, means, weights, exact = _digest(g, v, np.ones(len(v)), n)
+        low, high = _tails(g, v, n)
+        cell = labels[has].copy()
+        cell["metric"] = metric
+        cell["count"] = count[has]
+        cell["sum"] = np.bincount(g, weights=v, minlength=n)[has]
+        cell["sumsq"] = np.bincount(g, weights=v * v, minlength=n)[has]
+        # 그룹 안에서 값 순으로 정렬돼 있으므로 처음 / 마지막 값이 min / max
+        cell["min"] = v[first[has]]
+        cell["max"] = v[(first + count - 1)[has]]
+        cell["means"] = [m for m, h in zip(_split(cg, means, n), has) if h]
+        cell["weights"] = [w for w, h in zip(_split(cg, weights, n), has) if h]
+        cell["exact"] = exact[has]
+        cell["low"] = [x for x, h in zip(low, has) if h]
+        cell["high"] = [x for x, h in zip(high, has) if h]
+        cells.append(cell)
+    if not cells:
+        return pd.DataFrame(columns=dims + ["metric", "count", "sum", "sumsq", "min", "max", "means", "weights", "exact",
+                                            "low", "high"])
+    return pd.concat(cells, ignore_index=True)
+
+
+def merge_cube(cube: pd.DataFrame, by: list) -> pd.DataFrame:
+    """Merge cells that share `by` (+ metric), e.g. by=["tier"] for all roles / patches together."""
+    keys = list(by) + ["metric"]
+    grouped = cube.groupby(keys, sort=True, observed=True)
+    out = grouped.agg(
+        count=("count", "sum"), sum=("sum", "sum"), sumsq=("sumsq", "sum"), min=("min", "min"), max=("max", "max"),
+        exact=("exact", "all"),
+    ).reset_index()
+    n = len(out)
+    if not n:
+        return out.assign(means=[], weights=[], low=[], high=[])
+    lens = cube["means"].map(len).to_numpy()
+    g = np.repeat(grouped.ngroup().to_numpy(), lens)
+    v = np.concatenate([np.asarray(m, dtype=float) for m in cube["means"]])
+    w = np.concatenate([np.asarray(m, dtype=float) for m in cube["weights"]])
+    order = _sort(g, v)
+    cg, means, weights, exact = _digest(g[order], v[order], w[order], n, out["exact"].to_numpy(dtype=bool))
+    out["means"] = _split(cg, means, n)
+    out["weights"] = _split(cg, weights, n)
+    out["exact"] = exact
+
+    # 각 cell의 tail 합집합에 전체의 가장 작은 / 큰 TAIL개가 들어 있다
+    lens = cube["low"].map(len).to_numpy() + cube["high"].map(len).to_numpy()
+    g = np.repeat(grouped.ngroup().to_numpy(), lens)
+    v = np.concatenate([np.concatenate([np.asarray(lo, dtype=float), np.asarray(hi, dtype=float)])
+                        for lo, hi in zip(cube["low"], cube["high"])])
+    order = _sort(g, v)
+    out["low"], out["high"] = _tails(g[order], v[order], n)
+    return out[[c for c in out.columns if c not in ("exact", "low", "high")] + ["exact", "low", "high"]]
+
+
+def with_mean_std(cells: pd.DataFrame) -> pd.DataFrame:
+    # pandas mean / std(ddof=1)와 같은 정의
+    cells = cells.copy()
+    n = cells["count"].astype(float)
+    cells["mean"] = cells["sum"] / n
+    var = ((cells["sumsq"] - cells["sum"] * cells["mean"]) / (n - 1).where(n > 1)).clip(lower=0)
+    cells["std"] = np.sqrt(var)
+    return cells
+
+
+def _ranks(cell):
+    """(rank, value) points of the piecewise-linear quantile function of one cell, and its count."""
+    w = np.asarray(cell["weights"], dtype=float)
+    m = np.asarray(cell["means"], dtype=float)
+    end = np.cumsum(w) - 1  # centroid가 차지하는 rank 구간 [end - w + 1, end] (0부터)
+    if cell["exact"]:
+        # 값마다 centroid 하나: 구간 안은 그 값, 구간 사이만 보간
+        return np.column_stack([end - w + 1, end]).ravel(), np.repeat(m, 2), w.sum()
+    # centroid의 평균 rank 사이를 보간, 양 끝은 min / max
+    x = np.concatenate([[0.0], end - (w - 1) / 2, [w.sum() - 1]])
+    return x, np.concatenate([[cell["min"]], m, [cell["max"]]]), w.sum()
+
+
+def quantiles(cell, qs) -> np.ndarray:
+    """Quantiles of one (merged) cell, linear interpolation like pandas (exact for exact cells)."""
+    n = np.sum(cell["weights"])
+    if n <= 1:
+        return np.full(len(qs), cell["min"] if n else np.nan)
+    x, y, n = _ranks(cell)
+    return np.interp(np.asarray(qs, dtype=float) * (n - 1), x, y)
+
+
+def _whisker(tail, estimates, lower, upper, inner, side):
+    """Whisker on one side: the most extreme value inside [lower, upper]. Exact from the stored tail
+    when it reaches into the fences (or holds every value), else the best digest estimate."""
+    inside = tail[(tail >= lower) & (tail <= upper)]
+    if len(inside):
+        return inside.min() if side == "low" else inside.max()
+    inside = estimates[(estimates >= lower) & (estimates <= upper)]
+    if not len(inside):
+        return inner
+    return inside.min() if side == "low" else inside.max()
+
+
+def box_stats(cell) -> dict:
+    """Box of one (merged) cell: quartiles from the digest, whiskers at the most extreme value within
+    WHISKER x IQR of the box (like plotly / matplotlib; exact when that value is among the tails)."""
+    q1, median, q3 = quantiles(cell, [0.25, 0.5, 0.75])
+    lower, upper = q1 - WHISKER * (q3 - q1), q3 + WHISKER * (q3 - q1)
+    low = np.asarray(cell["low"], dtype=float)
+    high = np.asarray(cell["high"], dtype=float)
+    if len(low) + len(high) >= cell["count"]:
+        # 값이 전부 tail에 있다
+        low = high = np.concatenate([low, high])
+    # tail이 fence 안까지 오지 않을 때만 (fence가 tail 밖) centroid / fence 바로 안쪽 rank의 값으로 추정
+    estimates = np.asarray(cell["means"], dtype=float)
+    if np.sum(cell["weights"]) > 1:
+        x, y, _ = _ranks(cell)
+        rank = np.interp([lower, upper], y, x)
+        estimates = np.concatenate([estimates, np.interp([np.ceil(rank[0]), np.floor(rank[1])], x, y)])
+    return dict(q1=q1, median=median, q3=q3,
+                lowerfence=_whisker(low, estimates, lower, upper, q1, "low"),
+                upperfence=_whisker(high, estimates, lower, upper, q3, "high"),
+                lower=lower, upper=upper)
+
+
+def outlier_sample(cells: pd.DataFrame, lower: float, upper: float, cap: int) -> np.ndarray:
+    """Tail values of the cells outside [lower, upper], about `cap` of them. Each cell (stratum) gets a
+    share proportional to its outliers, at least one, taken evenly by rank so its extremes are kept."""
+    per = []
+    for lo, hi in zip(cells["low"], cells["high"]):
+        # 작은 cell은 값이 전부 low에 있다 (low / high는 겹치지 않고 이어 붙이면 정렬된 순서)
+        v = np.concatenate([lo, hi]).astype(float)
+        per.append(v[(v < lower) | (v > upper)])
+    total = sum(len(p) for p in per)
+    if total <= cap:
+        return np.concatenate(per) if per else np.array([])
+    out = []
+    for p in per:
+        if len(p):
+            k = max(1, int(cap * len(p) / total))
+            out.append(p[np.unique(np.linspace(0, len(p) - 1, k).round().astype(int))])
+    return np.concatenate(out)
+
+
+def source_key(path: str) -> str:
+    # cube와 같은 디렉터리의 출력이라 이름만 쓴다 (dataset 디렉터리는 끝의 / 제거)
+    return os.path.basename(os.path.normpath(path))
+
+
+def _footer(path: str) -> bytes:
+    # row 수 / schema / row group별 크기와 컬럼 통계: 내용이 같으면 복사본도 같다
+    return json.dumps(pq.ParquetFile(path).metadata.to_dict(), sort_keys=True, default=str).encode()
+
+
+def source_fingerprint(path: str) -> str:
+    """Content fingerprint of a unified output: the Parquet footers of a file or of every file of a
+    dataset directory (relative paths included), sha256 of the bytes for anything else (CSV).
+    Unlike mtimes it survives git checkout, artifact downloads and cp."""
+    h = hashlib.sha256()
+    if os.path.isdir(path):
+        for f in sorted(glob.glob(os.path.join(path, "**", "*.parquet"), recursive=True)):
+            h.update(os.path.relpath(f, path).replace(os.sep, "/").encode())
+            h.update(_footer(f))
+    elif path.endswith(".parquet"):
+        h.update(_footer(path))
+    else:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+    return h.hexdigest()
+
+
+def save_cube(cube: pd.DataFrame, path: str, sources: list = ()):
+    """Write the cube; `sources` are the outputs it was built from (their fingerprints are stored)."""
+    cube = cube.assign(means=[np.asarray(m, dtype=float) for m in cube["means"]],
+                       weights=[np.asarray(w, dtype=float) for w in cube["weights"]],
+                       low=[np.asarray(x, dtype=float) for x in cube["low"]],
+                       high=[np.asarray(x, dtype=float) for x in cube["high"]])
+    table = pa.Table.from_pandas(cube, preserve_index=False)
+    stamps = {source_key(p): source_fingerprint(p) for p in sources if p and os.path.exists(p)}
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), SOURCES_KEY: json.dumps(stamps).encode()})
+    pq.write_table(table, path, compression="zstd")
+
+
+def load_cube(path: str) -> pd.DataFrame:
+    return pd.read_parquet(path)
+
+
+def cube_sources(path: str) -> dict:
+    """{source name: fingerprint} recorded by save_cube ({} for a cube without it)."""
+    if not HAS_ARROW:
+        return {}
+    metadata = pq.read_schema(path).metadata or {}
+    return json.loads(metadata.get(SOURCES_KEY, b"{}"))
+
+
+def cube_matches(path: str, source: str) -> bool:
+    # source가 cube를 만들 때와 같은 내용인가 (mtime은 checkout / 복사로 바뀌므로 보지 않는다)
+    expected = cube_sources(path).get(source_key(source))
+    return expected is not None and os.path.exists(source) and source_fingerprint(source) == expected
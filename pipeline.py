@@ -0,0 +1,268 @@
+# pipeline.py
+# Local runner for the whole pipeline: a stage runs only when its inputs changed.
+#
+#   python pipeline.py                  # parse -> lanes -> clean, pro_clean (in parallel) -> unified
+#   python pipeline.py unified          # one stage plus the stages it needs
+#   python pipeline.py --all            # also acquire (Riot API) and provenance
+#   python pipeline.py --force clean    # run clean even if nothing changed
+#   python pipeline.py --dry-run        # what would run, and why
+#   python pipeline.py --status         # last run of every stage
+#
+# Each stage lists its inputs (data and the code it runs) and its outputs. A stage is skipped when
+# the sha256 (provenance.sha256sum) of every input equals the one recorded at its last successful
+# run and its outputs are still the files it wrote; a stage whose upstream rewrote identical files
+# is skipped too. Hashes are cached by size + mtime in .pipeline_state.json, so unchanged files
+# are not read again.
+import os, sys, glob, json, time, argparse, threading, subprocess
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from provenance import sha256sum
+from metric_cube import cube_path
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_ARROW = True
+except Exception:
+    HAS_ARROW = False
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+STATE_PATH = os.path.join(ROOT, ".pipeline_state.json")
+EXT = ".parquet" if HAS_ARROW else ".csv"
+PRO_RAW = "pro/data/2025_LoL_esports_match_data_from_OraclesElixir.csv"
+SOLOQ_IO = ["SoloQ/raw_store.py", "SoloQ/utils.py", "SoloQ/jsonio.py", "SoloQ/tableio.py"]
+COLLECT_CODE = ["SoloQ/acquire.py", "SoloQ/collector.py", "SoloQ/config.py", "SoloQ/http_client.py",
+                "SoloQ/league_api.py", "SoloQ/riot_api.py", "SoloQ/rate_limit.py", "SoloQ/journal.py",
+                "SoloQ/response_cache.py", "SoloQ/patches.py"]
+
+
+class Stage:
+    def __init__(self, name, cwd, cmd, inputs, outputs, needs=(), optional=False, always=False):
+        self.name = name
+        self.cwd = cwd            # ROOT 기준
+        self.cmd = cmd
+        self.inputs = inputs      # 파일 / 디렉터리 / glob (ROOT 기준)
+        self.outputs = outputs
+        self.needs = list(needs)
+        self.optional = optional  # 이름을 주거나 --all 일 때만 실행
+        self.always = always      # 입력 파일로 판단할 수 없는 stage (Riot API)
+
+
+def build_stages(patch):
+    py = sys.executable
+    raw = f"SoloQ/output_{patch}_by_tier"
+    full = f"SoloQ/data/soloq_full_{patch}{EXT}"
+    index = f"SoloQ/data/soloq_match_index_{patch}{EXT}"
+    lanes = f"SoloQ/data/soloq_lane_diffs_{patch}{EXT}"
+    soloq_clean = f"SoloQ/data/soloq_clean_{patch}{EXT}"
+    pro_clean = f"pro/data/pro_2025_cleaned{EXT}"
+    unified = ["unified_pro_soloq_with_metrics.csv"] + (["unified_pro_soloq_with_metrics.parquet"] if HAS_ARROW else [])
+    cube = [cube_path("unified_pro_soloq_with_metrics.parquet")] if HAS_ARROW else []
+    parse_cmd = [py, "parse.py", "--root", f"output_{patch}_by_tier"] + (["--incremental"] if HAS_ARROW else [])
+    return [
+        Stage("acquire", "SoloQ", [py, "acquire.py"], COLLECT_CODE + SOLOQ_IO, [raw],
+              optional=True, always=True),
+        Stage("parse", "SoloQ", parse_cmd,
+              [f"{raw}/*/matches", f"{raw}/*/archive.sqlite", "SoloQ/parse.py", "SoloQ/wide_table.py",
+               "SoloQ/projection.py", "SoloQ/incremental.py", "SoloQ/patches.py"] + SOLOQ_IO,
+              [full, index], needs=["acquire"]),
+        Stage("lanes", "SoloQ", [py, "clean.py", "--step", "lanes"],
+              [f"{raw}/*/timelines", f"{raw}/*/archive.sqlite", index, "SoloQ/clean.py", "SoloQ/config.py",
+               "SoloQ/lane_diffs.py", "SoloQ/timeline_stream.py", "SoloQ/projection.py"] + SOLOQ_IO,
+              [lanes], needs=["parse"]),
+        Stage("clean", "SoloQ", [py, "clean.py", "--step", "clean"],
+              [full, lanes, "SoloQ/clean.py", "SoloQ/config.py", "SoloQ/projection.py", "SoloQ/tableio.py"],
+              [soloq_clean], needs=["parse", "lanes"]),
+        Stage("pro_clean", "pro", [py, "clean.py"], [PRO_RAW, "pro/clean.py"], [pro_clean]),
+        Stage("unified", ".", [py, "unified.py"], [soloq_clean, pro_clean, "unified.py", "metric_cube.py", "SoloQ/tableio.py"], unified + cube,
+              needs=["clean", "pro_clean"]),
+        Stage("provenance", ".", [py, "provenance.py"],
+              [full, soloq_clean, PRO_RAW, pro_clean, "unified.py", "SoloQ/clean.py", "provenance.py"] + unified,
+              ["provenance.json", "provenance.png"], needs=["unified"], optional=True),
+    ]
+
+
+def load_state():
+    try:
+        with open(STATE_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"files": {}, "stages": {}}
+
+
+def save_state(state):
+    tmp = STATE_PATH + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, STATE_PATH)
+
+
+def file_hash(rel, cache):
+    # size + mtime이 같으면 저장된 sha256을 그대로 쓴다
+    st = os.stat(os.path.join(ROOT, rel))
+    hit = cache.get(rel)
+    if hit and hit[0] == st.st_size and hit[1] == st.st_mtime_ns:
+        return hit[2]
+    digest = sha256sum(os.path.join(ROOT, rel))
+    cache[rel] = [st.st_size, st.st_mtime_ns, digest]
+    return digest
+
+
+def hash_paths(patterns, cache):
+    """{relative path: sha256} for every file under the patterns; a missing plain path -> None."""
+    out = {}
+    for pat in patterns:
+        hits = sorted(glob.glob(os.path.join(ROOT, pat)))
+        if not hits and not glob.has_magic(pat):
+            out[pat] = None
+        for hit in hits:
+            files = [hit]
+            if os.path.isdir(hit):
+                files = sorted(os.path.join(d, fn) for d, _, fns in os.walk(hit) for fn in fns)
+            for path in files:
+                rel = os.path.relpath(path, ROOT).replace(os.sep, "/")
+                out[rel] = file_hash(rel, cache)
+    return out
+
+
+def why_run(stage, rec, inputs, cache, force):
+    if force:
+        return "forced"
+    if stage.always:
+        return "always runs"
+    if rec is None:
+        return "no previous run"
+    changed = sorted(k for k in inputs.keys() | rec["inputs"].keys() if inputs.get(k) != rec["inputs"].get(k))
+    if changed:
+        more = f" (+{len(changed) - 3})" if len(changed) > 3 else ""
+        return "changed: " + ", ".join(changed[:3]) + more
+    outputs = hash_paths(stage.outputs, cache)
+    if any(v is None for v in outputs.values()):
+        return "output missing"
+    if outputs != rec["outputs"]:
+        return "output modified"
+    return None
+
+
+def select(stages, targets, with_optional):
+    by_name = {s.name: s for s in stages}
+    unknown = [t for t in targets if t not in by_name]
+    if unknown:
+        raise SystemExit(f"unknown stage(s): {', '.join(unknown)} (stages: {', '.join(by_name)})")
+    wanted = set()
+
+    def add(name, explicit):
+        s = by_name[name]
+        if name in wanted or (s.optional and not explicit and not with_optional):
+            return
+        wanted.add(name)
+        for n in s.needs:
+            add(n, False)
+
+    for name in targets or [s.name for s in stages]:
+        add(name, bool(targets))
+    return [s for s in stages if s.name in wanted]
+
+
+def run(stages, state, args, env):
+    names = {s.name for s in stages}
+    cache = state.setdefault("files", {})
+    records = state.setdefault("stages", {})
+    lock = threading.Lock()
+    results = {}
+
+    def execute(stage):
+        t0 = time.perf_counter()
+        inputs = hash_paths(stage.inputs, cache)
+        reason = why_run(stage, records.get(stage.name), inputs, cache, stage.name in args.force)
+        if args.dry_run:
+            upstream = [n for n in stage.needs if results.get(n, ("",))[0].startswith("would run")]
+            if reason is None and upstream:
+                return "would run?", "if " + ", ".join(upstream) + " changes its outputs", 0.0
+            return ("would run", reason, 0.0) if reason else ("skipped", None, 0.0)
+        if reason is None:
+            return "skipped", None, time.perf_counter() - t0
+        with lock:
+            print(f"[PIPELINE] {stage.name}: run ({reason})")
+        proc = subprocess.run(stage.cmd, cwd=os.path.join(ROOT, stage.cwd), env=env,
+                              stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        sec = time.perf_counter() - t0
+        with lock:
+            # 병렬 stage의 출력이 섞이지 않도록 끝난 뒤 한 번에
+            print(f"[PIPELINE] ---- {stage.name} ({sec:.1f}s, exit {proc.returncode}) ----")
+            print(proc.stdout.rstrip())
+            if proc.returncode != 0:
+                return "failed", reason, sec
+            records[stage.name] = {
+                "inputs": inputs,
+                "outputs": hash_paths(stage.outputs, cache),
+                "seconds": round(sec, 3),
+                "finished": datetime.now().isoformat(timespec="seconds"),
+            }
+            save_state(state)
+        return "ran", reason, sec
+
+    pending = list(stages)
+    running = {}
+    with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        while pending or running:
+            for stage in list(pending):
+                needs = [n for n in stage.needs if n in names]
+                broken = [n for n in needs if results.get(n, ("",))[0] in ("failed", "blocked")]
+                if broken:
+                    pending.remove(stage)
+                    results[stage.name] = ("blocked", ", ".join(broken) + " did not finish", 0.0)
+                elif all(n in results for n in needs):
+                    pending.remove(stage)
+                    running[pool.submit(execute, stage)] = stage
+            if not running:
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                results[running.pop(fut).name] = fut.result()
+    save_state(state)
+    return results
+
+
+def print_status(stages, state):
+    records = state.get("stages", {})
+    for s in stages:
+        rec = records.get(s.name)
+        if rec is None:
+            print(f"  {s.name:<11} never run")
+        else:
+            print(f"  {s.name:<11} {rec['seconds']:8.1f}s  {rec['finished']}  "
+                  f"{len(rec['inputs'])} inputs, {len(rec['outputs'])} outputs")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("stages", nargs="*", help="stages to bring up to date (default: all but acquire / provenance)")
+    ap.add_argument("--patch", default=os.getenv("PATCH_MM", "15.24").strip() or "15.24")
+    ap.add_argument("--all", action="store_true", help="include acquire and provenance")
+    ap.add_argument("--force", nargs="*", default=None, help="run these stages even if unchanged (no names = all)")
+    ap.add_argument("--dry-run", action="store_true")
+    ap.add_argument("--status", action="store_true")
+    ap.add_argument("--jobs", type=int, default=4, help="stages running at the same time")
+    args = ap.parse_args()
+
+    stages = select(build_stages(args.patch), args.stages, args.all)
+    state = load_state()
+    if args.status:
+        print_status(stages, state)
+        sys.exit(0)
+    if args.force is None:
+        args.force = []
+    elif not args.force:
+        args.force = [s.name for s in stages]
+
+    env = dict(os.environ, PATCH_MM=args.patch)
+    if "acquire" not in {s.name for s in stages}:
+        env.setdefault("RIOT_API_KEY", "local")  # config.py는 키가 있어야 import된다 (API는 쓰지 않음)
+
+    t0 = time.perf_counter()
+    results = run(stages, state, args, env)
+    print(f"[PIPELINE] patch {args.patch}, {time.perf_counter() - t0:.1f}s")
+    for s in stages:
+        status, reason, sec = results[s.name]
+        print(f"  {s.name:<11} {status:<10} {sec:7.2f}s  {reason or ''}")
+    sys.exit(1 if any(r[0] in ("failed", "blocked") for r in results.values()) else 0)
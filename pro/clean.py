@@ -1,16 +1,29 @@
 # analysis/clean_pro.py
+#
+#   python clean.py                                   # RAW_PATH in memory
+#   python clean.py --chunksize 200000                # streaming: two passes over the CSV, bounded memory
+#   python clean.py data/2024_*.csv data/2025_*.csv --chunksize 200000   # several seasons at once
 import os
+import argparse
 import pandas as pd
 
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAS_ARROW = True
+except Exception:
+    HAS_ARROW = False
+
 DATA_DIR = "./data"
 RAW_PATH = os.path.join(DATA_DIR, "2025_LoL_esports_match_data_from_OraclesElixir.csv")
-CLEAN_PATH = os.path.join(DATA_DIR, "pro_2025_cleaned.csv")
+CLEAN_PATH = os.path.join(DATA_DIR, "pro_2025_cleaned.parquet")
+EXPORT_CSV = os.getenv("EXPORT_CSV", "0") == "1"
 
 
-def clean_pro_df(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    print("[PRO CLEAN] raw shape:", df.shape)
+NA_DROP_RATIO = 0.80
+
 
+def filter_rows(df: pd.DataFrame) -> pd.DataFrame:
     # ------------------------------------------------------
     # 1) 기본 필터
     # ------------------------------------------------------
@@ -36,14 +49,27 @@ def clean_pro_df(df: pd.DataFrame) -> pd.DataFrame:
         "totalgold", "visionscore"
     ]
     ex_req = [c for c in required_cols if c in df.columns]
-    df = df.dropna(subset=ex_req, how="any")
+    return df.dropna(subset=ex_req, how="any")
+
+
+def drop_blank_positions(df: pd.DataFrame) -> pd.DataFrame:
+    # ------------------------------------------------------
+    # 5) position이 비어있으면 제거
+    # ------------------------------------------------------
+    return df[df["position"].astype(str).str.strip() != ""]
+
+
+def clean_pro_df(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy()
+    print("[PRO CLEAN] raw shape:", df.shape)
+    df = filter_rows(df)
 
     # ------------------------------------------------------
     # 3) 전체 행 대비 NaN 비율이 너무 높은 컬럼 삭제
     #    → 80% 이상 NaN이면 삭제
     # ------------------------------------------------------
     na_ratio = df.isna().mean()
-    drop_cols = na_ratio[na_ratio > 0.80].index.tolist()
+    drop_cols = na_ratio[na_ratio > NA_DROP_RATIO].index.tolist()
 
     print(f"[PRO CLEAN] dropping {len(drop_cols)} columns due to >80% NaN")
     df = df.drop(columns=drop_cols, errors="ignore")
@@ -59,21 +85,161 @@ def clean_pro_df(df: pd.DataFrame) -> pd.DataFrame:
     print(f"[PRO CLEAN] dropping {len(low_variance_cols)} constant columns")
     df = df.drop(columns=low_variance_cols, errors="ignore")
 
-    # ------------------------------------------------------
-    # 5) position이 비어있으면 제거
-    # ------------------------------------------------------
-    df = df[df["position"].astype(str).str.strip() != ""]
+    df = drop_blank_positions(df)
 
     print("[PRO CLEAN] final shape:", df.shape)
     return df
 
 
-def main():
-    df_raw = pd.read_csv(RAW_PATH)
+class ColumnStats:
+    """Running per-column aggregates over CSV chunks, enough to replay clean_pro_df's column drops.
+
+    Filtered rows: count, non-null count per column and up to two distinct values per column
+    (nunique <= 1 check). Raw rows: which dtype read_csv gave each column, so the second pass can
+    read every chunk with the dtype a single pd.read_csv of all files would have picked.
+    """
+
+    def __init__(self):
+        self.raw_rows = 0
+        self.rows = 0
+        self.columns = {}   # 처음 나온 순서
+        self.nonnull = {}
+        self.values = {}    # column -> set (최대 2개)
+        self.kinds = {}     # column -> read_csv dtype kind가 나온 것들 ("b", "i", "f", "O", "nan")
+        self.present = {}   # column -> 그 컬럼이 있던 파일의 raw row 수
+
+    def update_raw(self, chunk: pd.DataFrame):
+        self.raw_rows += len(chunk)
+        for c in chunk.columns:
+            self.columns.setdefault(c, None)
+            self.present[c] = self.present.get(c, 0) + len(chunk)
+            s = chunk[c]
+            kinds = self.kinds.setdefault(c, set())
+            if s.isna().any():
+                kinds.add("nan")
+            if s.notna().any():
+                kinds.add(s.dtype.kind if s.dtype.kind in "bif" else "O")
+
+    def update(self, chunk: pd.DataFrame):
+        self.rows += len(chunk)
+        for c in chunk.columns:
+            s = chunk[c].dropna()
+            self.nonnull[c] = self.nonnull.get(c, 0) + len(s)
+            seen = self.values.setdefault(c, set())
+            if len(seen) < 2 and len(s):
+                for v in s.unique()[:2]:
+                    # 1 / 1.0 은 같은 값 (전체를 한 번에 읽으면 같은 dtype)
+                    seen.add(float(v) if pd.api.types.is_number(v) and not pd.api.types.is_bool(v) else v)
+                    if len(seen) >= 2:
+                        break
+
+    def dtypes(self) -> dict:
+        """read_csv dtype per column, as if all raw rows were read at once."""
+        out = {}
+        for c, kinds in self.kinds.items():
+            if self.present[c] < self.raw_rows:
+                kinds = kinds | {"nan"}  # 다른 시즌 파일에는 없는 컬럼
+            k = kinds - {"nan"}
+            if "O" in k or ("b" in k and kinds != {"b"}):
+                out[c] = str
+            elif "nan" in kinds and k <= {"i", "f"}:
+                out[c] = "float64"
+            elif "f" in k:
+                out[c] = "float64"
+        return out
+
+    def drop_columns(self):
+        """(>80% NaN columns, constant columns among the rest), like clean_pro_df."""
+        cols = list(self.columns)
+        if self.rows == 0:
+            return [], cols
+        na_cols = [c for c in cols if 1 - self.nonnull.get(c, 0) / self.rows > NA_DROP_RATIO]
+        const_cols = [c for c in cols if c not in na_cols and len(self.values.get(c, ())) <= 1]
+        return na_cols, const_cols
+
+
+def iter_chunks(paths, chunksize, dtype=None):
+    for path in paths:
+        for chunk in pd.read_csv(path, chunksize=chunksize, dtype=dtype):
+            yield chunk
+
+
+def clean_pro_streaming(paths, out_path: str, chunksize: int = 200_000, csv_path: str | None = None) -> tuple:
+    """clean_pro_df over one or more CSV files without loading them: pass 1 applies the row filters
+    per chunk and collects ColumnStats, pass 2 re-reads, filters, keeps the surviving columns and
+    appends each chunk to the Parquet (and/or CSV) output. Memory is one chunk plus per-column counters."""
+    stats = ColumnStats()
+    for chunk in iter_chunks(paths, chunksize):
+        stats.update_raw(chunk)
+        chunk = filter_rows(chunk)
+        stats.update(chunk)
+    print("[PRO CLEAN] raw shape:", (stats.raw_rows, len(stats.columns)))
+    na_cols, const_cols = stats.drop_columns()
+    print(f"[PRO CLEAN] dropping {len(na_cols)} columns due to >80% NaN")
+    print(f"[PRO CLEAN] dropping {len(const_cols)} constant columns")
+    keep = [c for c in stats.columns if c not in na_cols and c not in const_cols]
+
+    dtype = stats.dtypes()
+    writer, rows = None, 0
+    if csv_path and os.path.exists(csv_path):
+        os.remove(csv_path)
+    try:
+        for chunk in iter_chunks(paths, chunksize, dtype):
+            chunk = drop_blank_positions(filter_rows(chunk).reindex(columns=keep))
+            rows += len(chunk)
+            if out_path and HAS_ARROW:
+                chunk_pq = arrow_safe(chunk)
+                if writer is None:
+                    schema = pa.Schema.from_pandas(chunk_pq, preserve_index=False)
+                    # 첫 chunk에서 전부 결측인 컬럼은 null 타입 -> 문자열로 고정
+                    schema = pa.schema([f.with_type(pa.string()) if pa.types.is_null(f.type) else f for f in schema])
+                    writer = pq.ParquetWriter(out_path, schema, compression="zstd")
+                writer.write_table(pa.Table.from_pandas(chunk_pq, schema=schema, preserve_index=False))
+            if csv_path:
+                chunk.to_csv(csv_path, mode="a", header=not os.path.exists(csv_path), index=False,
+                             encoding="utf-8-sig" if not os.path.exists(csv_path) else "utf-8")
+    finally:
+        if writer is not None:
+            writer.close()
+    if out_path and HAS_ARROW and writer is None:
+        pd.DataFrame(columns=keep).to_parquet(out_path, index=False, compression="zstd")
+    print("[PRO CLEAN] final shape:", (rows, len(keep)))
+    return rows, len(keep)
+
+
+def arrow_safe(df: pd.DataFrame) -> pd.DataFrame:
+    # 숫자 / 문자열이 섞인 object 컬럼은 Parquet에 못 쓰므로 값만 문자열로 (결측은 그대로)
+    df = df.copy()
+    for c in df.columns[df.dtypes == object]:
+        if pd.api.types.infer_dtype(df[c], skipna=True) not in ("string", "empty"):
+            df[c] = df[c].where(df[c].isna(), df[c].astype(str))
+    return df
+
+
+def main(paths=None, chunksize: int = 0):
+    paths = paths or [RAW_PATH]
+    csv_path = os.path.splitext(CLEAN_PATH)[0] + ".csv"
+    if chunksize:
+        pq_path = CLEAN_PATH if HAS_ARROW else None
+        out_csv = csv_path if EXPORT_CSV or not HAS_ARROW else None
+        clean_pro_streaming(paths, pq_path, chunksize, out_csv)
+        for path in (pq_path, out_csv):
+            if path:
+                print(f"[PRO CLEAN] saved → {path}")
+        return
+    df_raw = pd.concat([pd.read_csv(p) for p in paths], ignore_index=True) if len(paths) > 1 else pd.read_csv(paths[0])
     df_clean = clean_pro_df(df_raw)
-    df_clean.to_csv(CLEAN_PATH, index=False, encoding="utf-8-sig")
-    print(f"[PRO CLEAN] saved → {CLEAN_PATH}")
+    if HAS_ARROW:
+        arrow_safe(df_clean).to_parquet(CLEAN_PATH, index=False, compression="zstd")
+        print(f"[PRO CLEAN] saved → {CLEAN_PATH}")
+    if EXPORT_CSV or not HAS_ARROW:
+        df_clean.to_csv(csv_path, index=False, encoding="utf-8-sig")
+        print(f"[PRO CLEAN] saved → {csv_path}")
 
 
 if __name__ == "__main__":
-    main()
+    ap = argparse.ArgumentParser()
+    ap.add_argument("paths", nargs="*", help=f"Oracle's Elixir CSV files (default: {RAW_PATH})")
+    ap.add_argument("--chunksize", type=int, default=0, help="rows per chunk for the streaming mode (0 = in memory)")
+    args = ap.parse_args()
+    main(args.paths, args.chunksize)
@@ -1,10 +1,18 @@
+from __future__ import annotations
+
 import subprocess
 from pathlib import Path
 from datetime import datetime
 import hashlib
 import os
-import prov.model as prov
-from prov.dot import prov_to_dot
+
+try:
+    import prov.model as prov
+    from prov.dot import prov_to_dot
+    HAS_PROV = True
+except ImportError:
+    # pipeline.py는 sha256sum만 쓴다
+    HAS_PROV = False
 
 
 def run_unified(script_path: str = "unified.py"):
@@ -45,6 +53,8 @@ def add_file(doc: prov.ProvDocument, identifier: str, file_path: str):
 
 
 def main():
+    if not HAS_PROV:
+        raise ImportError("provenance.py needs the 'prov' package (pip install prov graphviz)")
     # ------------------------------------------------------------------
     # 1. Initialize PROV document and namespaces
     # ------------------------------------------------------------------
@@ -95,8 +105,8 @@ def main():
     #    Adjust paths if your repo layout differs.
     # ------------------------------------------------------------------
     # SoloQ files
-    soloq_raw = add_file(doc, "ex:soloq_raw", "SoloQ/data/soloq_full_15.24.csv")
-    soloq_clean = add_file(doc, "ex:soloq_clean", "SoloQ/data/soloq_clean_15.24.csv")
+    soloq_raw = add_file(doc, "ex:soloq_raw", "SoloQ/data/soloq_full_15.24.parquet")
+    soloq_clean = add_file(doc, "ex:soloq_clean", "SoloQ/data/soloq_clean_15.24.parquet")
     soloq_clean_script = add_file(doc, "ex:soloq_clean_script", "SoloQ/clean.py")
 
     # Pro files
@@ -105,7 +115,7 @@ def main():
         "ex:pro_raw",
         "pro/data/2025_LoL_esports_match_data_from_OraclesElixir.csv",
     )
-    pro_clean = add_file(doc, "ex:pro_clean", "pro/data/pro_2025_cleaned.csv")
+    pro_clean = add_file(doc, "ex:pro_clean", "pro/data/pro_2025_cleaned.parquet")
     pro_clean_script = add_file(doc, "ex:pro_clean_script", "pro/clean_pro_data.py")
 
     # Unified output
@@ -113,7 +123,7 @@ def main():
     unified_output = add_file(
         doc,
         "ex:unified_dataset",
-        "unified_pro_soloq_with_metrics.csv",
+        "unified_pro_soloq_with_metrics.parquet",
     )
 
     # ------------------------------------------------------------------
@@ -158,7 +168,7 @@ def main():
 
     print("provenance.py completed successfully.")
     print("Generated:")
-    print("- unified_pro_soloq_with_metrics.csv (via unified.py)")
+    print("- unified_pro_soloq_with_metrics.parquet / .csv (via unified.py)")
     print("- provenance.json")
     print("- provenance.png")
 
@@ -0,0 +1,10 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# SoloQ 모듈은 SoloQ/ 안에서 실행하는 것처럼 이름만으로 import한다 (from utils import ...)
+for path in (ROOT, os.path.join(ROOT, "SoloQ")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+# config.py는 키가 없으면 import 시점에 멈춘다; 테스트는 API를 부르지 않는다
+os.environ.setdefault("RIOT_API_KEY", "test")
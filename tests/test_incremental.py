@@ -0,0 +1,61 @@
+import json
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from parse import build_dataframe, build_incremental, projected_columns  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RAW = os.path.join(ROOT, "SoloQ", "output_15.24_by_tier")
+KEY = ["tier", "matchId", "participantId"]
+
+
+def by_key(df):
+    return df.sort_values(KEY).reset_index(drop=True)
+
+
+def check(base, parts, columns):
+    # incremental 결과는 새로 parse한 match가 뒤에 오므로 row 순서만 빼고 전체 parse와 같아야 한다
+    inc = build_incremental(base, parts, columns=columns)
+    full = build_dataframe(base, columns=columns)
+    pd.testing.assert_frame_equal(by_key(inc), by_key(full[inc.columns]), check_dtype=False)
+    return inc
+
+
+@pytest.mark.parametrize("full", [False, True])
+def test_deleted_modified_and_new_files(tmp_path, full):
+    base, parts = str(tmp_path / "raw"), str(tmp_path / "parts")
+    for tier in ("BRONZE", "DIAMOND", "SILVER"):
+        shutil.copytree(os.path.join(RAW, tier), os.path.join(base, tier))
+    columns = None if full else projected_columns()
+    first = check(base, parts, columns)
+
+    bronze = os.path.join(base, "BRONZE", "matches")
+    deleted = sorted(os.listdir(bronze))[0]
+    os.remove(os.path.join(bronze, deleted))
+    silver = os.path.join(base, "SILVER", "matches")
+    path = os.path.join(silver, sorted(os.listdir(silver))[0])
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    data["info"]["participants"][0]["kills"] = 99
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))  # 같은 초 안에 다시 써도 stamp가 바뀌게
+    shutil.copytree(os.path.join(RAW, "IRON"), os.path.join(base, "IRON"))
+
+    second = check(base, parts, columns)
+    mid = data["metadata"]["matchId"]
+    assert deleted.split(".")[0] not in set(second["matchId"])
+    assert (second.loc[second["matchId"] == mid, "kills"] == 99).any()
+    assert set(second["tier"]) == {"BRONZE", "DIAMOND", "SILVER", "IRON"}
+    assert len(second) == len(first)  # match 하나 삭제, 하나 추가
+    # 바뀐 match / 새 match는 뒤에 붙는다
+    assert set(second["matchId"].iloc[-20:]) == {mid, *second.loc[second["tier"] == "IRON", "matchId"]}
+
+    # 아무것도 안 바뀐 재실행도 같은 결과
+    pd.testing.assert_frame_equal(check(base, parts, columns), second)
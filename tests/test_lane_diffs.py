@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+
+from bench import _lane_diffs_per_match
+from lane_diffs import LaneStats
+
+POSITIONS = ["TOP", "JUNGLE", "MIDDLE", "BOTTOM", "UTILITY"]
+
+
+def make_match(rng, i, minutes):
+    parts, frames = [], {}
+    for pid in range(1, 11):
+        pos = POSITIONS[(pid - 1) % 5]
+        if rng.random() < 0.1:
+            pos = rng.choice(["", "Invalid", "TOP"])  # UNKNOWN / 한 팀에 같은 라인 둘
+        parts.append({"participantId": pid, "teamId": 100 if pid <= 5 else 200, "teamPosition": pos})
+    for minute in minutes:
+        if rng.random() < 0.2:
+            continue  # 그 분까지 가지 않은 경기
+        frames[minute] = {"participantFrames": {
+            str(pid): {"totalGold": float(rng.integers(1000, 9000)) + rng.random(), "xp": int(rng.integers(500, 9000)),
+                       "minionsKilled": int(rng.integers(0, 150)), "jungleMinionsKilled": int(rng.integers(0, 60))}
+            for pid in range(1, 11) if rng.random() > 0.05
+        }}
+    return {"metadata": {"matchId": f"KR_{i}"}, "info": {"participants": parts}}, frames
+
+
+def test_lane_stats_matches_per_match_loop():
+    rng = np.random.default_rng(0)
+    minutes = (10, 15)
+    items = [make_match(rng, i, minutes) for i in range(200)]
+
+    rows = []
+    stats = LaneStats(minutes)
+    for m, frames in items:
+        rows.extend(_lane_diffs_per_match(m, frames, minutes))
+        stats.add(m, frames)
+    pd.testing.assert_frame_equal(pd.DataFrame(rows), stats.frame())
@@ -0,0 +1,36 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from metric_cube import box_stats, build_cube, merge_cube  # noqa: E402
+
+
+def exact_whiskers(values, lower, upper):
+    inside = values[(values >= lower) & (values <= upper)]
+    return inside.min(), inside.max()
+
+
+def cell_of(values, parts=1):
+    df = pd.DataFrame({"tier": "GOLD", "role": np.arange(len(values)) % parts, "x": values})
+    cube = build_cube(df, ["x"], ["tier", "role"])
+    return merge_cube(cube, ["tier"]).iloc[0]
+
+
+def test_box_stats_small_array_is_exact():
+    values = np.array([1.0, 2, 2, 3, 4, 4, 5, 6, 7, 8, 9, 30, -25, 10, 3.5])
+    s = box_stats(cell_of(values))
+    assert np.allclose([s["q1"], s["median"], s["q3"]], np.quantile(values, [0.25, 0.5, 0.75]))
+    assert (s["lowerfence"], s["upperfence"]) == exact_whiskers(values, s["lower"], s["upper"])
+
+
+def test_box_stats_whiskers_from_tails():
+    # fence가 저장된 tail 안에 있다: whisker는 실제 값이어야 한다 (보간값이 아니라)
+    rng = np.random.default_rng(0)
+    values = np.concatenate([rng.normal(size=2000), rng.normal(0, 4, size=20)])
+    for parts in (1, 7):
+        s = box_stats(cell_of(values, parts))
+        assert (s["lowerfence"], s["upperfence"]) == exact_whiskers(values, s["lower"], s["upper"])
+        assert np.allclose([s["q1"], s["median"], s["q3"]], np.quantile(values, [0.25, 0.5, 0.75]), atol=0.02)
@@ -0,0 +1,64 @@
+import importlib.util
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# SoloQ/clean.py와 이름이 같으므로 파일 경로로 따로 불러온다
+_spec = importlib.util.spec_from_file_location("pro_clean", os.path.join(ROOT, "pro", "clean.py"))
+pro_clean = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(pro_clean)
+
+
+def make_season(rng, n, extra=True):
+    pos = rng.choice(["top", "jng", "mid", "bot", "sup", "team", " "], n, p=[.17, .17, .17, .17, .17, .1, .05])
+    df = pd.DataFrame({
+        "gameid": [f"G{i // 12}" for i in range(n)],
+        "datacompleteness": rng.choice(["complete", "partial"], n, p=[.85, .15]),
+        "position": pos,
+        "gamelength": rng.choice(["1800", "250", "x", ""], n, p=[.85, .05, .05, .05]),
+        "champion": rng.choice(["Ahri", "Jax", None], n, p=[.48, .48, .04]),
+        "kills": rng.integers(0, 10, n),
+        "deaths": rng.integers(0, 10, n),
+        "assists": rng.integers(0, 10, n),
+        "teamkills": rng.integers(0, 30, n),
+        "damagetochampions": rng.integers(0, 30000, n).astype(float),
+        "dpm": rng.random(n) * 900,
+        "totalgold": rng.integers(5000, 15000, n),
+        "visionscore": rng.integers(0, 90, n),
+        "mostly_nan": np.where(rng.random(n) < .9, np.nan, 1.0),
+        "constant": 7,
+        "flag": rng.random(n) < .5,
+        "mixed": rng.choice(["1", "2", "a"], n),
+        "late_nan": np.where(np.arange(n) > n - 5, np.nan, rng.integers(0, 5, n).astype(float)),
+    })
+    # 필터 뒤에만 상수인 컬럼: partial row에만 다른 값
+    df["filtered_constant"] = np.where(df["datacompleteness"] == "partial", 2, 1)
+    if not extra:
+        df = df.drop(columns=["mixed", "flag"])
+    return df
+
+
+@pytest.mark.parametrize("chunksize", [7, 50, 10_000])
+def test_streaming_matches_in_memory_clean(tmp_path, chunksize):
+    rng = np.random.default_rng(chunksize)
+    paths = []
+    for i, df in enumerate([make_season(rng, 240), make_season(rng, 130, extra=False)]):
+        paths.append(str(tmp_path / f"season{i}.csv"))
+        df.to_csv(paths[-1], index=False)
+
+    expected = pro_clean.clean_pro_df(pd.concat([pd.read_csv(p) for p in paths], ignore_index=True))
+    pro_clean.arrow_safe(expected).to_parquet(tmp_path / "memory.parquet", index=False)
+    rows, ncols = pro_clean.clean_pro_streaming(paths, str(tmp_path / "stream.parquet"), chunksize,
+                                                str(tmp_path / "stream.csv"))
+
+    assert (rows, ncols) == expected.shape
+    assert "mostly_nan" not in expected and "constant" not in expected and "filtered_constant" not in expected
+    pd.testing.assert_frame_equal(pd.read_parquet(tmp_path / "stream.parquet"),
+                                  pd.read_parquet(tmp_path / "memory.parquet"))
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / "stream.csv"), expected.reset_index(drop=True),
+                                  check_dtype=False)
@@ -0,0 +1,43 @@
+import pytest
+
+import rate_limit
+from rate_limit import RateLimiter, TokenBucket, parse_limits
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_token_bucket_goes_into_debt(clock):
+    b = TokenBucket(2, 1)
+    assert [b.take(100.0), b.take(100.0), b.take(100.0)] == [0.0, 0.0, 0.5]
+    assert b.take(101.0) == 0.0  # 1초에 2개 refill: -1 -> 1 -> 0
+
+
+def test_reserve_waits_for_the_slowest_window(clock):
+    lim = RateLimiter([(2, 1), (3, 10)])
+    waits = [lim.reserve() for _ in range(4)]
+    assert waits[:3] == [0.0, 0.0, 0.5]
+    assert waits[3] == pytest.approx(1 / 0.3)  # 10초 창: 3개 중 1개 빚
+    assert lim.in_flight == 4 and lim.stats["requests"] == 4
+
+
+def test_penalize_blocks_until_retry_after(clock):
+    lim = RateLimiter([(20, 1)])
+    lim.penalize(5)
+    assert lim.reserve() == pytest.approx(5.0)
+    assert lim.stats["429"] == 1
+    clock[0] += 6
+    assert lim.reserve() == 0.0
+
+
+def test_observe_resyncs_from_headers(clock):
+    lim = RateLimiter([(20, 1)])
+    lim.reserve()
+    lim.observe("10:1,50:60", "9:1,1:60")  # 서버 기준 1초 창에 9개 사용
+    assert lim.limits == parse_limits("10:1,50:60")
+    assert lim.reserve() == 0.0   # 10 - 9 - in_flight 0 = 1개 남음
+    assert lim.reserve() == pytest.approx(0.1)
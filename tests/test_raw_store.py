@@ -0,0 +1,44 @@
+from raw_store import ArchiveStore, FileStore, MixedStore, open_store
+
+
+def match(mid, n=0):
+    return {"metadata": {"matchId": mid}, "info": {"n": n}}
+
+
+def test_mixed_tier_reads_archive_and_files(tmp_path):
+    tier = str(tmp_path / "GOLD")
+    files = FileStore(tier)
+    for mid in ("KR_1", "KR_2", "KR_3"):
+        files.put("matches", mid, match(mid))
+    files.put("timelines", "KR_1", {"frames": []})
+
+    # 이미 per-file 응답이 있는 tier에 archive가 생긴다 (RAW_LAYOUT=archive)
+    archive = ArchiveStore(tier)
+    archive.put("matches", "KR_3", match("KR_3", 1))
+    archive.put("matches", "KR_4", match("KR_4"))
+    archive.close()
+
+    store = open_store(tier, "archive", "zstd")
+    assert isinstance(store, MixedStore)
+    assert store.ids("matches") == ["KR_1", "KR_2", "KR_3", "KR_4"]
+    assert [mid for mid, _ in store.scan("matches")] == store.ids("matches")
+    assert store.load("matches", "KR_3")["info"]["n"] == 1  # 둘 다 있으면 archive
+    assert store.has("timelines", "KR_1") and store.ids("timelines") == ["KR_1"]
+    assert set(store.stamps("matches")) == {"KR_1", "KR_2", "KR_3", "KR_4"}
+
+    store.put("matches", "KR_5", match("KR_5"))
+    store.close()
+    check = ArchiveStore(tier)
+    assert "KR_5" in check.ids("matches")
+    check.close()
+    assert "KR_5" not in FileStore(tier).ids("matches")
+
+
+def test_archive_only_tier_stays_archive_store(tmp_path):
+    tier = str(tmp_path / "GOLD")
+    archive = ArchiveStore(tier)
+    archive.put("matches", "KR_1", match("KR_1"))
+    archive.close()
+    store = open_store(tier)
+    assert isinstance(store, ArchiveStore) and store.ids("matches") == ["KR_1"]
+    store.close()
@@ -0,0 +1,58 @@
+import glob
+import json
+import mmap
+import os
+
+import pytest
+
+from timeline_stream import frames_at, pick_frames
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TARGETS = [0, 60_000, 599_999, 600_000, 900_000, 10_000_000]  # 마지막 frame 이후 target 포함
+
+
+def full_decode(raw, targets):
+    picked = pick_frames(json.loads(raw)["info"]["frames"], targets)
+    return {t: (fr["participantFrames"], fr["timestamp"]) for t, fr in picked.items()}
+
+
+def partial(buf, targets):
+    return {t: (fr["participantFrames"], fr["timestamp"]) for t, fr in frames_at(buf, targets).items()}
+
+
+def make_timeline(n_frames, indent=None):
+    frames = [{
+        "events": [{"type": "ITEM_PURCHASED", "timestamp": i * 60_000 + 5, "participantFrames": {"x": 1}}] if i else [],
+        "participantFrames": {str(pid): {"totalGold": 500 + i * pid, "position": {"x": i, "y": pid}} for pid in range(1, 11)},
+        "timestamp": i * 60_000 + (17 if i else 0),
+    } for i in range(n_frames)]
+    return json.dumps({"metadata": {"matchId": "KR_1"}, "info": {"frameInterval": 60000, "frames": frames}},
+                      indent=indent).encode()
+
+
+@pytest.mark.parametrize("indent", [None, 2])
+@pytest.mark.parametrize("n_frames", [1, 12, 30])
+def test_frames_at_matches_full_decode(n_frames, indent):
+    raw = make_timeline(n_frames, indent)
+    assert partial(raw, TARGETS) == full_decode(raw, TARGETS)
+
+
+def test_frames_at_falls_back_on_other_key_order():
+    frame = {"timestamp": 0, "participantFrames": {"1": {"totalGold": 500}}, "events": []}
+    raw = json.dumps({"info": {"frames": [frame]}}).encode()
+    assert partial(raw, [0, 60_000]) == full_decode(raw, [0, 60_000])
+
+
+def test_frames_at_no_frames():
+    assert frames_at(b'{"info": {"frames": []}}', TARGETS) == {}
+
+
+def test_frames_at_real_timelines_via_mmap():
+    paths = sorted(glob.glob(os.path.join(ROOT, "SoloQ", "output_*_by_tier", "*", "timelines", "*.json")))[:5]
+    if not paths:
+        pytest.skip("no committed timelines")
+    for path in paths:
+        with open(path, "rb") as f:
+            raw = f.read()
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                assert partial(mm, TARGETS) == full_decode(raw, TARGETS)
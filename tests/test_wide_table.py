@@ -0,0 +1,82 @@
+import glob
+import os
+import random
+
+import pandas as pd
+import pytest
+
+from wide_table import WideTable
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+KEYS = ["a", "b", "c", "d", "e", "f", "g", "h"]
+
+
+def random_value(rng, key):
+    # key마다 주 type이 있고 가끔 None / 다른 type / int64 밖의 값이 섞인다
+    r = rng.random()
+    if r < 0.05:
+        return None
+    if r < 0.08:
+        return rng.choice(["x", 1.5, True, 7, 2**64])
+    return {"a": rng.randint(-5, 5), "b": rng.random(), "c": rng.random() < 0.5, "d": rng.choice("xyz"),
+            "e": rng.randint(0, 3), "f": rng.random(), "g": rng.random() < 0.5, "h": "s"}[key]
+
+
+def random_rows(rng, n):
+    rows = []
+    for _ in range(n):
+        keys = [k for k in KEYS if rng.random() < 0.8]
+        rng.shuffle(keys)  # key 순서도 row마다 다르다 -> 컬럼 순서는 처음 나온 순서
+        rows.append({k: random_value(rng, k) for k in keys})
+    return rows
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_frame_matches_dataframe_of_records(seed):
+    rng = random.Random(seed)
+    rows = random_rows(rng, rng.randint(1, 300))
+    table = WideTable(batch=rng.choice([1, 7, 512]))
+    for r in rows:
+        table.append(r)
+    pd.testing.assert_frame_equal(table.frame(), pd.DataFrame(rows))
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_merge_and_schema_match_dataframe_of_records(seed):
+    rng = random.Random(100 + seed)
+    chunks = [random_rows(rng, rng.randint(0, 80)) for _ in range(4)]
+    rows = [r for c in chunks for r in c]
+    first = WideTable()
+    first.extend(rows)
+    schema = first.kinds()
+
+    table = WideTable(schema)
+    for c in chunks:
+        part = WideTable(schema, batch=16)
+        part.extend(c)
+        table.merge(part)
+    pd.testing.assert_frame_equal(table.frame(), pd.DataFrame(rows))
+
+
+def test_empty_rows():
+    table = WideTable()
+    table.extend([{}, {}])
+    pd.testing.assert_frame_equal(table.frame(), pd.DataFrame([{}, {}]))
+
+
+def test_wide_dump_keeps_record_column_order():
+    # 실제 match의 --full row를 어떤 순서로 넣어도 컬럼 순서 / dtype은 pd.DataFrame(rows)와 같다
+    from jsonio import loads
+    from parse import parse_one_json
+
+    paths = sorted(glob.glob(os.path.join(ROOT, "SoloQ", "output_15.24_by_tier", "*", "matches", "*.json")))[:40]
+    if not paths:
+        pytest.skip("no committed matches")
+    random.Random(0).shuffle(paths)
+    rows = []
+    for path in paths:
+        with open(path, "rb") as f:
+            rows.extend(parse_one_json(os.path.basename(os.path.dirname(os.path.dirname(path))), loads(f.read())))
+    table = WideTable()
+    table.extend(rows)
+    pd.testing.assert_frame_equal(table.frame(), pd.DataFrame(rows))
@@ -1,27 +1,182 @@
+# unified.py
+#
+#   python unified.py                 # PATCH_MM (default 15.24) in memory -> unified_pro_soloq_with_metrics.parquet / .csv
+#   python unified.py --dataset       # same, plus the partitioned unified_pro_soloq_with_metrics/ dataset
+#   python unified.py --stream        # every pro / SoloQ clean file, batch by batch -> unified_pro_soloq_with_metrics/
+#   python unified.py --stream --pro pro/data/pro_2024_cleaned.parquet pro/data/pro_2025_cleaned.parquet \
+#       --soloq SoloQ/data/soloq_clean_15.*.parquet --batch-size 200000
+import os
+import glob
+import shutil
+import argparse
 import pandas as pd
 import numpy as np
 from typing import Optional
 
+from metric_cube import CUBE_DIMS, build_cube, cube_path, merge_cube, save_cube
+from SoloQ.tableio import map_categorical  # fn은 값 종류마다 한 번만, 결과는 Categorical (SoloQ clean과 같은 함수)
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    import pyarrow.dataset as pds
+    HAS_ARROW = True
+except Exception:
+    HAS_ARROW = False
+
+# unified_pro_soloq_with_metrics.parquet dtype
+UNIFIED_SCHEMA = {
+    "dataset_type": "category",
+    "tier": "category",
+    "match_id": "category",
+    "patch": "category",
+    "role": "category",
+    "champion": "category",
+    "win": "bool",
+    "kills": "Int64",
+    "deaths": "Int64",
+    "assists": "Int64",
+    **{c: "float32" for c in [
+        "duration_min", "kda", "player_damage", "dpm", "total_gold", "gpm", "cs_total", "cspm",
+        "teamkills", "kp", "aggression_index", "damage_share", "team_damage", "rce",
+        "vision_score", "vspm", "wards_placed", "wards_killed", "vision_efficiency",
+        "team_dragons", "team_barons", "team_towers",
+        "gold_diff_10", "xp_diff_10", "cs_diff_10", "lane_pressure_index",
+    ]},
+}
+
+UNIFIED_COLUMNS = [
+    "dataset_type",
+    "tier",
+    "match_id",
+    "patch",
+    "duration_min",
+    "role",
+    "champion",
+    "win",
+    # combat
+    "kills",
+    "deaths",
+    "assists",
+    "kda",
+    "player_damage",
+    "dpm",
+    "total_gold",
+    "gpm",
+    "cs_total",
+    "cspm",
+    "teamkills",
+    "kp",
+    "aggression_index",
+    "damage_share",
+    "team_damage",
+    "rce",
+    # vision
+    "vision_score",
+    "vspm",
+    "wards_placed",
+    "wards_killed",
+    "vision_efficiency",
+    # objectives
+    "team_dragons",
+    "team_barons",
+    "team_towers",
+    # lane
+    "gold_diff_10",
+    "xp_diff_10",
+    "cs_diff_10",
+    "lane_pressure_index",
+]
+
+# metric cube (metric_cube.py)에 모으는 숫자 컬럼
+CUBE_METRICS = [c for c in UNIFIED_COLUMNS if UNIFIED_SCHEMA[c] != "category"]
+
+# 파티션 dataset: <dir>/dataset_type=<..>/patch=<..>/tier=<..>/part-0.parquet (row group은 role별)
+PARTITION_COLS = ["dataset_type", "patch", "tier"]
+ROW_GROUP_COL = "role"
+BUFFER_ROWS = 1_000_000  # 파티션 writer가 모아 두는 최대 row 수 (클수록 row group이 커진다, ~150 MB)
+MISSING_PARTITION = "UNKNOWN"  # Hive null partition은 pd.read_parquet이 못 읽는다
+STREAM_DIR = "unified_pro_soloq_with_metrics"
+
+
+def read_table(path: str) -> pd.DataFrame:
+    # 같은 이름의 .parquet이 있으면 그것을, 없으면 CSV (SoloQ/tableio.load_table과 같은 규칙)
+    stem = os.path.splitext(path)[0]
+    if HAS_ARROW and os.path.exists(stem + ".parquet"):
+        return pd.read_parquet(stem + ".parquet")
+    return pd.read_csv(stem + ".csv")
+
+
+def iter_table(path: str, batch_size: int):
+    # read_table과 같은 파일을 batch_size 행씩
+    stem = os.path.splitext(path)[0]
+    if HAS_ARROW and os.path.exists(stem + ".parquet"):
+        for batch in pq.ParquetFile(stem + ".parquet").iter_batches(batch_size=batch_size):
+            yield batch.to_pandas()
+        return
+    yield from pd.read_csv(stem + ".csv", chunksize=batch_size)
+
+
+def input_paths(patterns: list) -> list:
+    # glob 결과에서 같은 stem의 .parquet / .csv는 하나만 (read_table이 .parquet을 고른다)
+    stems = {}
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)) or [pattern]:
+            stem = os.path.splitext(path)[0]
+            if stem not in stems or path.endswith(".parquet"):
+                stems[stem] = path
+    return list(stems.values())
+
+
+# 대문자 role 표기 -> 표준 role (없는 값은 그대로)
+ROLE_ALIASES = {
+    **dict.fromkeys(["TOP", "TOPLANE", "TOP_LANE"], "TOP"),
+    **dict.fromkeys(["JUNGLE", "JNG", "JG", "JUN", "JUG"], "JUNGLE"),
+    **dict.fromkeys(["MID", "MIDDLE", "MID_LANE"], "MIDDLE"),
+    **dict.fromkeys(["ADC", "BOT", "BOTTOM", "DUO_CARRY"], "BOTTOM"),
+    **dict.fromkeys(["SUP", "SUPPORT", "UTILITY", "DUO_SUPPORT"], "UTILITY"),
+    "TEAM": "TEAM",
+    **dict.fromkeys(["NONE", "", "UNASSIGNED"], "UNKNOWN"),
+}
+
 
 def normalize_role(raw: str) -> str:
     if raw is None:
         return "UNKNOWN"
     r = str(raw).upper().strip()
-    if r in {"TOP", "TOPLANE", "TOP_LANE"}:
-        return "TOP"
-    if r in {"JUNGLE", "JNG", "JG", "JUN", "JUG"}:
-        return "JUNGLE"
-    if r in {"MID", "MIDDLE", "MID_LANE"}:
-        return "MIDDLE"
-    if r in {"ADC", "BOT", "BOTTOM", "DUO_CARRY"}:
-        return "BOTTOM"
-    if r in {"SUP", "SUPPORT", "UTILITY", "DUO_SUPPORT"}:
-        return "UTILITY"
-    if r in {"TEAM"}:
-        return "TEAM"
-    if r in {"NONE", "", "UNASSIGNED"}:
-        return "UNKNOWN"
-    return r
+    return ROLE_ALIASES.get(r, r)
+
+
+def as_str(v):
+    # Series.astype(str)와 같은 값 (결측은 결측)
+    return v if pd.isna(v) else str(v)
+
+
+def constant_categorical(value: str, index: pd.Index) -> pd.Series:
+    return pd.Series(pd.Categorical.from_codes(np.zeros(len(index), dtype=np.int8), categories=[value]), index=index)
+
+
+def concat_categorical(frames: list) -> pd.DataFrame:
+    # pd.concat은 category가 다른 categorical 컬럼을 문자열로 푼다 -> category를 합쳐 두고 concat
+    frames = list(frames)
+    for c in frames[0].columns:
+        cols = [f[c] for f in frames if c in f.columns]
+        if len(cols) == len(frames) and all(isinstance(col.dtype, pd.CategoricalDtype) for col in cols):
+            cats = pd.Index(sorted(set().union(*(col.cat.categories for col in cols))))
+            frames = [f.assign(**{c: f[c].cat.set_categories(cats)}) for f in frames]
+    return pd.concat(frames, ignore_index=True)
+
+
+def major_minor(version):
+    # "15.24.123.4567" -> "15.24" (gameVersion.str.split(".") 두 조각과 같은 결과)
+    if pd.isna(version):
+        return np.nan
+    parts = version.split(".")
+    return parts[0] + "." + parts[1] if len(parts) > 1 else np.nan
+
+
+def pro_patch_mask(df: pd.DataFrame, prefix: str) -> pd.Series:
+    return df["patch"].astype(str).str.startswith(str(prefix))
 
 
 def parse_pro_with_raw(
@@ -31,23 +186,22 @@ def parse_pro_with_raw(
     # 느슨한 패치 필터: "15.2" 이런 prefix 기준
     if patch_mm_prefix is not None and "patch" in df.columns:
         before = len(df)
-        mask = df["patch"].astype(str).str.startswith(str(patch_mm_prefix))
-        df = df[mask]
+        df = df[pro_patch_mask(df, patch_mm_prefix)]
         print(f"[PRO] patch startswith {patch_mm_prefix}: {before} -> {len(df)}")
 
     out = pd.DataFrame(index=df.index)
 
-    out["dataset_type"] = "pro"
-    out["tier"] = "PRO"
+    out["dataset_type"] = constant_categorical("pro", df.index)
+    out["tier"] = constant_categorical("PRO", df.index)
 
-    out["match_id"] = df["gameid"].astype(str)
-    out["patch"] = df["patch"].astype(str)
+    # 문자열 컬럼은 값 종류마다 한 번만 변환해서 categorical로
+    out["match_id"] = map_categorical(df["gameid"], as_str)
+    out["patch"] = map_categorical(df["patch"], as_str)
     out["duration_min"] = df["gamelength"].astype(float) / 60.0
 
-    roles = df["position"].astype(str)
-    out["role"] = roles.apply(normalize_role)
+    out["role"] = map_categorical(df["position"], lambda v: normalize_role(as_str(v)))
 
-    out["champion"] = df["champion"].astype(str)
+    out["champion"] = map_categorical(df["champion"], as_str)
 
     # combat
     out["kills"] = df["kills"].astype("Int64")
@@ -101,22 +255,24 @@ def parse_soloq_with_raw(df: pd.DataFrame) -> pd.DataFrame:
     out = pd.DataFrame(index=df.index)
 
     # dataset / tier
-    out["dataset_type"] = "soloq"
-    out["tier"] = df["tier"].astype(str) if "tier" in df.columns else "UNKNOWN"
+    out["dataset_type"] = constant_categorical("soloq", df.index)
+    if "tier" in df.columns:
+        out["tier"] = map_categorical(df["tier"], as_str)
+    else:
+        out["tier"] = constant_categorical("UNKNOWN", df.index)
 
     # match id
     if "matchId" in df.columns:
-        out["match_id"] = df["matchId"].astype(str)
+        out["match_id"] = map_categorical(df["matchId"], as_str)
     elif "match_id" in df.columns:
-        out["match_id"] = df["match_id"].astype(str)
+        out["match_id"] = map_categorical(df["match_id"], as_str)
     else:
-        out["match_id"] = ""
+        out["match_id"] = constant_categorical("", df.index)
 
     if "gameVersion" in df.columns:
-        gv_split = df["gameVersion"].astype(str).str.split(".")
-        out["patch"] = gv_split.str[0] + "." + gv_split.str[1]
+        out["patch"] = map_categorical(df["gameVersion"], lambda v: major_minor(as_str(v)))
     elif "patch" in df.columns:
-        out["patch"] = df["patch"].astype(str)
+        out["patch"] = map_categorical(df["patch"], as_str)
     else:
         out["patch"] = np.nan
 
@@ -130,20 +286,18 @@ def parse_soloq_with_raw(df: pd.DataFrame) -> pd.DataFrame:
 
     # role: raw는 teamPosition, clean은 role
     if "teamPosition" in df.columns:
-        roles_src = df["teamPosition"].astype(str)
-        out["role"] = roles_src.apply(normalize_role)
+        out["role"] = map_categorical(df["teamPosition"], lambda v: normalize_role(as_str(v)))
     elif "role" in df.columns:
-        roles_src = df["role"].astype(str)
-        out["role"] = roles_src.apply(normalize_role)
+        out["role"] = map_categorical(df["role"], lambda v: normalize_role(as_str(v)))
     else:
-        out["role"] = "UNKNOWN"
+        out["role"] = constant_categorical("UNKNOWN", df.index)
 
     if "championName" in df.columns:
-        out["champion"] = df["championName"].astype(str)
+        out["champion"] = map_categorical(df["championName"], as_str)
     elif "champion" in df.columns:
-        out["champion"] = df["champion"].astype(str)
+        out["champion"] = map_categorical(df["champion"], as_str)
     else:
-        out["champion"] = "UNKNOWN"
+        out["champion"] = constant_categorical("UNKNOWN", df.index)
 
     # combat
     for col in ["kills", "deaths", "assists"]:
@@ -294,85 +448,249 @@ def add_derived_metrics(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
+def finalize_unified(df: pd.DataFrame) -> pd.DataFrame:
+    for col in UNIFIED_COLUMNS:
+        if col not in df.columns:
+            df[col] = np.nan
+    return df[UNIFIED_COLUMNS].astype(UNIFIED_SCHEMA)
+
+
 def build_unified_dataset(
     pro_path: str,
     soloq_path: str,
     output_path: Optional[str] = None,
     pro_patch_prefix: Optional[str] = None,
     patch_mm: Optional[str] = None, 
+    dataset_dir: Optional[str] = None,
 ) -> pd.DataFrame:
-    pro_raw = pd.read_csv(pro_path)
-    soloq_raw = pd.read_csv(soloq_path)
+    pro_raw = read_table(pro_path)
+    soloq_raw = read_table(soloq_path)
 
     # pro는 prefix로 느슨하게 필터
     pro_parsed = parse_pro_with_raw(pro_raw, patch_mm_prefix=pro_patch_prefix)
     # soloq는 이미 clean 단계에서 patch 필터 했다고 가정하고 그대로 사용
     soloq_parsed = parse_soloq_with_raw(soloq_raw)
 
-    unified = pd.concat([pro_parsed, soloq_parsed], ignore_index=True)
+    unified = concat_categorical([pro_parsed, soloq_parsed])
     unified = add_derived_metrics(unified)
 
-    columns_order = [
-        "dataset_type",
-        "tier",
-        "match_id",
-        "patch",
-        "duration_min",
-        "role",
-        "champion",
-        "win",
-        # combat
-        "kills",
-        "deaths",
-        "assists",
-        "kda",
-        "player_damage",
-        "dpm",
-        "total_gold",
-        "gpm",
-        "cs_total",
-        "cspm",
-        "teamkills",
-        "kp",
-        "aggression_index",
-        "damage_share",
-        "team_damage",
-        "rce",
-        # vision
-        "vision_score",
-        "vspm",
-        "wards_placed",
-        "wards_killed",
-        "vision_efficiency",
-        # objectives
-        "team_dragons",
-        "team_barons",
-        "team_towers",
-        # lane
-        "gold_diff_10",
-        "xp_diff_10",
-        "cs_diff_10",
-        "lane_pressure_index",
-    ]
-
-    for col in columns_order:
-        if col not in unified.columns:
-            unified[col] = np.nan
-
-    unified = unified[columns_order]
+    unified = finalize_unified(unified)
 
     if output_path is not None:
-        unified.to_csv(output_path, index=False)
-        print(f"[UNIFIED] saved → {output_path} (shape={unified.shape})")
+        # Parquet은 app 입력, CSV는 배포용 export
+        stem = os.path.splitext(output_path)[0]
+        if HAS_ARROW:
+            unified.to_parquet(stem + ".parquet", index=False, compression="zstd")
+            print(f"[UNIFIED] saved → {stem}.parquet (shape={unified.shape})")
+        unified.to_csv(stem + ".csv", index=False)
+        print(f"[UNIFIED] saved → {stem}.csv (shape={unified.shape})")
+    if dataset_dir is not None and HAS_ARROW:
+        write_unified_dataset(unified, dataset_dir)
+    if output_path is not None and HAS_ARROW:
+        # 출력을 다 쓴 뒤에 저장한다: cube에 그 출력들의 내용 fingerprint를 적어 둔다
+        cube = build_cube(unified, CUBE_METRICS)
+        save_cube(cube, cube_path(stem), [stem + ".parquet", stem + ".csv", dataset_dir])
+        print(f"[UNIFIED] saved → {cube_path(stem)} ({len(cube)} cells)")
 
     return unified
 
 
+def arrow_schema(columns: list):
+    # category는 파일에 문자열로 쓴다: batch마다 category가 달라도 schema가 같고,
+    # dictionary 타입이면 pyarrow가 row group 통계로 거르지 못한다 (Parquet이 알아서 dictionary 인코딩)
+    empty = pd.DataFrame({c: pd.Series(dtype=UNIFIED_SCHEMA[c]) for c in columns})
+    schema = pa.Schema.from_pandas(empty, preserve_index=False)
+    for i, field in enumerate(schema):
+        if pa.types.is_dictionary(field.type):
+            schema = schema.set(i, field.with_type(pa.string()))
+    return schema
+
+
+class PartitionWriter:
+    """Appends unified batches to a Hive-partitioned Parquet dataset, one open file per partition.
+
+    Files go to <root>.tmp/ and close(commit=True) swaps it in for root. Rows are buffered per
+    partition (at most buffer_rows in total, the largest partition is flushed first) so that row
+    groups stay large; each flush writes one row group per role, so a role filter skips row groups
+    by their min / max statistics.
+    """
+
+    def __init__(self, root: str, partition_cols: list = PARTITION_COLS, buffer_rows: int = BUFFER_ROWS):
+        self.root = root
+        self.tmp_dir = root.rstrip("/\\") + ".tmp"
+        self.partition_cols = list(partition_cols)
+        self.schema = arrow_schema([c for c in UNIFIED_COLUMNS if c not in self.partition_cols])
+        self.buffer_rows = buffer_rows
+        self.pending = {}  # partition key -> [DataFrame, ...]
+        self.pending_rows = 0
+        self.writers = {}
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+        os.makedirs(self.tmp_dir)
+
+    def write(self, df: pd.DataFrame):
+        for key, part in df.groupby(self.partition_cols, sort=False, observed=True, dropna=False):
+            key = tuple(MISSING_PARTITION if pd.isna(v) else str(v) for v in key)
+            self.pending.setdefault(key, []).append(part.drop(columns=self.partition_cols))
+            self.pending_rows += len(part)
+        while self.pending_rows > self.buffer_rows:
+            self.flush(max(self.pending, key=lambda k: sum(len(p) for p in self.pending[k])))
+
+    def flush(self, key):
+        parts = self.pending.pop(key)
+        self.pending_rows -= sum(len(p) for p in parts)
+        writer = self.writers.get(key)
+        if writer is None:
+            path = os.path.join(self.tmp_dir, *[f"{c}={v}" for c, v in zip(self.partition_cols, key)])
+            os.makedirs(path, exist_ok=True)
+            writer = pq.ParquetWriter(os.path.join(path, "part-0.parquet"), self.schema, compression="zstd")
+            self.writers[key] = writer
+        part = concat_categorical(parts) if len(parts) > 1 else parts[0]
+        for _, group in part.groupby(ROW_GROUP_COL, sort=True, observed=True, dropna=False):
+            writer.write_table(pa.Table.from_pandas(group, schema=self.schema, preserve_index=False))
+
+    def close(self, commit: bool = True):
+        if commit:
+            for key in list(self.pending):
+                self.flush(key)
+        self.pending, self.pending_rows = {}, 0
+        for writer in self.writers.values():
+            writer.close()
+        self.writers = {}
+        if commit:
+            shutil.rmtree(self.root, ignore_errors=True)
+            os.replace(self.tmp_dir, self.root)
+            os.utime(self.root)  # app은 mtime으로 단일 파일과 어느 쪽이 최신인지 본다
+
+
+def build_unified_streaming(
+    pro_paths: list,
+    soloq_paths: list,
+    out_dir: str = STREAM_DIR,
+    batch_size: int = 200_000,
+    pro_patch_prefix: Optional[str] = None,
+    csv_path: Optional[str] = None,
+) -> int:
+    """build_unified_dataset over any number of pro / SoloQ files, batch_size rows at a time.
+
+    Every step is row-wise, so each batch goes parse -> add_derived_metrics -> finalize_unified and
+    is appended to out_dir (partitioned by dataset_type / patch / tier) and optionally csv_path;
+    memory stays around one batch plus the writer's BUFFER_ROWS. out_dir is written next to the
+    old one and swapped in at the end; the metric cube is merged batch by batch.
+    """
+    if csv_path and os.path.exists(csv_path):
+        os.remove(csv_path)
+    writer, total, done, cube = PartitionWriter(out_dir), 0, False, None
+    try:
+        for dataset_type, paths in (("pro", pro_paths), ("soloq", soloq_paths)):
+            for path in paths:
+                rows_in = rows_out = 0
+                for batch in iter_table(path, batch_size):
+                    rows_in += len(batch)
+                    if dataset_type == "pro":
+                        if pro_patch_prefix is not None and "patch" in batch.columns:
+                            batch = batch[pro_patch_mask(batch, pro_patch_prefix)]
+                        parsed = parse_pro_with_raw(batch)
+                    else:
+                        parsed = parse_soloq_with_raw(batch)
+                    if not len(parsed):
+                        continue
+                    out = finalize_unified(add_derived_metrics(parsed))
+                    writer.write(out)
+                    # batch cube를 합쳐 간다 (cell 수만큼만 남는다)
+                    cells = build_cube(out, CUBE_METRICS)
+                    cube = cells if cube is None else merge_cube(pd.concat([cube, cells], ignore_index=True), CUBE_DIMS)
+                    if csv_path:
+                        out.to_csv(csv_path, mode="a", header=not os.path.exists(csv_path), index=False)
+                    rows_out += len(out)
+                print(f"[UNIFIED] {dataset_type} {path}: {rows_in} -> {rows_out} rows")
+                total += rows_out
+        partitions = len(writer.writers.keys() | writer.pending.keys())
+        done = True
+    finally:
+        writer.close(commit=done)
+    print(f"[UNIFIED] saved → {out_dir}/ ({total} rows, {partitions} partitions)")
+    if cube is not None:
+        save_cube(cube, cube_path(out_dir), [out_dir, csv_path])
+        print(f"[UNIFIED] saved → {cube_path(out_dir)} ({len(cube)} cells)")
+    if csv_path:
+        print(f"[UNIFIED] saved → {csv_path}")
+    return total
+
+
+def write_unified_dataset(df: pd.DataFrame, out_dir: str = STREAM_DIR) -> str:
+    writer, done = PartitionWriter(out_dir), False
+    try:
+        writer.write(df)
+        partitions = len(writer.writers.keys() | writer.pending.keys())
+        done = True
+    finally:
+        writer.close(commit=done)
+    print(f"[UNIFIED] saved → {out_dir}/ ({len(df)} rows, {partitions} partitions)")
+    return out_dir
+
+
+def read_unified_dataset(
+    root: str = STREAM_DIR,
+    roles: Optional[list] = None,
+    tiers: Optional[list] = None,
+    patches: Optional[list] = None,
+    dataset_types: Optional[list] = None,
+    columns: Optional[list] = None,
+) -> pd.DataFrame:
+    """Rows of the partitioned dataset that match every given filter (None = no filter).
+
+    dataset_type / patch / tier pick directories, role skips row groups by their statistics and
+    columns limits the column chunks that are read. Dtypes follow UNIFIED_SCHEMA.
+    """
+    expr = None
+    for col, values in (("dataset_type", dataset_types), ("patch", patches), ("tier", tiers), ("role", roles)):
+        if values is not None:
+            # 빈 목록도 string 타입으로 (null 타입이면 isin이 실패)
+            cond = pds.field(col).isin(pa.array([str(v) for v in values], type=pa.string()))
+            expr = cond if expr is None else expr & cond
+    df = pd.read_parquet(root, columns=columns, filters=expr)
+    # 파티션 컬럼은 경로에서 와서 맨 뒤에 붙는다 -> UNIFIED_COLUMNS 순서로
+    df = df[[c for c in (columns or UNIFIED_COLUMNS) if c in df.columns]]
+    df = df.astype({c: UNIFIED_SCHEMA[c] for c in df.columns if c in UNIFIED_SCHEMA})
+    for c in df.columns[df.dtypes == "category"]:
+        # 파티션 컬럼은 디렉터리 순서 -> 단일 파일처럼 정렬
+        df[c] = df[c].cat.reorder_categories(sorted(df[c].cat.categories))
+    return df
+
+
 if __name__ == "__main__":
-    unified_df = build_unified_dataset(
-        pro_path="./pro/data/pro_2025_cleaned.csv",
-        soloq_path="./SoloQ/data/soloq_clean_15.24.csv",
-        output_path="unified_pro_soloq_with_metrics.csv",
-        pro_patch_prefix="15.2",  
-        patch_mm="15.24",          
-    )
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--stream", action="store_true",
+                    help=f"batch-wise build over all inputs into the partitioned {STREAM_DIR}/ dataset")
+    ap.add_argument("--pro", nargs="+", default=["./pro/data/pro_*_cleaned.*"], help="(--stream) pro clean files / globs")
+    ap.add_argument("--soloq", nargs="+", default=["./SoloQ/data/soloq_clean_*.*"], help="(--stream) SoloQ clean files / globs")
+    ap.add_argument("--pro-patch", default=None,
+                    help='pro patch prefix filter (default: "15.2" in memory, all patches with --stream)')
+    ap.add_argument("--batch-size", type=int, default=200_000, help="(--stream) rows per batch")
+    ap.add_argument("--dataset", action="store_true",
+                    help=f"also write the partitioned {STREAM_DIR}/ dataset (always on with --stream)")
+    ap.add_argument("--out", default=STREAM_DIR, help="partitioned dataset directory")
+    ap.add_argument("--csv", action="store_true", help="(--stream) also export unified_pro_soloq_with_metrics.csv")
+    args = ap.parse_args()
+
+    if args.stream:
+        if not HAS_ARROW:
+            raise SystemExit("[UNIFIED] --stream needs pyarrow")
+        build_unified_streaming(
+            pro_paths=input_paths(args.pro),
+            soloq_paths=input_paths(args.soloq),
+            out_dir=args.out,
+            batch_size=args.batch_size,
+            pro_patch_prefix=args.pro_patch,
+            csv_path="unified_pro_soloq_with_metrics.csv" if args.csv else None,
+        )
+    else:
+        patch_mm = os.getenv("PATCH_MM", "15.24").strip() or "15.24"
+        unified_df = build_unified_dataset(
+            pro_path="./pro/data/pro_2025_cleaned.parquet",
+            soloq_path=f"./SoloQ/data/soloq_clean_{patch_mm}.parquet",
+            output_path="unified_pro_soloq_with_metrics.csv",
+            pro_patch_prefix=args.pro_patch if args.pro_patch is not None else "15.2",
+            patch_mm=patch_mm,
+            dataset_dir=args.out if args.dataset else None,
+        )